@@ -2,8 +2,16 @@ import 'dart:async';
 import 'dart:convert';
 import 'package:flutter/foundation.dart';
 import 'package:flutter_inappwebview/flutter_inappwebview.dart';
+import '../../config.dart';
 import 'python_service.dart';
 
+// Serves the app's assets to the WebView over http: Pyodide fetches its
+// wasm, stdlib and wheels, which file:// pages are not allowed to do
+const int _assetServerPort = 8080;
+final InAppLocalhostServer _assetServer = InAppLocalhostServer(
+  port: _assetServerPort,
+);
+
 class PythonServiceMobile implements PythonService {
   HeadlessInAppWebView? _headlessWebView;
   Completer<void>? _initCompleter;
@@ -13,8 +21,21 @@ class PythonServiceMobile implements PythonService {
     if (_initCompleter != null) return _initCompleter!.future;
     _initCompleter = Completer<void>();
 
+    if (!_assetServer.isRunning()) {
+      await _assetServer.start();
+    }
+    const origin = 'http://localhost:$_assetServerPort';
+    final indexUrl = Config.pyodideIndexUrl.isNotEmpty
+        ? Config.pyodideIndexUrl
+        : '$origin/${Config.pyodideAssetDir}';
+
     _headlessWebView = HeadlessInAppWebView(
-      initialFile: 'assets/pyodide/index.html',
+      initialUrlRequest: URLRequest(
+        url: WebUri(
+          '$origin/assets/pyodide/index.html'
+          '?indexURL=${Uri.encodeQueryComponent(indexUrl)}',
+        ),
+      ),
       initialSettings: InAppWebViewSettings(
         isInspectable: true,
         javaScriptEnabled: true,
@@ -3,6 +3,7 @@ import 'dart:js_interop';
 import 'dart:js_interop_unsafe';
 import 'package:flutter/foundation.dart';
 import 'package:web/web.dart' as web;
+import '../../config.dart';
 import 'python_service.dart';
 
 @JS('loadPyodide')
@@ -29,18 +30,27 @@ class PythonServiceWeb implements PythonService {
   Future<void> initialize() async {
     if (_isInit) return;
 
+    // Flutter web serves asset files under assets/ next to index.html
+    final indexUrl = Config.pyodideIndexUrl.isNotEmpty
+        ? Config.pyodideIndexUrl
+        : Uri.parse(
+            web.document.baseURI,
+          ).resolve('assets/${Config.pyodideAssetDir}').toString();
+
     // Inject script tag if not present
     if (!globalContext.has('loadPyodide')) {
       final script =
           web.document.createElement('script') as web.HTMLScriptElement;
-      script.src = 'https://cdn.jsdelivr.net/pyodide/v0.26.4/full/pyodide.js';
+      script.src = '${indexUrl}pyodide.js';
       web.document.head!.appendChild(script);
 
       await _waitForLoadPyodide();
     }
 
     try {
-      _pyodide = await loadPyodideExternal().toDart;
+      _pyodide = await loadPyodideExternal(
+        {'indexURL': indexUrl}.jsify(),
+      ).toDart;
       await _pyodide!.loadPackage('micropip'.toJS).toDart;
 
       // Setup Output Capture
@@ -10,6 +10,24 @@ const nextConfig: NextConfig = {
     // Temporarily ignore ESLint errors during builds
     ignoreDuringBuilds: true,
   },
+  async headers() {
+    // Cross-origin isolation enables SharedArrayBuffer, which lets the
+    // Python workers interrupt a running cell instead of being killed.
+    // Opt-in because COEP blocks third-party embeds (e.g. YouTube) that
+    // do not send CORP headers.
+    if (process.env.NEXT_PUBLIC_CROSS_ORIGIN_ISOLATION !== 'true') {
+      return [];
+    }
+    return [
+      {
+        source: '/org/:orgSlug/chapter/:path*',
+        headers: [
+          { key: 'Cross-Origin-Opener-Policy', value: 'same-origin' },
+          { key: 'Cross-Origin-Embedder-Policy', value: 'credentialless' },
+        ],
+      },
+    ];
+  },
 };
 
 export default nextConfig;
@@ -0,0 +1,91 @@
+// Service worker for the self-hosted Pyodide bundle under /pyodide/v<version>/
+// Registered as /pyodide-sw.js?v=<version>; each version gets its own cache.
+
+const VERSION = new URL(self.location.href).searchParams.get('v') || 'dev';
+const CACHE_PREFIX = 'pyodide-v';
+const CACHE_NAME = `${CACHE_PREFIX}${VERSION}`;
+const BASE_PATH = `/pyodide/v${VERSION}/`;
+
+const CORE_FILES = [
+  'pyodide.js',
+  'pyodide.asm.js',
+  'pyodide.asm.wasm',
+  'python_stdlib.zip',
+  'pyodide-lock.json'
+];
+
+// Cache whatever is missing; a file that fails to download is simply
+// left for the fetch handler to try again later
+const precache = async (fileNames) => {
+  const cache = await caches.open(CACHE_NAME);
+  await Promise.allSettled(fileNames.map(async (fileName) => {
+    const url = BASE_PATH + fileName;
+    if (await cache.match(url)) return;
+    const response = await fetch(url);
+    if (response.ok) await cache.put(url, response);
+  }));
+};
+
+const precacheLock = async (lockName) => {
+  const response = await fetch(`${BASE_PATH}locks/${lockName}.json`);
+  if (!response.ok) return;
+  const lock = await response.json();
+  await precache(lock.files.map(file => file.file_name));
+};
+
+// Cached responses lose nothing, but wasm served by some hosts lacks the
+// MIME type WebAssembly.instantiateStreaming insists on
+const withWasmType = (url, response) => {
+  if (!url.pathname.endsWith('.wasm') || response.headers.get('Content-Type') === 'application/wasm') {
+    return response;
+  }
+  const headers = new Headers(response.headers);
+  headers.set('Content-Type', 'application/wasm');
+  return new Response(response.body, { status: response.status, statusText: response.statusText, headers });
+};
+
+// Versioned files never change, so the cache is always authoritative
+const cacheFirst = async (request) => {
+  const url = new URL(request.url);
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(request);
+  if (cached) return withWasmType(url, cached);
+
+  const response = await fetch(request);
+  if (response.ok) await cache.put(request, response.clone());
+  return withWasmType(url, response);
+};
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    precache(CORE_FILES)
+      .then(() => precacheLock('default'))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(
+        keys
+          .filter(key => key.startsWith(CACHE_PREFIX) && key !== CACHE_NAME)
+          .map(key => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener('fetch', (event) => {
+  const url = new URL(event.request.url);
+  if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+  if (!url.pathname.startsWith(BASE_PATH)) return;
+  event.respondWith(cacheFirst(event.request));
+});
+
+// Pages ask for a chapter's wheel set once its interpreter is up
+self.addEventListener('message', (event) => {
+  if (event.data?.type === 'precache' && typeof event.data.lock === 'string') {
+    event.waitUntil(precacheLock(event.data.lock));
+  }
+});
@@ -4,6 +4,8 @@
 import pandas as pd
 import numpy as np
 
+from healthdata import IndexedFrame, top_k
+
 # Create expanded patient dataset
 np.random.seed(42)  # For reproducible results
 patients_data = {
@@ -70,6 +72,20 @@ sorted_by_date = df.sort_values('admission_date', ascending=False)
 print("\n4. Patients by admission date (most recent first):")
 print(sorted_by_date[['patient_id', 'admission_date', 'diagnosis']].head())
 
+# Faster alternative: top_k(df, by, k) returns the same rows as
+# df.sort_values(by).head(k), but only sorts the rows that can make the
+# cut instead of the whole table - worth it once the table is large
+top_by_age = top_k(df, 'age', 5)  # descending is the default
+print(f"\ntop_k(df, 'age', 5) matches sorted_by_age.head(): "
+      f"{top_by_age.equals(sorted_by_age.head())}")
+
+# Sort 5: Highest systolic BP within each diagnosis
+# (same as df.sort_values('systolic_bp', ascending=False, kind='stable')
+#  .groupby('diagnosis').head(1) - ties keep their original order)
+top_bp_per_diagnosis = top_k(df, 'systolic_bp', 1, groupby='diagnosis')
+print("\n5. Highest systolic BP per diagnosis:")
+print(top_bp_per_diagnosis[['patient_id', 'diagnosis', 'systolic_bp']])
+
 print("\n" + "="*50)
 print("ADVANCED FILTERING")
 print("="*50)
@@ -88,6 +104,28 @@ cardiac_conditions = df[df['diagnosis'].str.contains('Cardiac', na=False)]
 print(f"\nPatients with cardiac conditions ({len(cardiac_conditions)} patients):")
 print(cardiac_conditions[['patient_id', 'age', 'diagnosis']])
 
+print("\n" + "="*50)
+print("FASTER REPEATED FILTERING")
+print("="*50)
+
+# Every df[mask] above scans whole columns again. When the same table is
+# filtered over and over (a dashboard, a large cohort), index the filtered
+# columns once: IndexedFrame answers the same filters, written as df.query
+# strings, from those indexes and caches each condition's result
+index = IndexedFrame(df, bitmap=['gender', 'diagnosis', 'has_insurance'],
+                     sorted=['age', 'systolic_bp', 'diastolic_bp', 'bmi'])
+
+indexed_elderly = index.query('age > 60')
+print(f"\nPatients over 60 via the index: {len(indexed_elderly)} "
+      f"(same rows as df[df['age'] > 60]: {indexed_elderly.equals(elderly_patients)})")
+
+# 'age > 60' is cached now, so this only evaluates the new condition
+elderly_female = index.query("age > 60 & gender == 'F'")
+print(f"Female patients over 60: {len(elderly_female)}")
+
+# Counting needs no rows at all: it is read straight off the cached bitmap
+print(f"Critical patients (count only): {index.count('(systolic_bp > 160) | (diastolic_bp > 100) | (bmi > 35)')}")
+
 print("\n" + "="*50)
 print("YOUR PRACTICE EXERCISES")
 print("="*50)
@@ -4,6 +4,8 @@
 import pandas as pd
 import numpy as np
 
+from healthdata import OnlineCohortStats
+
 # Create a sample healthcare dataset
 # In real projects, you'd load this from CSV, Excel, or database
 patients_data = {
@@ -56,6 +58,18 @@ high_bp_patients = df[(df['systolic_bp'] > 140) | (df['diastolic_bp'] > 90)]
 print(f"\nPatients with high blood pressure: {len(high_bp_patients)}")
 print(high_bp_patients[['patient_id', 'age', 'systolic_bp', 'diastolic_bp']])
 
+# Admissions keep arriving during the day. Rather than re-running
+# describe() over the whole table, fold each new batch into running
+# statistics - the numbers match the full computation above
+print("\n=== Running Statistics as Admissions Arrive ===")
+stats = OnlineCohortStats(numeric=['age', 'bmi', 'systolic_bp'], categorical=['diagnosis'])
+for start in range(0, len(df), 3):
+    batch = df.iloc[start:start + 3]
+    stats.update(batch)
+    print(f"After {stats.rows} admissions: mean age {stats.describe().loc['mean', 'age']:.1f}")
+print(stats.describe())
+print(stats.value_counts('diagnosis'))
+
 # Try exploring the data yourself:
 # 1. Find patients over 60 years old
 # 2. Calculate average BMI by gender
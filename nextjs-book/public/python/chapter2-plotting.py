@@ -5,23 +5,14 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from healthdata import cached_cohort, grouped_scatter, summarize_cohort
+
 # Create comprehensive healthcare dataset
-np.random.seed(42)
+# cached_cohort generates the data once, then reloads it from disk on
+# later runs - try n_patients = 1_000_000 (with compact=True to keep it
+# small in memory)!
 n_patients = 100
-
-patients_data = {
-    'patient_id': [f'PT{i:03d}' for i in range(1, n_patients + 1)],
-    'age': np.random.randint(18, 85, n_patients),
-    'gender': np.random.choice(['M', 'F'], n_patients),
-    'diagnosis': np.random.choice(['Hypertension', 'Diabetes', 'Asthma', 'Healthy', 'Cardiac'], n_patients),
-    'systolic_bp': np.random.normal(130, 20, n_patients).astype(int),
-    'diastolic_bp': np.random.normal(80, 15, n_patients).astype(int),
-    'bmi': np.round(np.random.normal(26, 5, n_patients), 1),
-    'length_of_stay': np.random.randint(1, 15, n_patients),
-    'treatment_cost': np.random.normal(5000, 2000, n_patients).astype(int)
-}
-
-df = pd.DataFrame(patients_data)
+df = cached_cohort(n_patients, seed=42)
 print("Healthcare Dataset for Visualization")
 print(f"Dataset shape: {df.shape}")
 print(df.head())
@@ -81,12 +72,12 @@ print("="*50)
 diagnosis_colors = {'Hypertension': 'red', 'Diabetes': 'orange', 
                    'Asthma': 'blue', 'Healthy': 'green', 'Cardiac': 'purple'}
 
+# grouped_scatter draws every diagnosis in one pass; past 50,000 points it
+# switches to a density view (each cell coloured by the mix of diagnoses
+# in it) so even millions of patients plot in about a second
 plt.figure(figsize=(12, 8))
-for diagnosis in df['diagnosis'].unique():
-    subset = df[df['diagnosis'] == diagnosis]
-    plt.scatter(subset['bmi'], subset['systolic_bp'], 
-               label=diagnosis, alpha=0.7, s=60,
-               color=diagnosis_colors.get(diagnosis, 'gray'))
+grouped_scatter(df, 'bmi', 'systolic_bp', by='diagnosis',
+                colors=diagnosis_colors, alpha=0.7, s=60, legend=False)
 
 plt.title('BMI vs Systolic Blood Pressure by Diagnosis', 
           fontsize=16, fontweight='bold')
@@ -109,12 +100,14 @@ print("VISUALIZATION 4: TREATMENT COST BY GENDER")
 print("="*50)
 
 # Box plot: Treatment cost by gender
-gender_groups = [df[df['gender'] == 'M']['treatment_cost'].values,
-                df[df['gender'] == 'F']['treatment_cost'].values]
+# One groupby splits the costs by gender instead of filtering once per gender
+costs_by_gender = {gender: costs.to_numpy()
+                   for gender, costs in df.groupby('gender', observed=True)['treatment_cost']}
+gender_groups = [costs_by_gender['M'], costs_by_gender['F']]
 
 plt.figure(figsize=(8, 6))
-box_plot = plt.boxplot(gender_groups, labels=['Male', 'Female'], 
-                      patch_artist=True)
+box_plot = plt.boxplot(gender_groups, patch_artist=True)
+plt.xticks([1, 2], ['Male', 'Female'])
 
 # Color the boxes
 colors = ['lightblue', 'lightpink']
@@ -127,8 +120,18 @@ plt.ylabel('Treatment Cost ($)', fontsize=12)
 plt.grid(True, alpha=0.3)
 
 # Add statistics
-male_median = df[df['gender'] == 'M']['treatment_cost'].median()
-female_median = df[df['gender'] == 'F']['treatment_cost'].median()
+# summarize_cohort computes every statistic below in one pass over the
+# data, per gender and overall
+summary = summarize_cohort(
+    df,
+    mean=['age', 'bmi', 'systolic_bp', 'treatment_cost', 'length_of_stay'],
+    median=['treatment_cost'],
+    counts=['diagnosis'],
+    conditions={'high_risk': '(systolic_bp > 140) & (bmi > 30)'},
+    by='gender',
+)
+male_median = summary.table.loc['M', 'treatment_cost_median']
+female_median = summary.table.loc['F', 'treatment_cost_median']
 print(f"Median cost - Male: ${male_median:,.0f}, Female: ${female_median:,.0f}")
 
 plt.tight_layout()
@@ -166,19 +169,23 @@ print("\n" + "="*50)
 print("SUMMARY STATISTICS")
 print("="*50)
 
-# Print summary insights
+# Print summary insights (all from the single summary pass above)
+overall = summary.overall
 print("Key Healthcare Insights from Visualizations:")
-print(f"• Average patient age: {df['age'].mean():.1f} years")
-print(f"• Most common diagnosis: {df['diagnosis'].value_counts().index[0]}")
-print(f"• Average BMI: {df['bmi'].mean():.1f} kg/m²")
-print(f"• Average systolic BP: {df['systolic_bp'].mean():.1f} mmHg")
-print(f"• Average treatment cost: ${df['treatment_cost'].mean():,.0f}")
-print(f"• Average length of stay: {df['length_of_stay'].mean():.1f} days")
+print(f"• Average patient age: {overall['age_mean']:.1f} years")
+print(f"• Most common diagnosis: {summary.most_common('diagnosis')}")
+print(f"• Average BMI: {overall['bmi_mean']:.1f} kg/m²")
+print(f"• Average systolic BP: {overall['systolic_bp_mean']:.1f} mmHg")
+print(f"• Average treatment cost: ${overall['treatment_cost_mean']:,.0f}")
+print(f"• Average length of stay: {overall['length_of_stay_mean']:.1f} days")
 
 # Patients needing attention
-high_risk = len(df[(df['systolic_bp'] > 140) & (df['bmi'] > 30)])
+high_risk = int(overall['high_risk'])
 print(f"• High-risk patients (high BP + obesity): {high_risk}")
 
+# The same summary works chunk by chunk for extracts too big for memory:
+#   summarize_cohort(iter_csv('admissions.csv', chunksize=500_000), mean=[...], ...)
+
 print("\n" + "="*50)
 print("YOUR TURN - PRACTICE EXERCISES")
 print("="*50)
@@ -23,3 +23,14 @@ health_data = {
 health_df = pd.DataFrame(health_data)
 print("Healthcare DataFrame:")
 print(health_df)
+print("\n")
+
+# Split the blood pressure strings into numeric columns
+# parse_blood_pressure parses each distinct reading once and returns
+# compact Int16 columns, with <NA> for readings it cannot parse
+from healthdata import parse_blood_pressure
+
+bp = parse_blood_pressure(health_df['BloodPressure'])
+health_df[['Systolic', 'Diastolic']] = bp
+print("Blood pressure as numbers:")
+print(health_df[['PatientID', 'Systolic', 'Diastolic']])
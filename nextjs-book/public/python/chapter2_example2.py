@@ -22,7 +22,8 @@ print(df)
 print("\n")
 
 # Example of using different parameters
-# Only read specific columns
+# Only read specific columns (rewind first: the read above consumed the buffer)
+csv_file.seek(0)
 columns_df = pd.read_csv(csv_file, usecols=['PatientID', 'Age', 'Diagnosis'])
 print("DataFrame with selected columns:")
 print(columns_df)
@@ -35,3 +36,46 @@ csv_file.seek(0)
 filtered_df = pd.read_csv(csv_file, skiprows=lambda i: i > 0 and df.loc[i-1, 'Age'] < 50)
 print("DataFrame with filtered rows (Age ≥ 50):")
 print(filtered_df)
+print("\n")
+
+# Streaming the same filter over a large extract
+# skiprows=lambda calls back into Python for every row; iter_csv reads
+# fixed-size chunks and filters each one with a vectorized mask instead
+import time
+from healthdata import generate_cohort, read_csv_filtered
+
+large_csv = StringIO()
+generate_cohort(200_000, seed=42).to_csv(large_csv, index=False)
+ages = pd.read_csv(StringIO(large_csv.getvalue()), usecols=['age'])['age']
+
+large_csv.seek(0)
+start = time.perf_counter()
+lambda_df = pd.read_csv(large_csv, skiprows=lambda i: i > 0 and ages[i-1] < 50)
+lambda_seconds = time.perf_counter() - start
+
+large_csv.seek(0)
+start = time.perf_counter()
+streamed_df = read_csv_filtered(large_csv, 'age >= 50',
+                                usecols=['patient_id', 'age', 'diagnosis'],
+                                dtype={'age': 'int8', 'diagnosis': 'category'},
+                                chunksize=50_000)
+streamed_seconds = time.perf_counter() - start
+
+print("Filtering 200,000 rows (age >= 50):")
+print(f"skiprows=lambda: {len(lambda_df):,} rows, {len(ages) / lambda_seconds:,.0f} rows/sec")
+print(f"read_csv_filtered: {len(streamed_df):,} rows, {len(ages) / streamed_seconds:,.0f} rows/sec")
+
+# Shrinking the loaded table
+# read_csv gives every column int64/float64/text; optimize_dtypes switches to
+# categoricals, int32 and float32, and parses date text into real dates (the
+# healthdata loaders do this for you)
+from healthdata import memory_report, optimize_dtypes
+
+large_csv.seek(0)
+full_df = pd.read_csv(large_csv)
+compact_df = optimize_dtypes(full_df)
+report = memory_report(full_df, compact_df)
+print("\nMemory per column before and after optimize_dtypes:")
+print(report[['dtype_before', 'dtype_after', 'saved_pct']])
+print(f"Saved {report.loc['total', 'saved'] / 1e6:.1f} MB "
+      f"({report.loc['total', 'saved_pct']:.0f}%) of {report.loc['total', 'bytes_before'] / 1e6:.1f} MB")
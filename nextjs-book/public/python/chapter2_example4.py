@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from healthdata import Imputer, missing_summary
+
 # Create a DataFrame with missing values - common in healthcare data
 df_missing = pd.DataFrame({
     'PatientID': [1, 2, 3, 4, 5],
@@ -14,13 +16,10 @@ print("Healthcare DataFrame with missing values:")
 print(df_missing)
 print("\n")
 
-# 1. Check for missing values
-print("Count of missing values in each column:")
-print(df_missing.isna().sum())
-print("\n")
-
-print("Percentage of missing values in each column:")
-print(df_missing.isna().mean() * 100)
+# 1. Check for missing values: count and percentage from a single isna() pass
+# (same numbers as df_missing.isna().sum() and df_missing.isna().mean() * 100)
+print("Missing values in each column (count and percentage):")
+print(missing_summary(df_missing))
 print("\n")
 
 # 2. Fill missing values with the mean of each column
@@ -35,7 +34,7 @@ print("\n")
 
 # 4. Fill missing values with forward fill (use previous value)
 print("Fill missing values with forward fill:")
-print(df_missing.fillna(method='ffill'))
+print(df_missing.ffill())
 print("\n")
 
 # 5. Drop rows with any missing values
@@ -63,3 +62,19 @@ df_conditional.loc[high_chol_idx & df_conditional['Age'].isna(), 'Age'] = median
 
 print("Fill Age NaN with median only for patients with high cholesterol:")
 print(df_conditional)
+print("\n")
+
+# 9. Describe the whole cleanup as one plan
+# Each statistic is computed once from the original data, then every column
+# is filled in a single pass, in place - no copy of the table per step.
+# The same plan also works chunk by chunk on tables too large for memory.
+imputer = Imputer({'Glucose': 'mean', 'BloodPressure': 'median'})
+imputer.fill('Age', 'median', where='Cholesterol > 200')  # same rule as step 8
+imputer.fill('Cholesterol', 'ffill')
+
+df_clean = df_missing.copy()  # keep df_missing for comparison; the plan fills in place
+imputer.fit_transform(df_clean)
+print("Imputation plan:")
+print(imputer)
+print("\nRows filled by each step:", imputer.filled)
+print(df_clean)
@@ -1,6 +1,5 @@
 import json
 import pandas as pd
-import requests
 from io import StringIO
 
 # Example 1: Basic JSON Handling
@@ -97,14 +96,11 @@ complex_json = """
 complex_data = json.loads(complex_json)
 
 # Extract and process nested data
-departments = []
-for dept in complex_data['hospital_data']['departments']:
-    for patient in dept['patients']:
-        departments.append({
-            'department': dept['name'],
-            'patient_id': patient['id'],
-            'diagnosis': patient['diagnosis']
-        })
+# flatten_records walks departments -> patients and builds each column
+# directly, instead of appending one dict per patient in nested loops
+from healthdata import flatten_records
 
-df4 = pd.DataFrame(departments)
+df4 = flatten_records(complex_data['hospital_data'], ['departments', 'patients'],
+                      meta={'department': ['departments', 'name']})
+df4 = df4.rename(columns={'id': 'patient_id'})[['department', 'patient_id', 'diagnosis']]
 print(df4)
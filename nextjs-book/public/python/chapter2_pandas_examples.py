@@ -1,6 +1,5 @@
 import pandas as pd
 import json
-import requests
 from io import StringIO
 import random
 
@@ -59,14 +58,53 @@ parsed_json = json.loads(json_data)
 # Extract only the data part
 json_df = pd.DataFrame(parsed_json['data'])
 print(json_df)
+print()
+
+# For large exports, stream pages instead of loading the whole payload.
+# LocalAPIServer stands in for a hospital export API on this machine; point
+# the same calls at a real endpoint's URL
+from healthdata import LocalAPIServer, generate_cohort, read_ndjson_api, read_paginated
+
+print("Streaming a patient export in batches:")
+export = generate_cohort(5_000, seed=42)
+with LocalAPIServer(export, page_size=1_000) as server:
+    paged_df = read_paginated(server.url + '/patients', batch_size=2_000)
+    ndjson_df = read_ndjson_api(server.url + '/patients.ndjson', batch_size=2_000)
+print(f"Paginated JSON: {len(paged_df):,} rows from {len(export) // 1_000} pages")
+print(f"NDJSON stream: {len(ndjson_df):,} rows")
+print(ndjson_df[['patient_id', 'age', 'diagnosis', 'admission_date']].head())
+# In the browser the helpers fetch through pyodide.http.pyfetch; iterate the
+# batches with `async for batch in aiter_ndjson(url)` instead of blocking
 print("\n" + "-"*50 + "\n")
 
-# Sample code for reading a random sample from a file
+# Reading a random sample from a large file
 print("Example of reading a random sample from a large file:")
-print("import pandas as pd")
-print("import random")
-print("# Load a random sample of 1% of rows from a CSV file")
-print("data = pd.read_csv('large_data.csv', header=None, skiprows=lambda i: i > 0 and random.random() > 0.01)")
+print("# Per-row callback - slow on multi-GB files")
+print("data = pd.read_csv('large_data.csv', skiprows=lambda i: i > 0 and random.random() > 0.01)")
+print("# Streaming reservoir sample - constant memory, one pass")
+print("from healthdata import sample_csv")
+print("data = sample_csv('large_data.csv', n=1000, seed=42)")
+
+from healthdata import generate_cohort, sample_csv
+import time
+
+large_csv = StringIO()
+generate_cohort(100_000, seed=42).to_csv(large_csv, index=False)
+
+large_csv.seek(0)
+start = time.perf_counter()
+lambda_sample = pd.read_csv(large_csv, skiprows=lambda i: i > 0 and random.random() > 0.01)
+lambda_seconds = time.perf_counter() - start
+
+large_csv.seek(0)
+start = time.perf_counter()
+reservoir_sample = sample_csv(large_csv, n=1000, seed=42, chunksize=25_000)
+reservoir_seconds = time.perf_counter() - start
+
+print(f"skiprows=lambda: {len(lambda_sample)} rows in {lambda_seconds:.2f}s "
+      f"({100_000 / lambda_seconds:,.0f} rows/sec)")
+print(f"sample_csv: {len(reservoir_sample)} rows in {reservoir_seconds:.2f}s "
+      f"({100_000 / reservoir_seconds:,.0f} rows/sec)")
 print("\n" + "-"*50 + "\n")
 
 # Example of SQL-like operations on a DataFrame
@@ -0,0 +1,46 @@
+# Shared helpers for the chapter 2 healthcare examples
+# Import from here in lesson code, e.g. `from healthdata import generate_cohort`
+
+import importlib
+
+# Public name -> submodule defining it. Submodules are imported on first
+# use, so `import healthdata` stays cheap and pulls in pandas, numpy and
+# matplotlib only when a helper that needs them is touched.
+_EXPORTS = {
+    'COHORT_COLUMNS': 'cohort', 'COHORT_VERSION': 'cohort', 'DIAGNOSES': 'cohort',
+    'GENDERS': 'cohort', 'generate_cohort': 'cohort', 'iter_cohort_chunks': 'cohort',
+    'memory_report': 'dtypes', 'optimize_dtypes': 'dtypes', 'plan_dtypes': 'dtypes',
+    'iter_csv': 'ingest', 'read_csv_filtered': 'ingest', 'sample_csv': 'ingest',
+    'DatasetCache': 'cache', 'cached_cohort': 'cache',
+    'flatten_records': 'flatten', 'iter_ndjson': 'flatten', 'read_ndjson': 'flatten',
+    'LocalAPIServer': 'api', 'aiter_ndjson': 'api', 'aiter_paginated': 'api',
+    'read_ndjson_api': 'api', 'read_paginated': 'api',
+    'parse_blood_pressure': 'vitals', 'parse_temperature': 'vitals',
+    'parse_vitals': 'vitals',
+    'grouped_scatter': 'plotting',
+    'CohortSummary': 'summary', 'summarize_cohort': 'summary',
+    'OnlineCohortStats': 'online', 'QuantileSketch': 'online',
+    'RunningMoments': 'online',
+    'IndexedFrame': 'query',
+    'top_k': 'ranking',
+    'Imputer': 'impute', 'missing_summary': 'impute',
+    'CellProfile': 'profiler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'healthdata' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+# healthdata.figures is not in _EXPORTS: it is a matplotlib backend,
+# selected with matplotlib.use('module://healthdata.figures')
@@ -0,0 +1,292 @@
+# Streaming API ingestion
+# Pulls paginated JSON or NDJSON exports and builds DataFrames batch by batch
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import pandas as pd
+
+from .dtypes import optimize_dtypes
+from .flatten import flatten_records
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_PAGE_SIZE = 1_000
+_NDJSON_READ_HINT = 1 << 20  # read roughly 1 MB of lines per fetch
+_DONE = object()
+
+# Pyodide has no sockets or threads: urllib and asyncio.to_thread cannot
+# reach the network there, so requests go through the browser's fetch
+_IN_PYODIDE = sys.platform == 'emscripten'
+
+
+def _next_link(headers):
+    """Extract the rel="next" target from an RFC 8288 Link header."""
+    # fetch() reports header names in lower case
+    for part in (headers.get('Link') or headers.get('link') or '').split(','):
+        url, _, params = part.partition(';')
+        if 'rel="next"' in params:
+            return url.strip().strip('<>')
+    return None
+
+
+def _fetch_page(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        body = response.read()
+        next_url = _next_link(response.headers)
+    return body, urljoin(url, next_url) if next_url else None
+
+
+async def _pyfetch(url, timeout):
+    from js import AbortSignal
+    from pyodide.http import pyfetch
+
+    response = await pyfetch(url, signal=AbortSignal.timeout(timeout * 1000))
+    if not response.ok:
+        raise OSError(f'HTTP {response.status} fetching {url}')
+    return response
+
+
+async def _get_page(url, timeout):
+    if not _IN_PYODIDE:
+        return await asyncio.to_thread(_fetch_page, url, timeout)
+    response = await _pyfetch(url, timeout)
+    next_url = _next_link(response.headers)
+    return await response.bytes(), urljoin(url, next_url) if next_url else None
+
+
+async def _urlopen_lines(url, timeout):
+    response = await asyncio.to_thread(urllib.request.urlopen, url, timeout=timeout)
+    try:
+        while True:
+            lines = await asyncio.to_thread(response.readlines, _NDJSON_READ_HINT)
+            if not lines:
+                break
+            yield lines
+    finally:
+        response.close()
+
+
+async def _pyfetch_lines(url, timeout):
+    # The body is read as it arrives; a line cut by a chunk boundary is
+    # carried over to the next chunk
+    response = await _pyfetch(url, timeout)
+    reader = response.js_response.body.getReader()
+    rest = b''
+    while True:
+        chunk = await reader.read()
+        if chunk.done:
+            break
+        lines = (rest + chunk.value.to_bytes()).split(b'\n')
+        rest = lines.pop()
+        if lines:
+            yield lines
+    if rest:
+        yield [rest]
+
+
+async def _produce_pages(url, queue, timeout):
+    # The next page is requested while the consumer is still parsing this one
+    try:
+        while url:
+            body, url = await _get_page(url, timeout)
+            await queue.put(body)
+    finally:
+        await queue.put(_DONE)
+
+
+async def _produce_ndjson(url, queue, timeout):
+    read_lines = _pyfetch_lines if _IN_PYODIDE else _urlopen_lines
+    try:
+        async for lines in read_lines(url, timeout):
+            await queue.put(lines)
+    finally:
+        await queue.put(_DONE)
+
+
+async def _batches(producer, parse, batch_size, prefetch, flatten_kwargs):
+    queue = asyncio.Queue(maxsize=prefetch)
+    task = asyncio.create_task(producer(queue))
+    records = []
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            records.extend(parse(item))
+            while len(records) >= batch_size:
+                yield flatten_records(records[:batch_size], **flatten_kwargs)
+                records = records[batch_size:]
+        if records:
+            yield flatten_records(records, **flatten_kwargs)
+        await task  # surface any fetch error
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def aiter_paginated(url, data_key='data', batch_size=DEFAULT_BATCH_SIZE, prefetch=2,
+                    timeout=30, **flatten_kwargs):
+    """Async-iterate DataFrame batches from a paginated JSON endpoint.
+
+    Each page is a JSON object whose ``data_key`` holds a list of records;
+    further pages are followed through the ``Link: <...>; rel="next"``
+    header. At most ``prefetch`` raw pages are buffered ahead of the parser.
+    In the browser (Pyodide) pages are fetched with ``pyodide.http.pyfetch``.
+
+    Example:
+        async for batch in aiter_paginated(url + '/patients'):
+            print(len(batch))
+    """
+    def parse(body):
+        return json.loads(body)[data_key]
+    producer = lambda queue: _produce_pages(url, queue, timeout)
+    return _batches(producer, parse, batch_size, prefetch, flatten_kwargs)
+
+
+def aiter_ndjson(url, batch_size=DEFAULT_BATCH_SIZE, prefetch=2, timeout=30, **flatten_kwargs):
+    """Async-iterate DataFrame batches from a streamed NDJSON endpoint."""
+    def parse(lines):
+        return [json.loads(line) for line in lines if line.strip()]
+    producer = lambda queue: _produce_ndjson(url, queue, timeout)
+    return _batches(producer, parse, batch_size, prefetch, flatten_kwargs)
+
+
+def _run(batches, optimize):
+    if _IN_PYODIDE:
+        # The browser's event loop is already running and cannot be blocked
+        raise RuntimeError("in the browser, await the batches instead: "
+                           "df = pd.concat([batch async for batch in aiter_ndjson(url)])")
+    return asyncio.run(_collect(batches, optimize))
+
+
+async def _collect(batches, optimize):
+    frames = [batch async for batch in batches]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return optimize_dtypes(df) if optimize else df
+
+
+def read_paginated(url, data_key='data', batch_size=DEFAULT_BATCH_SIZE, optimize=True, **kwargs):
+    """Blocking wrapper: read every page of ``url`` into one DataFrame.
+
+    With ``optimize`` the result is shrunk with :func:`optimize_dtypes`.
+    Blocking needs CPython; in the browser iterate :func:`aiter_paginated`.
+    """
+    return _run(aiter_paginated(url, data_key, batch_size, **kwargs), optimize)
+
+
+def read_ndjson_api(url, batch_size=DEFAULT_BATCH_SIZE, optimize=True, **kwargs):
+    """Blocking wrapper: read a streamed NDJSON export into one DataFrame.
+
+    With ``optimize`` the result is shrunk with :func:`optimize_dtypes`.
+    Blocking needs CPython; in the browser iterate :func:`aiter_ndjson`.
+    """
+    return _run(aiter_ndjson(url, batch_size, **kwargs), optimize)
+
+
+class LocalAPIServer:
+    """A stand-in for a hospital export API, serving a DataFrame over HTTP.
+
+    ``GET /patients?page=N`` returns ``{"data": [...], "page": N}`` with a
+    ``Link`` header pointing at the next page; ``GET /patients.ndjson``
+    streams every record as one JSON document per line. Runs on a
+    background thread, so it needs CPython (Pyodide has no sockets).
+
+    Example:
+        with LocalAPIServer(generate_cohort(100_000)) as server:
+            df = read_paginated(server.url + '/patients')
+    """
+
+    def __init__(self, df, page_size=DEFAULT_PAGE_SIZE, host='127.0.0.1', port=0):
+        lines = df.to_json(orient='records', lines=True, date_format='iso')
+        self.lines = [line.encode('utf-8') for line in lines.splitlines() if line]
+        self.page_size = page_size
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(server):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/patients':
+                    page = int(parse_qs(parsed.query).get('page', ['0'])[0])
+                    start = page * server.page_size
+                    rows = server.lines[start:start + server.page_size]
+                    body = b'{"data":[' + b','.join(rows) + b'],"page":%d}' % page
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    if start + server.page_size < len(server.lines):
+                        self.send_header('Link', f'</patients?page={page + 1}>; rel="next"')
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif parsed.path == '/patients.ndjson':
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.end_headers()
+                    for start in range(0, len(server.lines), server.page_size):
+                        chunk = server.lines[start:start + server.page_size]
+                        self.wfile.write(b'\n'.join(chunk) + b'\n')
+                else:
+                    self.send_error(404)
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _measure(label, load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = load()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>22}: {len(df):,} rows in {seconds:.2f}s, peak {peak / 1e6:,.1f} MB")
+
+
+def demo(n_patients=200_000):
+    """Compare whole-payload json.loads with batched streaming ingestion."""
+    from .cohort import generate_cohort
+
+    with LocalAPIServer(generate_cohort(n_patients), page_size=5_000) as server:
+        def whole_payload():
+            with urllib.request.urlopen(server.url + '/patients.ndjson') as response:
+                text = response.read().decode('utf-8')
+            return pd.DataFrame([json.loads(line) for line in text.splitlines()])
+
+        _measure('whole payload', whole_payload)
+        _measure('paginated, batched', lambda: read_paginated(server.url + '/patients'))
+        _measure('NDJSON, batched', lambda: read_ndjson_api(server.url + '/patients.ndjson'))
+
+
+if __name__ == '__main__':
+    demo(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
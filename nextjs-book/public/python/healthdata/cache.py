@@ -0,0 +1,146 @@
+# Columnar dataset cache
+# Writes generated or parsed frames once, then reloads them from disk
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from .cohort import COHORT_VERSION, DEFAULT_CHUNK_SIZE, generate_cohort
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; fall back to pickle files
+    pa = None
+    pq = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'healthdata')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Part of every key; bump when the stored layout changes
+CACHE_VERSION = 1
+
+_EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet', 'pickle': '.pkl'}
+
+
+class DatasetCache:
+    """A size-capped directory of cached DataFrames, keyed by build parameters.
+
+    Frames are stored as Arrow IPC files by default and reloaded through a
+    memory map, so numeric columns are read without copying. When the
+    directory grows past ``max_bytes`` the least recently used entries are
+    removed.
+
+    Example:
+        cache = DatasetCache()
+        df = cache.get_or_create('cohort', generate_cohort, n_patients=1_000_000, seed=42)
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, format='arrow'):
+        if format not in _EXTENSIONS:
+            raise ValueError(f"Unknown cache format {format!r}; use one of {sorted(_EXTENSIONS)}")
+        if pa is None:
+            format = 'pickle'
+        self.directory = directory or os.environ.get('HEALTHDATA_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.format = format
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, name, version=None, **params):
+        """Stable cache key for a dataset name, builder version and build parameters."""
+        payload = json.dumps({'cache': CACHE_VERSION, 'version': version, 'params': params},
+                             sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+        return f'{name}-{digest}'
+
+    def path(self, key):
+        return os.path.join(self.directory, key + _EXTENSIONS[self.format])
+
+    def get(self, key):
+        """Load a cached frame, or return None on a miss."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # mark as recently used
+        if self.format == 'arrow':
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            return table.to_pandas(split_blocks=True)
+        if self.format == 'parquet':
+            return pq.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+        return pd.read_pickle(path)
+
+    def put(self, key, df):
+        """Write ``df`` under ``key`` and enforce the size cap."""
+        path = self.path(key)
+        tmp_path = path + '.tmp'
+        if self.format == 'arrow':
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        elif self.format == 'parquet':
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def get_or_create(self, name, builder, version=None, **params):
+        """Return the cached frame for ``params``, building it on a miss.
+
+        ``version`` identifies the builder's code; changing it turns every
+        entry built by an older version into a miss.
+        """
+        key = self.key(name, version=version, **params)
+        df = self.get(key)
+        if df is None:
+            df = builder(**params)
+            self.put(key, df)
+        return df
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache()
+    return _default_cache
+
+
+def cached_cohort(n_patients=100, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, cache=None, **kwargs):
+    """``generate_cohort`` backed by the dataset cache.
+
+    The first call with a given size and seed generates and stores the
+    cohort; every later call reloads it from the cache directory, until
+    ``COHORT_VERSION`` changes.
+    """
+    cache = cache or default_cache()
+    return cache.get_or_create('cohort', generate_cohort, version=COHORT_VERSION,
+                               n_patients=n_patients, seed=seed, chunk_size=chunk_size, **kwargs)
@@ -0,0 +1,144 @@
+# Synthetic patient cohort generator
+# Builds the chapter 2 patient table with vectorized, seedable NumPy draws
+
+import numpy as np
+import pandas as pd
+
+GENDERS = ['M', 'F']
+DIAGNOSES = ['Hypertension', 'Diabetes', 'Asthma', 'Healthy', 'Cardiac']
+
+COHORT_COLUMNS = [
+    'patient_id', 'age', 'gender', 'diagnosis', 'systolic_bp', 'diastolic_bp',
+    'bmi', 'length_of_stay', 'treatment_cost', 'admission_date', 'has_insurance'
+]
+
+# What pandas itself would infer. Lesson arithmetic on these cannot
+# overflow (age * 1000, summed costs) and bmi prints as 31.8, not 31.799999.
+COHORT_DTYPES = {
+    'age': np.int64,
+    'systolic_bp': np.int64,
+    'diastolic_bp': np.int64,
+    'bmi': np.float64,
+    'length_of_stay': np.int64,
+    'treatment_cost': np.int64,
+    'has_insurance': np.bool_,
+}
+
+# compact=True: every vital fits comfortably in 8/16 bits, for cohorts too
+# big to hold otherwise. Arithmetic on them wraps around, so widen first.
+COMPACT_COHORT_DTYPES = {
+    'age': np.int8,
+    'systolic_bp': np.int16,
+    'diastolic_bp': np.int16,
+    'bmi': np.float32,
+    'length_of_stay': np.int8,
+    'treatment_cost': np.int32,
+    'has_insurance': np.bool_,
+}
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Bump whenever a change alters the generated rows or their dtypes: cached
+# cohorts are keyed on it, so old tables on disk stop matching
+COHORT_VERSION = 2
+
+
+def _draw_chunk(rng, n, admission_start, admission_days):
+    """Draw one chunk of raw column arrays (categoricals as int8 codes)."""
+    offsets = rng.integers(0, admission_days, n).astype('timedelta64[D]')
+    return {
+        'age': rng.integers(18, 85, n, dtype=np.int8),
+        'gender': rng.integers(0, len(GENDERS), n, dtype=np.int8),
+        'diagnosis': rng.integers(0, len(DIAGNOSES), n, dtype=np.int8),
+        'systolic_bp': rng.normal(130, 20, n).astype(np.int16),
+        'diastolic_bp': rng.normal(80, 15, n).astype(np.int16),
+        'bmi': np.round(rng.normal(26, 5, n), 1),
+        'length_of_stay': rng.integers(1, 15, n, dtype=np.int8),
+        'treatment_cost': rng.normal(5000, 2000, n).astype(np.int32),
+        'admission_date': (admission_start + offsets).astype('datetime64[ns]'),
+        'has_insurance': rng.random(n) < 0.85,
+    }
+
+
+def _patient_ids(start, stop, n_patients):
+    """Format PT001-style identifiers for the half-open range [start, stop)."""
+    width = max(3, len(str(n_patients)))
+    numbers = np.arange(start + 1, stop + 1).astype(f'U{width}')
+    return np.char.add('PT', np.char.zfill(numbers, width))
+
+
+def _chunk_bounds(n_patients, chunk_size):
+    return [(start, min(start + chunk_size, n_patients))
+            for start in range(0, n_patients, chunk_size)]
+
+
+def _chunk_rngs(seed, n_chunks):
+    # One independent stream per chunk so chunks can be drawn in any order
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_chunks)]
+
+
+def _to_frame(columns, patient_ids=None):
+    frame = {}
+    if patient_ids is not None:
+        frame['patient_id'] = pd.array(patient_ids, dtype='string')
+    for name in COHORT_COLUMNS[1:]:
+        values = columns[name]
+        if name == 'gender':
+            values = pd.Categorical.from_codes(values, categories=GENDERS)
+        elif name == 'diagnosis':
+            values = pd.Categorical.from_codes(values, categories=DIAGNOSES)
+        frame[name] = values
+    return pd.DataFrame(frame)
+
+
+def iter_cohort_chunks(n_patients, seed=42, chunk_size=DEFAULT_CHUNK_SIZE,
+                       admission_start='2024-01-01', admission_days=365,
+                       include_patient_id=True, compact=False):
+    """Yield the cohort as DataFrames of at most ``chunk_size`` rows.
+
+    Use this to stream very large cohorts straight to disk without ever
+    holding the whole table in memory.
+    """
+    start_date = np.datetime64(admission_start, 'D')
+    dtypes = COMPACT_COHORT_DTYPES if compact else COHORT_DTYPES
+    bounds = _chunk_bounds(n_patients, chunk_size)
+    for (start, stop), rng in zip(bounds, _chunk_rngs(seed, len(bounds))):
+        columns = _draw_chunk(rng, stop - start, start_date, admission_days)
+        columns.update({name: columns[name].astype(dtype) for name, dtype in dtypes.items()})
+        ids = _patient_ids(start, stop, n_patients) if include_patient_id else None
+        chunk = _to_frame(columns, ids)
+        chunk.index = pd.RangeIndex(start, stop)
+        yield chunk
+
+
+def generate_cohort(n_patients=100, seed=42, chunk_size=DEFAULT_CHUNK_SIZE,
+                    admission_start='2024-01-01', admission_days=365,
+                    include_patient_id=True, compact=False):
+    """Generate a synthetic patient cohort as one DataFrame.
+
+    Columns are preallocated and filled chunk by chunk, so peak memory is
+    the final table plus one chunk of temporaries. The same ``seed`` and
+    ``chunk_size`` always produce the same cohort. Numbers are int64 and
+    float64 unless ``compact=True``, which stores them in 8 to 32 bits
+    (about a third of the memory) for very large cohorts.
+
+    Example:
+        df = generate_cohort(10_000_000, seed=7, compact=True)
+    """
+    start_date = np.datetime64(admission_start, 'D')
+    dtypes = COMPACT_COHORT_DTYPES if compact else COHORT_DTYPES
+    columns = {name: np.empty(n_patients, dtype=dtype) for name, dtype in dtypes.items()}
+    columns['gender'] = np.empty(n_patients, dtype=np.int8)
+    columns['diagnosis'] = np.empty(n_patients, dtype=np.int8)
+    columns['admission_date'] = np.empty(n_patients, dtype='datetime64[ns]')
+    ids = np.empty(n_patients, dtype=object) if include_patient_id else None
+
+    bounds = _chunk_bounds(n_patients, chunk_size)
+    for (start, stop), rng in zip(bounds, _chunk_rngs(seed, len(bounds))):
+        chunk = _draw_chunk(rng, stop - start, start_date, admission_days)
+        for name, values in chunk.items():
+            columns[name][start:stop] = values
+        if ids is not None:
+            ids[start:stop] = _patient_ids(start, stop, n_patients)
+
+    return _to_frame(columns, ids)
@@ -0,0 +1,166 @@
+# Compact dtypes for patient tables
+# Profile a frame and shrink it: categoricals, small ints, float32 and nullable types
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals
+DEFAULT_CATEGORY_RATIO = 0.5
+
+# Integers are not narrowed below this by default: the type is sized to
+# the values seen so far, and arithmetic on a column (cost * 3, sums across
+# columns) silently wraps past it. int8/int16 are opt-in via min_int.
+DEFAULT_MIN_INT = np.int32
+
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+# ISO 8601 dates and timestamps, as written by CSV exports and JSON APIs
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?')
+
+
+def _arrow_strings():
+    """``string[pyarrow]`` when pyarrow is installed, else None."""
+    try:
+        return pd.StringDtype('pyarrow')
+    except ImportError:
+        return None
+
+
+def _smallest_int(low, high, nullable=False, min_int=DEFAULT_MIN_INT):
+    for candidate in _INT_TYPES:
+        if np.dtype(candidate).itemsize < np.dtype(min_int).itemsize:
+            continue
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            dtype = np.dtype(candidate)
+            return pd.api.types.pandas_dtype(dtype.name.capitalize()) if nullable else dtype
+    return None
+
+
+def _date_dtype(series):
+    """The datetime dtype for text holding only ISO dates, else None."""
+    text = series.dropna().astype(str)
+    if not len(text):
+        return None
+    # Most text columns fail on the first few values; only dates get a full scan
+    if not text.iloc[:100].str.fullmatch(_ISO_DATE.pattern).all() \
+            or not text.str.fullmatch(_ISO_DATE.pattern).all():
+        return None
+    with_zone = text.str.extract(_ISO_DATE, expand=False).notna()
+    if with_zone.any() and not with_zone.all():
+        return None
+    try:
+        return pd.to_datetime(text, format='ISO8601', utc=bool(with_zone.all())).dtype
+    except (ValueError, OverflowError):
+        return None
+
+
+def _column_dtype(series, category_ratio, float32, nullable_ints, min_int):
+    """The compact dtype for one column, or None to leave it as it is."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or len(series) == 0:
+        return None
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype) \
+            or pd.api.types.is_timedelta64_dtype(dtype):
+        return None
+
+    if pd.api.types.is_integer_dtype(dtype):
+        if series.isna().all():
+            return None
+        nullable = not isinstance(dtype, np.dtype)
+        target = _smallest_int(series.min(), series.max(), nullable=nullable, min_int=min_int)
+        return target if target is not None and target.itemsize < dtype.itemsize else None
+
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = values[~np.isnan(values)]
+        if len(present) and np.isfinite(present).all() and (present == np.round(present)).all():
+            has_missing = len(present) < len(values)
+            if not has_missing or nullable_ints:
+                target = _smallest_int(present.min(), present.max(), nullable=has_missing,
+                                       min_int=min_int)
+                if target is not None:
+                    return target
+        if float32 and dtype.itemsize > 4 and (not len(present) or np.abs(present).max() <= _FLOAT32_MAX):
+            return np.dtype(np.float32)
+        return None
+
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind == 'boolean':
+        return pd.BooleanDtype()
+    if kind != 'string':
+        return None
+    # Dates stay dates: as categories they would lose comparisons and .dt
+    date_dtype = _date_dtype(series)
+    if date_dtype is not None:
+        return date_dtype
+    distinct = series.nunique(dropna=True)
+    if distinct <= category_ratio * len(series):
+        return pd.CategoricalDtype()
+    if dtype == object:
+        return _arrow_strings()
+    return None
+
+
+def plan_dtypes(df, category_ratio=DEFAULT_CATEGORY_RATIO, float32=True, nullable_ints=False,
+                min_int=DEFAULT_MIN_INT):
+    """Profile ``df`` and return ``{column: compact dtype}`` for the columns that shrink.
+
+    Integers get the smallest type that holds their range, but no smaller
+    than ``min_int`` (pass ``np.int8`` to fit them tightly), whole-number
+    floats without gaps become integers (with ``nullable_ints``, those with
+    gaps become ``Int32``-style nullable integers), other floats become
+    ``float32``, ISO date text becomes ``datetime64``, other low-cardinality
+    text becomes ``category``, True/False objects become ``boolean``, and
+    other text becomes ``string[pyarrow]`` when pyarrow is installed.
+    Dates, bools and categoricals are left as they are.
+    """
+    plan = {}
+    for column in df.columns:
+        target = _column_dtype(df[column], category_ratio, float32, nullable_ints, min_int)
+        if target is not None:
+            plan[column] = target
+    return plan
+
+
+def optimize_dtypes(df, category_ratio=DEFAULT_CATEGORY_RATIO, float32=True, nullable_ints=False,
+                    min_int=DEFAULT_MIN_INT):
+    """Return ``df`` converted to the compact dtypes from :func:`plan_dtypes`.
+
+    Values are unchanged apart from ``float32`` rounding (about seven
+    significant digits, plenty for vitals and lab values) and date text
+    being parsed. Compare the memory before and after with
+    :func:`memory_report`.
+
+    Example:
+        compact = optimize_dtypes(df)
+        print(memory_report(df, compact))
+    """
+    plan = plan_dtypes(df, category_ratio, float32, nullable_ints, min_int)
+    if not plan:
+        return df
+    dates = [column for column, dtype in plan.items() if pd.api.types.is_datetime64_any_dtype(dtype)]
+    compact = df.astype({column: dtype for column, dtype in plan.items() if column not in dates})
+    for column in dates:
+        compact[column] = pd.to_datetime(df[column], format='ISO8601',
+                                         utc=isinstance(plan[column], pd.DatetimeTZDtype))
+    return compact
+
+
+def memory_report(before, after):
+    """Per-column dtypes and bytes (deep) before and after, with a total row."""
+    bytes_before = before.memory_usage(deep=True, index=False)
+    bytes_after = after.memory_usage(deep=True, index=False).reindex(bytes_before.index)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+    })
+    report.loc['total'] = ['', '', bytes_before.sum(), bytes_after.sum()]
+    report['saved'] = report['bytes_before'] - report['bytes_after']
+    report['saved_pct'] = (100 * report['saved'] / report['bytes_before'].where(report['bytes_before'] > 0)).round(1)
+    return report
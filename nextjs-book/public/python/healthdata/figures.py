@@ -0,0 +1,114 @@
+# Matplotlib figure capture for the browser editors
+# A minimal Agg-based backend: plt.show() renders each open figure to bytes
+
+import hashlib
+import io
+
+import numpy as np
+from matplotlib._pylab_helpers import Gcf
+from matplotlib.backend_bases import FigureManagerBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+
+# Select with matplotlib.use('module://healthdata.figures') or MPLBACKEND
+BACKEND = 'module://healthdata.figures'
+
+FORMATS = ('png', 'svg')
+
+# Scatter collections above this many points are thinned before rendering
+DEFAULT_MAX_POINTS = 100_000
+
+_options = {'format': 'png', 'dpi': 100, 'max_points': DEFAULT_MAX_POINTS}
+_sink = None
+_seen = set()
+captured = []
+
+FigureCanvas = FigureCanvasAgg
+FigureManager = FigureManagerBase
+
+
+def configure(format=None, dpi=None, max_points=None):
+    """Change how figures are captured; unspecified options keep their value.
+
+    ``max_points=0`` disables scatter downsampling.
+    """
+    if format is not None:
+        if format not in FORMATS:
+            raise ValueError(f'format must be one of {FORMATS}, got {format!r}')
+        _options['format'] = format
+    if dpi is not None:
+        _options['dpi'] = dpi
+    if max_points is not None:
+        _options['max_points'] = max_points
+    return dict(_options)
+
+
+def set_sink(sink):
+    """Send figures to ``sink(format, digest, data)`` instead of ``captured``.
+
+    ``data`` is a memoryview over the encoded image, so a JS sink can read
+    it straight from the Wasm heap through its buffer proxy.
+    """
+    global _sink
+    _sink = sink
+
+
+def reset():
+    """Forget which figures were already shown (called once per cell run)."""
+    _seen.clear()
+    captured.clear()
+
+
+def _downsample_scatter(figure, max_points, seed=0):
+    """Thin huge scatter collections in place to ``max_points`` points each.
+
+    Per-point colors and sizes are thinned alongside the offsets so the
+    remaining points keep their styling.
+    """
+    rng = np.random.default_rng(seed)
+    for ax in figure.get_axes():
+        for collection in ax.collections:
+            if not isinstance(collection, PathCollection):
+                continue
+            offsets = collection.get_offsets()
+            n = len(offsets)
+            if n <= max_points:
+                continue
+            keep = np.sort(rng.choice(n, size=max_points, replace=False))
+            collection.set_offsets(np.asarray(offsets)[keep])
+            for getter, setter in ((collection.get_facecolors, collection.set_facecolors),
+                                   (collection.get_edgecolors, collection.set_edgecolors),
+                                   (collection.get_sizes, collection.set_sizes)):
+                values = getter()
+                if len(values) == n:
+                    setter(values[keep])
+            array = collection.get_array()
+            if array is not None and len(array) == n:
+                collection.set_array(np.asarray(array)[keep])
+
+
+def render(figure):
+    """Encode ``figure`` in the configured format; returns ``(digest, bytes)``."""
+    if _options['max_points']:
+        _downsample_scatter(figure, _options['max_points'])
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=_options['format'], dpi=_options['dpi'], bbox_inches='tight')
+    data = buffer.getvalue()
+    return hashlib.sha1(data).hexdigest(), data
+
+
+def show(*args, **kwargs):
+    """Render and emit every open figure, then close them.
+
+    A figure identical to one already shown during this run is skipped.
+    """
+    for manager in Gcf.get_all_fig_managers():
+        digest, data = render(manager.canvas.figure)
+        if digest in _seen:
+            continue
+        _seen.add(digest)
+        if _sink is None:
+            captured.append((_options['format'], digest, data))
+        else:
+            _sink(_options['format'], digest, memoryview(data))
+    Gcf.destroy_all()
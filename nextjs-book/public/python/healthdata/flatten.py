@@ -0,0 +1,254 @@
+# Nested JSON flattening
+# Builds columns straight from hospital/FHIR-style payloads without per-record dicts
+
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .dtypes import optimize_dtypes
+
+DEFAULT_NDJSON_CHUNKSIZE = 100_000
+
+
+class _ColumnBuilder:
+    """Accumulates flattened leaf values column by column.
+
+    Each column keeps the row numbers it has values for, so records with
+    missing or extra keys never force padding of every other column.
+    """
+
+    def __init__(self, sep):
+        self.sep = sep
+        self.values = {}
+        self.rows = {}
+        self.n_rows = 0
+
+    def _append(self, name, value):
+        values = self.values.get(name)
+        if values is None:
+            values = self.values[name] = []
+            self.rows[name] = []
+        values.append(value)
+        self.rows[name].append(self.n_rows)
+
+    def _add_dict(self, record, prefix):
+        for key, value in record.items():
+            name = prefix + key if prefix else key
+            if isinstance(value, dict):
+                self._add_dict(value, name + self.sep)
+            else:
+                self._append(name, value)
+
+    def add(self, record):
+        if isinstance(record, dict):
+            self._add_dict(record, '')
+        else:
+            self._append(0, record)
+        self.n_rows += 1
+
+    def columns(self):
+        # Records without a key get NaN there, as in pd.json_normalize;
+        # lists let pandas infer the dtype (float64 for numbers with gaps)
+        out = {}
+        for name, values in self.values.items():
+            if len(values) == self.n_rows:
+                out[name] = values
+            else:
+                column = [np.nan] * self.n_rows
+                for row, value in zip(self.rows[name], values):
+                    column[row] = value
+                out[name] = column
+        return out
+
+
+def _lookup(item, path):
+    for key in path:
+        if not isinstance(item, dict) or key not in item:
+            return np.nan
+        item = item[key]
+    return item
+
+
+def _normalize_meta(meta, record_path, sep):
+    """Turn a meta spec into (column, level, remaining path) triples.
+
+    A meta path belongs to the deepest record_path level it walks through,
+    e.g. ``['departments', 'name']`` is read once per department. A path
+    that walks all the way into the records, or any meta without a
+    record_path, has no enclosing level to read from and is rejected.
+    """
+    if meta is None:
+        return []
+    if isinstance(meta, dict):
+        items = list(meta.items())
+    else:
+        items = [(sep.join(path) if isinstance(path, (list, tuple)) else path, path) for path in meta]
+
+    specs = []
+    for column, path in items:
+        path = [path] if isinstance(path, str) else list(path)
+        level = 0
+        while (level < len(record_path) and level < len(path) - 1
+               and path[level] == record_path[level]):
+            level += 1
+        if level >= len(record_path):
+            raise ValueError(f"meta path {path!r} is not above record_path {record_path!r}; "
+                             "fields of the records themselves are columns already")
+        specs.append((column, level, path[level:]))
+    return specs
+
+
+def flatten_records(data, record_path=None, meta=None, explode=None, sep='.'):
+    """Flatten nested JSON into a DataFrame, building columns directly.
+
+    ``record_path`` lists the keys to descend through, exploding each list
+    on the way down (``['departments', 'patients']``). ``meta`` pulls
+    values from enclosing levels, either as a list of paths or as a
+    ``{column: path}`` dict; each value is read once per parent and
+    broadcast to its children with ``np.repeat``. ``explode`` names leaf
+    columns holding lists that should become one row per element.
+
+    Example:
+        flatten_records(payload['hospital_data'], ['departments', 'patients'],
+                        meta={'department': ['departments', 'name']})
+    """
+    if isinstance(record_path, str):
+        record_path = [record_path]
+    record_path = list(record_path or [])
+    meta_specs = _normalize_meta(meta, record_path, sep)
+
+    items = list(data) if isinstance(data, list) else [data]
+    # owners[k][i] is the index of the level-k ancestor of current item i
+    owners = [np.arange(len(items))]
+    meta_values = {}
+
+    for level, key in enumerate(record_path):
+        for column, meta_level, path in meta_specs:
+            if meta_level == level:
+                values = np.array([_lookup(item, path) for item in items], dtype=object)
+                meta_values[column] = (level, values)
+
+        children = []
+        counts = np.empty(len(items), dtype=np.int64)
+        for i, item in enumerate(items):
+            nested = item.get(key) if isinstance(item, dict) else None
+            if not nested:
+                counts[i] = 0
+                continue
+            if isinstance(nested, dict):
+                nested = [nested]
+            counts[i] = len(nested)
+            children.extend(nested)
+
+        parents = np.repeat(np.arange(len(items)), counts)
+        owners = [owner[parents] for owner in owners]
+        owners.append(np.arange(len(children)))
+        items = children
+
+    builder = _ColumnBuilder(sep)
+    for item in items:
+        builder.add(item)
+    columns = builder.columns()
+
+    for column, (level, values) in meta_values.items():
+        if column in columns:
+            raise ValueError(f"Conflicting metadata name {column}, need distinguishing prefix")
+        columns[column] = pd.Series(values[owners[level]]).infer_objects().to_numpy()
+
+    df = pd.DataFrame(columns, index=pd.RangeIndex(len(items)))
+    if explode:
+        df = df.explode(explode, ignore_index=True)
+    return df
+
+
+def _iter_lines(source):
+    if isinstance(source, str):
+        with open(source, 'rb') as handle:
+            yield from handle
+    else:
+        yield from source
+
+
+def iter_ndjson(source, record_path=None, meta=None, explode=None, sep='.',
+                chunksize=DEFAULT_NDJSON_CHUNKSIZE):
+    """Yield flattened DataFrames from an NDJSON file, file object or line iterable.
+
+    Every non-blank line is one JSON document. Documents are parsed and
+    flattened ``chunksize`` lines at a time, so memory stays bounded.
+    """
+    batch = []
+    for line in _iter_lines(source):
+        if not line.strip():
+            continue
+        batch.append(json.loads(line))
+        if len(batch) >= chunksize:
+            yield flatten_records(batch, record_path, meta, explode, sep)
+            batch = []
+    if batch:
+        yield flatten_records(batch, record_path, meta, explode, sep)
+
+
+def read_ndjson(source, record_path=None, meta=None, explode=None, sep='.',
+                chunksize=DEFAULT_NDJSON_CHUNKSIZE, optimize=True):
+    """Read a whole NDJSON stream into one flattened DataFrame.
+
+    With ``optimize`` the result is shrunk with :func:`optimize_dtypes`.
+    """
+    chunks = list(iter_ndjson(source, record_path, meta, explode, sep, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    return optimize_dtypes(df) if optimize else df
+
+
+def _synthetic_hospital(n_records, n_departments=50, seed=42):
+    """A hospital payload with ``n_records`` nested patient records."""
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 90, n_records).tolist()
+    heart_rates = rng.integers(55, 110, n_records).tolist()
+    per_department = np.array_split(np.arange(n_records), n_departments)
+    return {
+        'name': 'General Hospital',
+        'departments': [
+            {
+                'name': f'Department {d}',
+                'patients': [
+                    {
+                        'id': f'P{i:07d}',
+                        'demographics': {'age': ages[i], 'gender': 'F' if i % 2 else 'M'},
+                        'vitals': {'blood_pressure': '120/80', 'heart_rate': heart_rates[i]},
+                    }
+                    for i in rows
+                ],
+            }
+            for d, rows in enumerate(per_department)
+        ],
+    }
+
+
+def benchmark(n_records=1_000_000):
+    """Print rows/sec for flatten_records versus pd.json_normalize."""
+    payload = _synthetic_hospital(n_records)
+    results = {}
+
+    start = time.perf_counter()
+    ours = flatten_records(payload, ['departments', 'patients'],
+                           meta={'department': ['departments', 'name']})
+    results['flatten_records'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    theirs = pd.json_normalize(payload['departments'], 'patients',
+                               meta=['name'], meta_prefix='department.')
+    results['pd.json_normalize'] = time.perf_counter() - start
+
+    assert len(ours) == len(theirs) == n_records
+    for name, seconds in results.items():
+        print(f"{name:>18}: {n_records / seconds:>12,.0f} rows/sec ({seconds:.2f}s)")
+    return results
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,228 @@
+# Missing-data imputation from a declarative plan
+# Statistics are computed once, then each column is filled in a single pass, in place
+
+import numpy as np
+import pandas as pd
+
+from .ingest import _row_mask
+from .summary import summarize_cohort
+
+STRATEGIES = ('mean', 'median', 'mode', 'ffill')
+
+_NO_VALUE = object()
+
+
+def missing_summary(data):
+    """Missing count and percentage per column from one ``isna()`` pass.
+
+    ``data`` is a DataFrame or an iterable of chunks. Same numbers as
+    ``df.isna().sum()`` and ``df.isna().mean() * 100``.
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    missing, rows = None, 0
+    for chunk in chunks:
+        counts = chunk.isna().sum()
+        missing = counts if missing is None else missing.add(counts, fill_value=0)
+        rows += len(chunk)
+    missing = (missing if missing is not None else pd.Series(dtype=np.int64)).astype(np.int64)
+    return pd.DataFrame({'missing': missing, 'percent': missing / rows * 100 if rows else np.nan})
+
+
+class _Step:
+    def __init__(self, column, strategy, where=None, by=None):
+        # Anything that is not a strategy name is a constant; ('constant', v)
+        # spells it out for a constant that happens to be one, like 'mean'
+        self.value = None
+        if isinstance(strategy, tuple) and len(strategy) == 2 and strategy[0] == 'constant':
+            strategy, self.value = strategy
+        elif not (isinstance(strategy, str) and strategy in STRATEGIES):
+            strategy, self.value = 'constant', strategy
+        if strategy in ('ffill', 'constant') and by is not None:
+            raise ValueError(f"by= is not supported with {strategy!r}")
+        self.column = column
+        self.strategy = strategy
+        self.where = where
+        self.by = by
+
+    @property
+    def statistic(self):
+        return self.strategy if self.strategy in ('mean', 'median', 'mode') else None
+
+    def __repr__(self):
+        extra = ''.join(f', {name}={value!r}' for name, value in (('where', self.where), ('by', self.by))
+                        if value is not None)
+        strategy = ('constant', self.value) if self.strategy == 'constant' else self.strategy
+        return f'{self.column}: {strategy!r}{extra}'
+
+
+class Imputer:
+    """Fill missing values following a plan of per-column steps.
+
+    ``strategies`` maps columns to ``'mean'``, ``'median'``, ``'mode'``,
+    ``'ffill'`` or a constant of any type (``'Unknown'``, ``0``); write
+    ``('constant', value)`` for a constant that is also a strategy name.
+    :meth:`fill` adds steps restricted to rows
+    matching ``where`` (a query string or callable) and/or using per-group
+    statistics (``by``). Columns are filled in the order they first appear
+    in the plan, their steps in the order given, and each step only fills
+    what is still missing; a ``where`` condition sees the columns filled
+    before it.
+
+    :meth:`fit` computes every statistic the plan needs, each once however
+    many steps share it, from the data before any filling; chunked input
+    is summarized in one pass with :func:`summarize_cohort` (exact
+    medians), so it gets the same numbers as a DataFrame.
+    :meth:`transform` then fills each column in one pass and writes it back
+    once, modifying the frame in place rather than copying it per step.
+    Both accept an iterable of chunks (pass each a fresh iterator), and
+    forward fill carries across chunk boundaries.
+
+    Example:
+        imputer = Imputer({'Glucose': 'mean', 'BloodPressure': 'median', 'Dept': 'Unknown'})
+        imputer.fill('Age', 'median', where='Cholesterol > 200')
+        imputer.fill('Cholesterol', 'median', by='Gender')
+        imputer.fit_transform(df)
+        imputer.filled  # rows filled by each step
+    """
+
+    def __init__(self, strategies=None):
+        self.steps = []
+        self.statistics = {}
+        self.filled = {}
+        for column, strategy in (strategies or {}).items():
+            self.fill(column, strategy)
+
+    def fill(self, column, strategy=None, where=None, by=None, constant=_NO_VALUE):
+        """Add a step; returns the imputer so calls can be chained.
+
+        Pass ``constant=`` instead of ``strategy`` to fill with a fixed value.
+        """
+        if constant is not _NO_VALUE:
+            if strategy is not None:
+                raise TypeError('pass either strategy or constant=, not both')
+            strategy = ('constant', constant)
+        elif strategy is None:
+            raise TypeError('fill() needs a strategy or constant=')
+        self.steps.append(_Step(column, strategy, where, by))
+        return self
+
+    def fit(self, data):
+        """Compute the statistics the plan needs (one pass over ``data``)."""
+        needed = {}
+        for step in self.steps:
+            if step.statistic:
+                needed.setdefault(step.by, {'mean': set(), 'median': set(), 'mode': set()})
+                needed[step.by][step.statistic].add(step.column)
+        if not needed:
+            self.statistics = {}
+            return self
+        self.statistics = {}
+        if isinstance(data, pd.DataFrame):
+            # In memory, pandas' own reductions are the fastest route; only
+            # grouped modes need the counting pass below
+            for by, wanted in needed.items():
+                for kind in ('mean', 'median'):
+                    columns = sorted(wanted[kind])
+                    if columns:
+                        source = data[columns] if by is None else data.groupby(by, observed=True)[columns]
+                        values = getattr(source, kind)(numeric_only=True)
+                        self.statistics.update({(column, kind, by): values[column] for column in columns})
+                    wanted[kind] = set()
+                if by is None:
+                    for column in wanted['mode']:
+                        modes = data[column].mode()
+                        self.statistics[(column, 'mode', None)] = modes.iloc[0] if len(modes) else np.nan
+                    wanted['mode'] = set()
+            needed = {by: wanted for by, wanted in needed.items() if wanted['mode']}
+        elif len(needed) > 1:
+            # One summary per grouping, so the chunks must be iterable twice
+            data = list(data)
+        for by, wanted in needed.items():
+            summary = summarize_cohort(data, mean=sorted(wanted['mean']), median=sorted(wanted['median']),
+                                       counts=sorted(wanted['mode']), by=by)
+            for kind in ('mean', 'median'):
+                for column in wanted[kind]:
+                    values = summary.table[f'{column}_{kind}']
+                    self.statistics[(column, kind, by)] = values.iloc[-1] if by is None else values.drop('All')
+            for column in wanted['mode']:
+                counts = summary.counts[column]
+                modes = counts.idxmax(axis=1).where(counts.sum(axis=1) > 0)
+                self.statistics[(column, 'mode', by)] = modes.iloc[-1] if by is None else modes.drop('All')
+        return self
+
+    def _fill_value(self, step, chunk):
+        if step.statistic is None:
+            return step.value
+        value = self.statistics[(step.column, step.statistic, step.by)]
+        if step.by is None:
+            return value
+        codes, groups = pd.factorize(chunk[step.by])
+        return pd.api.extensions.take(value.reindex(groups).to_numpy(), codes, allow_fill=True)
+
+    def _transform_chunk(self, chunk, carry):
+        """Fill ``chunk`` in place; ``carry`` holds the last value per ffill column."""
+        by_column = {}
+        for step in self.steps:
+            by_column.setdefault(step.column, []).append(step)
+
+        for column, steps in by_column.items():
+            series = chunk[column]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iub':
+                continue  # these dtypes cannot hold missing values
+            # Extension arrays (strings, categoricals, nullable ints) are
+            # filled as they are, without a round trip through object arrays
+            values = series.to_numpy(copy=True) if isinstance(series.dtype, np.dtype) else series.array.copy()
+            missing = series.isna().to_numpy(copy=True)
+            changed = False
+            for step in steps:
+                if not missing.any():
+                    break
+                rows = missing.copy() if step.where is None else missing & np.asarray(_row_mask(chunk, step.where), dtype=bool)
+                if step.strategy == 'ffill':
+                    previous = np.maximum.accumulate(np.where(missing, -1, np.arange(len(values))))
+                    fill = values[np.maximum(previous, 0)]
+                    if column in carry:
+                        fill[previous < 0] = carry[column]
+                    else:
+                        rows &= previous >= 0
+                else:
+                    fill = self._fill_value(step, chunk)
+                    if (step.strategy == 'constant' and isinstance(values, pd.Categorical)
+                            and not pd.isna(fill) and fill not in values.categories):
+                        values = values.add_categories([fill])
+                if np.ndim(fill):
+                    rows &= ~pd.isna(fill)
+                    values[rows] = fill[rows]
+                elif not pd.isna(fill):
+                    values[rows] = fill
+                else:
+                    continue
+                missing &= ~rows
+                changed = True
+                self.filled[repr(step)] = self.filled.get(repr(step), 0) + int(rows.sum())
+            if any(step.strategy == 'ffill' for step in steps):
+                valid = np.flatnonzero(~missing)
+                if len(valid):
+                    carry[column] = values[valid[-1]]
+            if changed:
+                chunk[column] = values
+        return chunk
+
+    def transform(self, data):
+        """Fill ``data`` in place and return it; chunks are filled as they stream."""
+        self.filled = {}
+        if isinstance(data, pd.DataFrame):
+            return self._transform_chunk(data, {})
+        return self._transform_chunks(data)
+
+    def _transform_chunks(self, chunks):
+        carry = {}
+        for chunk in chunks:
+            yield self._transform_chunk(chunk, carry)
+
+    def fit_transform(self, df):
+        """:meth:`fit` then :meth:`transform` on one DataFrame."""
+        return self.fit(df).transform(df)
+
+    def __repr__(self):
+        return 'Imputer([\n' + ''.join(f'    {step!r},\n' for step in self.steps) + '])'
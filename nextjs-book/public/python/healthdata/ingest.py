@@ -0,0 +1,91 @@
+# Streaming CSV ingestion
+# Reads large extracts chunk by chunk so memory stays flat regardless of file size
+
+import numpy as np
+import pandas as pd
+
+from .dtypes import optimize_dtypes
+
+DEFAULT_CSV_CHUNKSIZE = 100_000
+
+
+def _row_mask(chunk, where):
+    """Evaluate a predicate on one chunk: a query string or a callable."""
+    if isinstance(where, str):
+        return chunk.eval(where)
+    return where(chunk)
+
+
+def _empty_frame(source, usecols, dtype, **read_csv_kwargs):
+    """Header-only frame with the projected columns, for empty results."""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return pd.read_csv(source, usecols=usecols, dtype=dtype, nrows=0, **read_csv_kwargs)
+
+
+def iter_csv(source, usecols=None, dtype=None, where=None,
+             chunksize=DEFAULT_CSV_CHUNKSIZE, **read_csv_kwargs):
+    """Yield a CSV as DataFrame chunks, projected and filtered as it streams.
+
+    ``usecols`` and ``dtype`` are passed straight to ``pd.read_csv`` so
+    unused columns are never materialised. ``where`` is applied to every
+    chunk before it is yielded, either as a query string (``"Age >= 50"``)
+    or as a callable returning a boolean mask.
+    """
+    reader = pd.read_csv(source, usecols=usecols, dtype=dtype,
+                         chunksize=chunksize, **read_csv_kwargs)
+    with reader:
+        for chunk in reader:
+            if where is not None:
+                chunk = chunk[_row_mask(chunk, where)]
+            if len(chunk):
+                yield chunk
+
+
+def read_csv_filtered(source, where, usecols=None, dtype=None,
+                      chunksize=DEFAULT_CSV_CHUNKSIZE, optimize=True, **read_csv_kwargs):
+    """Read only the rows matching ``where``; memory scales with the result.
+
+    With ``optimize`` the result is shrunk with :func:`optimize_dtypes`.
+    """
+    chunks = list(iter_csv(source, usecols=usecols, dtype=dtype, where=where,
+                           chunksize=chunksize, **read_csv_kwargs))
+    if not chunks:
+        return _empty_frame(source, usecols, dtype, **read_csv_kwargs)
+    df = pd.concat(chunks, ignore_index=True)
+    return optimize_dtypes(df) if optimize else df
+
+
+def sample_csv(source, n, seed=None, usecols=None, dtype=None, where=None,
+               chunksize=DEFAULT_CSV_CHUNKSIZE, optimize=True, **read_csv_kwargs):
+    """Draw a uniform random sample of ``n`` rows in a single streaming pass.
+
+    This is reservoir sampling done a chunk at a time: every row gets a
+    random key and the ``n`` smallest keys seen so far are kept, so memory
+    is bounded by ``n + chunksize`` rows. Rows come back in file order.
+    With ``optimize`` the sample is shrunk with :func:`optimize_dtypes`.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    threshold = np.inf
+    offset = 0
+    for chunk in iter_csv(source, usecols=usecols, dtype=dtype, where=where,
+                          chunksize=chunksize, **read_csv_kwargs):
+        keys = rng.random(len(chunk))
+        rows = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        # Once the reservoir is full only rows beating its largest key can enter
+        keep = keys < threshold
+        chunk = chunk[keep].assign(_key=keys[keep], _row=rows[keep])
+        if reservoir is not None:
+            chunk = pd.concat([reservoir, chunk])
+        reservoir = chunk.nsmallest(n, '_key') if len(chunk) > n else chunk
+        if len(reservoir) == n:
+            threshold = reservoir['_key'].max()
+
+    if reservoir is None:
+        return _empty_frame(source, usecols, dtype, **read_csv_kwargs)
+    sample = (reservoir.sort_values('_row')
+              .drop(columns=['_key', '_row'])
+              .reset_index(drop=True))
+    return optimize_dtypes(sample) if optimize else sample
@@ -0,0 +1,179 @@
+# Deferred imports for the browser runtime
+# Lazy module proxies, import hooks and the AST scan that finds a cell's packages
+
+import ast
+import importlib
+import importlib.util
+import sys
+import types
+
+# Names every editor namespace starts with, bound to lazy proxies
+PRELUDE = {'pd': 'pandas', 'np': 'numpy', 'plt': 'matplotlib.pyplot'}
+
+# Packages the shared helpers import internally, which the AST of a cell
+# that only uses the helpers does not show
+REQUIREMENTS = {
+    'healthdata': ('numpy', 'pandas'),
+    'healthdata.figures': ('matplotlib',),
+    'healthdata.plotting': ('matplotlib',),
+    'pandas.plotting': ('matplotlib',),
+    'pandas.read_parquet': ('pyarrow',),
+}
+
+# pandas methods that import an optional package on first call: a cell
+# that only runs df.plot() never imports matplotlib itself
+PANDAS_METHOD_REQUIREMENTS = {
+    'plot': 'matplotlib',
+    'hist': 'matplotlib',
+    'boxplot': 'matplotlib',
+    'read_parquet': 'pyarrow',
+    'to_parquet': 'pyarrow',
+}
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Example:
+        pd = LazyModule('pandas')   # nothing imported yet
+        pd.DataFrame                # imports pandas, then forwards
+    """
+
+    def _load(self):
+        module = self.__dict__.get('_module')
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if '_module' in self.__dict__:
+            return repr(self._module)
+        return f"<lazy module '{self.__name__}'>"
+
+
+def lazy_import(name):
+    """The module itself if already imported, otherwise a :class:`LazyModule`."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def install_prelude(namespace, prelude=PRELUDE):
+    """Bind the usual aliases (``pd``, ``np``, ``plt``) without importing anything."""
+    for alias, name in prelude.items():
+        namespace[alias] = lazy_import(name)
+
+
+class _HookLoader:
+    """Wraps a loader so the import hooks run right after the module does."""
+
+    def __init__(self, loader, hooks):
+        self.loader = loader
+        self.hooks = hooks
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        for hook in self.hooks:
+            hook(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _ImportHooks:
+    """Meta path finder that attaches :func:`when_imported` hooks."""
+
+    def __init__(self):
+        self.hooks = {}
+
+    def find_spec(self, fullname, path=None, target=None):
+        hooks = self.hooks.pop(fullname, None)
+        if not hooks:
+            return None
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None:
+            self.hooks[fullname] = hooks
+            return spec
+        spec.loader = _HookLoader(spec.loader, hooks)
+        return spec
+
+
+_import_hooks = _ImportHooks()
+
+
+def when_imported(name, hook):
+    """Call ``hook(module)`` once ``name`` is imported, or now if it already is.
+
+    Lets setup code configure a package (display options, a backend) without
+    paying for the import before any cell needs it.
+
+    Example:
+        when_imported('pandas', lambda pd: pd.set_option('display.width', 100))
+    """
+    if name in sys.modules:
+        hook(sys.modules[name])
+        return
+    if _import_hooks not in sys.meta_path:
+        sys.meta_path.insert(0, _import_hooks)
+    _import_hooks.hooks.setdefault(name, []).append(hook)
+
+
+def _imported_names(tree, prelude):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module)
+            # `from healthdata import grouped_scatter` needs healthdata.plotting
+            exports = getattr(sys.modules.get(node.module), '_EXPORTS', {})
+            names.update(f'{node.module}.{exports.get(alias.name, alias.name)}'
+                         for alias in node.names)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in prelude:
+            names.add(prelude[node.id])
+    return names
+
+
+def _pandas_methods(tree):
+    return {node.attr for node in ast.walk(tree)
+            if isinstance(node, ast.Attribute) and node.attr in PANDAS_METHOD_REQUIREMENTS}
+
+
+def find_imports(source, prelude=PRELUDE):
+    """Top-level packages ``source`` imports that are not importable yet.
+
+    Covers import statements, the prelude aliases the code uses, the
+    packages behind the shared helpers and those pandas methods such as
+    ``df.plot()`` load on demand. Code that does not parse yields nothing;
+    running it reports the syntax error.
+
+    Example:
+        find_imports('import pandas as pd\\nimport json')   # ['pandas'] until installed
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+    names = _imported_names(tree, prelude)
+    for name in list(names):
+        names.update(REQUIREMENTS.get(name, ()))
+    # The frame may come from an earlier cell, so pandas being loaded counts
+    if 'pandas' in names or 'pandas' in sys.modules:
+        names.update(PANDAS_METHOD_REQUIREMENTS[method] for method in _pandas_methods(tree))
+    missing = set()
+    for name in names:
+        top = name.partition('.')[0]
+        if top not in sys.modules and importlib.util.find_spec(top) is None:
+            missing.add(top)
+    return sorted(missing)
@@ -0,0 +1,176 @@
+# Incremental cohort statistics
+# Absorb admission batches as they arrive and answer describe()-style queries at any time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_CENTROIDS = 65_536
+
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max of one column, updated per batch.
+
+    Batches are folded in with Chan et al.'s parallel form of Welford's
+    algorithm, so the cost is O(batch) and the result is as stable as a
+    one-shot computation.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+
+    def var(self, ddof=1):
+        return self._m2 / (self.count - ddof) if self.count > ddof else np.nan
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+
+class QuantileSketch:
+    """Mergeable quantile summary built from weighted centroids.
+
+    While a column has at most ``max_centroids`` distinct values (true of
+    ages, vitals, lengths of stay and rounded BMI) every value is kept with
+    its count and quantiles are exact, using the same linear interpolation
+    as ``Series.quantile``. Past that, neighbouring centroids are merged
+    and results become approximate; ``exact`` tells which case applies.
+    """
+
+    def __init__(self, max_centroids=DEFAULT_MAX_CENTROIDS):
+        self.max_centroids = max_centroids
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        batch_values, batch_counts = np.unique(values, return_counts=True)
+        merged, inverse = np.unique(np.concatenate([self.values, batch_values]), return_inverse=True)
+        self.weights = np.bincount(inverse, weights=np.concatenate([self.weights, batch_counts]))
+        self.values = merged
+        if len(self.values) > self.max_centroids:
+            self._compress()
+
+    def _compress(self):
+        # Equal-weight buckets over the cumulative distribution
+        cumulative = np.cumsum(self.weights)
+        buckets = np.minimum((cumulative - self.weights / 2) * self.max_centroids // cumulative[-1],
+                             self.max_centroids - 1).astype(np.intp)
+        weights = np.bincount(buckets, weights=self.weights)
+        sums = np.bincount(buckets, weights=self.values * self.weights)
+        keep = weights > 0
+        self.values = sums[keep] / weights[keep]
+        self.weights = weights[keep]
+        self.exact = False
+
+    @property
+    def count(self):
+        return int(self.weights.sum())
+
+    def quantile(self, q):
+        """Quantile(s) ``q`` in [0, 1], interpolated linearly between ranks."""
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        cumulative = np.cumsum(self.weights)
+        position = q * (self.count - 1)
+        lower = np.floor(position)
+        low = self.values[np.searchsorted(cumulative, lower + 1)]
+        high = self.values[np.searchsorted(cumulative, np.minimum(lower + 2, self.count))]
+        return low + (high - low) * (position - lower)
+
+
+class OnlineCohortStats:
+    """Running cohort statistics that absorb appended admission batches.
+
+    ``numeric`` columns get moments and quantiles (for :meth:`describe`),
+    ``categorical`` columns get counters (for :meth:`value_counts`) and
+    ``group_means`` maps a grouping column to the columns averaged per
+    group (for :meth:`group_mean`). Each :meth:`update` costs O(batch), and
+    every query can be made at any time.
+
+    Example:
+        stats = OnlineCohortStats(numeric=['age', 'bmi'], categorical=['diagnosis'],
+                                  group_means={'age_group': ['length_of_stay']})
+        for batch in admissions:
+            stats.update(batch)
+        stats.describe(); stats.value_counts('diagnosis')
+    """
+
+    def __init__(self, numeric=(), categorical=(), group_means=None,
+                 max_centroids=DEFAULT_MAX_CENTROIDS):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.group_means = {by: list(columns) for by, columns in (group_means or {}).items()}
+        self.rows = 0
+        self._moments = {col: RunningMoments() for col in self.numeric}
+        self._sketches = {col: QuantileSketch(max_centroids) for col in self.numeric}
+        self._counters = {col: pd.Series(dtype=np.int64) for col in self.categorical}
+        self._group_sums = {by: None for by in self.group_means}
+
+    def update(self, batch):
+        """Fold one batch (a DataFrame with the tracked columns) into the totals."""
+        self.rows += len(batch)
+        for col in self.numeric:
+            values = batch[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            self._moments[col].update(values)
+            self._sketches[col].update(values)
+        for col in self.categorical:
+            counts = batch[col].value_counts(sort=False)
+            self._counters[col] = self._counters[col].add(counts, fill_value=0).astype(np.int64)
+        for by, columns in self.group_means.items():
+            grouped = batch.groupby(by, observed=True)[columns]
+            sums = grouped.sum().join(grouped.count(), rsuffix='_count')
+            previous = self._group_sums[by]
+            self._group_sums[by] = sums if previous is None else previous.add(sums, fill_value=0)
+        return self
+
+    def describe(self, percentiles=DESCRIBE_PERCENTILES):
+        """Same layout and numbers as ``df[numeric].describe()``."""
+        labels = [f'{p * 100:g}%' for p in percentiles]
+        columns = {}
+        for col in self.numeric:
+            moments = self._moments[col]
+            quantiles = self._sketches[col].quantile(percentiles)
+            columns[col] = [moments.count, moments.mean if moments.count else np.nan,
+                            moments.std(), moments.min, *quantiles, moments.max]
+        index = ['count', 'mean', 'std', 'min', *labels, 'max']
+        return pd.DataFrame(columns, index=index, dtype=np.float64)
+
+    def value_counts(self, column):
+        """Category counts, most common first, like ``Series.value_counts()``."""
+        counts = self._counters[column].sort_values(ascending=False, kind='stable')
+        counts.index.name = column
+        return counts.rename('count')
+
+    def group_mean(self, by, column):
+        """Per-group mean, like ``df.groupby(by)[column].mean()``."""
+        sums = self._group_sums[by]
+        if sums is None:
+            return pd.Series(dtype=np.float64, name=column)
+        means = sums[column] / sums[f'{column}_count']
+        return means.sort_index().rename(column)
@@ -0,0 +1,146 @@
+# Per-cell execution profiling
+# Wall time, tracemalloc peak and (optionally) the cell's slowest lines
+
+import linecache
+import sys
+import time
+import tracemalloc
+
+# Pyodide compiles code passed to runPythonAsync under this file name
+CELL_FILENAME = '<exec>'
+
+DEFAULT_HOT_LINES = 5
+
+
+class _LineTimer:
+    """Charge elapsed time to the cell line that was running.
+
+    Pyodide has no signals or threads to drive a sampling profiler, so this
+    uses line events instead, but only inside frames compiled from the
+    cell: library code runs untraced and its time lands on the cell line
+    that called it, which is the line a learner can change.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.times = {}
+        self.hits = {}
+        self._line = None
+        self._since = 0.0
+
+    def _charge(self, now):
+        if self._line is not None:
+            self.times[self._line] = self.times.get(self._line, 0.0) + now - self._since
+        self._since = now
+
+    def _global(self, frame, event, arg):
+        if frame.f_code.co_filename != self.filename:
+            return None
+        return self._local
+
+    def _local(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'line':
+            self._charge(now)
+            self._line = frame.f_lineno
+            self.hits[self._line] = self.hits.get(self._line, 0) + 1
+        elif event == 'return':
+            self._charge(now)
+        return self._local
+
+    def start(self):
+        self._since = time.perf_counter()
+        sys.settrace(self._global)
+
+    def stop(self):
+        sys.settrace(None)
+        self._charge(time.perf_counter())
+
+
+class CellProfile:
+    """Measure one cell run: wall time, Python allocation peak, hot lines.
+
+    ``hot_lines`` > 0 also times the cell line by line and reports the
+    slowest ones. Use as a context manager, or call :meth:`start` and
+    :meth:`stop` around a run (as the browser worker does). ``source``
+    lets the report quote lines of code that ``linecache`` cannot see.
+
+    Example:
+        with CellProfile(hot_lines=5, filename='<cell>', source=code) as profile:
+            exec(compile(code, '<cell>', 'exec'), namespace)
+        profile.result()['wall_ms']
+    """
+
+    def __init__(self, hot_lines=0, filename=CELL_FILENAME, source=None):
+        self.hot_lines = hot_lines
+        self.filename = filename
+        self.source_lines = source.splitlines() if source is not None else None
+        self.wall_ms = None
+        self.python_peak_bytes = None
+        self._timer = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.hot_lines:
+            self._timer = _LineTimer(self.filename)
+            self._timer.start()
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.wall_ms = (time.perf_counter() - self._started) * 1000
+        if self._timer is not None:
+            self._timer.stop()
+        self.python_peak_bytes = tracemalloc.get_traced_memory()[1]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return self.result()
+
+    def _source(self, line):
+        if self.source_lines is not None:
+            text = self.source_lines[line - 1] if 0 < line <= len(self.source_lines) else ''
+        else:
+            text = linecache.getline(self.filename, line)
+        return text.strip()
+
+    def result(self):
+        """Measurements as plain types, ready to be sent to JavaScript."""
+        hot = []
+        if self._timer is not None:
+            slowest = sorted(self._timer.times.items(), key=lambda item: item[1], reverse=True)
+            hot = [{'line': line, 'ms': round(seconds * 1000, 3), 'hits': self._timer.hits.get(line, 0),
+                    'source': self._source(line)[:200]}
+                   for line, seconds in slowest[:self.hot_lines]]
+        return {
+            'wall_ms': None if self.wall_ms is None else round(self.wall_ms, 3),
+            'python_peak_bytes': self.python_peak_bytes,
+            'hot_lines': hot,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+_active = None
+
+
+def start(hot_lines=0, filename=CELL_FILENAME, source=None):
+    """Begin profiling the next cell (used by the browser worker)."""
+    global _active
+    _active = CellProfile(hot_lines, filename, source).start()
+
+
+def stop():
+    """Finish the profile begun by :func:`start`; returns its result dict."""
+    global _active
+    profile, _active = _active, None
+    return profile.stop() if profile is not None else None
@@ -0,0 +1,330 @@
+# Indexed filtering for repeated clinical predicates
+# Bitmap and sorted indexes over a patient frame, with cached query plans and predicate results
+
+import ast
+import io
+import operator
+import tokenize
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .ranking import _keys, _lexsort, _ordering, _within_groups
+
+# A range that matches fewer than 1/SCATTER_RATIO of the rows is answered
+# from the sorted index; wider ranges are cheaper as a vectorized compare
+SCATTER_RATIO = 16
+
+DEFAULT_CACHE_SIZE = 256
+
+_COMPARE = {
+    ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=',
+    ast.Gt: '>', ast.GtE: '>=', ast.In: 'in', ast.NotIn: 'not in',
+}
+_FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt,
+    '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+# Set bits per byte, for counting matches without unpacking
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class _LRU(OrderedDict):
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def lookup(self, key, build):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = build()
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+
+def _normalize(expr):
+    """Rewrite ``&``, ``|`` and ``~`` as ``and``/``or``/``not``.
+
+    Python binds ``&`` tighter than comparisons, so ``age > 60 & bmi > 30``
+    would parse as ``age > (60 & bmi) > 30``; ``df.query`` gives them the
+    precedence of the boolean keywords, and so does this.
+    """
+    words = {'&': 'and', '|': 'or', '~': 'not'}
+    tokens = [(tokenize.NAME, words[tok.string]) if tok.type == tokenize.OP and tok.string in words
+              else (tok.type, tok.string)
+              for tok in tokenize.generate_tokens(io.StringIO(expr.strip()).readline)]
+    return tokenize.untokenize(tokens).strip()
+
+
+def _literal(node):
+    """Python value of a constant, or a list/tuple of constants."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return tuple(_literal(element) for element in node.elts)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_literal(node.operand)
+    raise ValueError('not a literal')
+
+
+class IndexedFrame:
+    """Answer repeated filters over one DataFrame from prebuilt indexes.
+
+    ``bitmap`` columns (low-cardinality: gender, diagnosis, flags) get one
+    packed bitmap per value; ``sorted`` columns (age, vitals, dates) get a
+    sorted permutation for range lookups. Queries use the ``df.query``
+    syntax for comparisons joined by ``&``/``|``/``~`` (plus
+    ``col.isin([...])``, ``col.between(a, b)`` and
+    ``col.str.contains('text')``). Every predicate's result is cached as a
+    bitmap, so filters that share predicates only pay for the new ones.
+    Anything else is handed to ``DataFrame.eval``.
+
+    :meth:`top` serves sorted views ("the 10 oldest insured patients") from
+    a permutation computed once per ordering, so repeated multi-key sorts
+    of a large cohort cost O(n) instead of a sort each time.
+
+    The indexes describe the frame as it was when built; call
+    :meth:`refresh` after modifying it.
+
+    Example:
+        index = IndexedFrame(df, bitmap=['gender', 'diagnosis'], sorted=['age', 'bmi'])
+        index.query("gender == 'F' & diagnosis == 'Diabetes' & age > 60")
+    """
+
+    def __init__(self, df, bitmap=(), sorted=(), cache_size=DEFAULT_CACHE_SIZE):
+        self.df = df
+        self.bitmap_columns = list(bitmap)
+        self.sorted_columns = list(sorted)
+        self.cache_size = cache_size
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild every index and drop cached plans and results."""
+        self.n = len(self.df)
+        self._bitmaps = {}
+        for col in self.bitmap_columns:
+            codes, uniques = pd.factorize(self.df[col])
+            self._bitmaps[col] = (codes, {value: code for code, value in enumerate(uniques)})
+        self._sorted = {}
+        for col in self.sorted_columns:
+            values = self._values(col)
+            order = np.argsort(values, kind='stable')
+            ordered = values[order]
+            # NaN/NaT sort last; ranges only ever search the valid prefix
+            valid = len(ordered) - int(pd.isna(ordered).sum())
+            self._sorted[col] = (order, ordered[:valid])
+        self._plans = _LRU(self.cache_size)
+        self._terms = _LRU(self.cache_size)
+        self._orders = _LRU(self.cache_size)
+
+    def _values(self, col):
+        series = self.df[col]
+        if pd.api.types.is_extension_array_dtype(series.dtype) and series.dtype.kind in 'iuf':
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return series.to_numpy()
+
+    # -- bitmaps ---------------------------------------------------------
+
+    def _pack(self, mask):
+        return np.packbits(np.asarray(mask, dtype=bool))
+
+    def _scatter(self, positions):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[positions] = True
+        return self._pack(mask)
+
+    def _invert(self, bits):
+        return np.bitwise_not(bits)  # padding bits are dropped when unpacking
+
+    # -- predicates ------------------------------------------------------
+
+    def _coerce(self, col, value):
+        """``value`` as pandas compares it with ``col``."""
+        dtype = self.df[col].dtype
+        if isinstance(value, str) and pd.api.types.is_datetime64_any_dtype(dtype):
+            return np.datetime64(pd.Timestamp(value).to_datetime64(), 'ns')
+        # A Python number is compared in the column's precision: bmi == 26.3
+        # on float32 matches np.float32(26.3), not the float64 26.3
+        numpy_dtype = getattr(dtype, 'numpy_dtype', dtype)
+        if isinstance(numpy_dtype, np.dtype) and numpy_dtype.kind == 'f' \
+                and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return numpy_dtype.type(value)
+        return value
+
+    def _term(self, col, op, value):
+        """Cached packed bitmap of the rows where ``col op value`` holds."""
+        if col not in self.df.columns:
+            raise KeyError(col)
+        key = (col, op, value)
+        return self._terms.lookup(key, lambda: self._evaluate_term(col, op, value))
+
+    def _evaluate_term(self, col, op, value):
+        if op in ('!=', 'not in'):
+            return self._invert(self._term(col, '==' if op == '!=' else 'in', value))
+
+        if col in self._bitmaps and op in ('==', 'in'):
+            codes, lookup = self._bitmaps[col]
+            # isin() matches values exactly; == compares in the column's dtype
+            values = value if op == 'in' else (self._coerce(col, value),)
+            wanted = [lookup[v] for v in values if v in lookup]
+            return self._pack(np.isin(codes, wanted))
+
+        if op == 'in':
+            return self._pack(self.df[col].isin(value).to_numpy(dtype=bool))
+
+        value = self._coerce(col, value)
+        if col in self._sorted and op != '==':
+            order, ordered = self._sorted[col]
+            side = 'left' if op in ('<', '>=') else 'right'
+            cut = np.searchsorted(ordered, value, side=side)
+            low, high = (cut, len(ordered)) if op in ('>', '>=') else (0, cut)
+            if (high - low) * SCATTER_RATIO < self.n:
+                return self._scatter(order[low:high])
+
+        if col in self._sorted and op == '==':
+            order, ordered = self._sorted[col]
+            low, high = np.searchsorted(ordered, value, 'left'), np.searchsorted(ordered, value, 'right')
+            return self._scatter(order[low:high])
+
+        result = _OPERATORS[op](self.df[col], value)
+        return self._pack(np.asarray(result.fillna(False) if hasattr(result, 'fillna') else result, dtype=bool))
+
+    def _contains(self, col, text):
+        key = (col, 'contains', text)
+
+        def build():
+            if col in self._bitmaps:
+                _, lookup = self._bitmaps[col]
+                return self._term(col, 'in', tuple(v for v in lookup if isinstance(v, str) and text in v))
+            matches = self.df[col].astype('string').str.contains(text, regex=False, na=False)
+            return self._pack(matches.to_numpy(dtype=bool))
+        return self._terms.lookup(key, build)
+
+    # -- planning --------------------------------------------------------
+
+    def _compile(self, expr):
+        """Turn a query string into a function that returns a packed bitmap."""
+        expr = _normalize(expr)
+        tree = ast.parse(expr, mode='eval').body
+
+        def fallback(node):
+            source = ast.get_source_segment(expr, node)
+            return lambda: self._terms.lookup(
+                ('eval', source), lambda: self._pack(self.df.eval(source).to_numpy(dtype=bool)))
+
+        def column(node):
+            return node.id if isinstance(node, ast.Name) and node.id in self.df.columns else None
+
+        def visit(node):
+            if isinstance(node, (ast.BoolOp, ast.BinOp)):
+                is_and = isinstance(getattr(node, 'op', None), (ast.And, ast.BitAnd))
+                is_or = isinstance(getattr(node, 'op', None), (ast.Or, ast.BitOr))
+                if not (is_and or is_or):
+                    return fallback(node)
+                parts = [visit(value) for value in (node.values if isinstance(node, ast.BoolOp)
+                                                    else (node.left, node.right))]
+                combine = np.bitwise_and if is_and else np.bitwise_or
+
+                def run():
+                    bits = parts[0]()
+                    for part in parts[1:]:
+                        bits = combine(bits, part())
+                    return bits
+                return run
+
+            if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Invert, ast.Not)):
+                inner = visit(node.operand)
+                return lambda: self._invert(inner())
+
+            if isinstance(node, ast.Compare):
+                terms = []
+                left = node.left
+                for op, right in zip(node.ops, node.comparators):
+                    symbol = _COMPARE.get(type(op))
+                    try:
+                        if column(left) and symbol:
+                            terms.append((column(left), symbol, _literal(right)))
+                        elif column(right) and symbol in _FLIPPED:
+                            terms.append((column(right), _FLIPPED[symbol], _literal(left)))
+                        else:
+                            return fallback(node)
+                    except ValueError:
+                        return fallback(node)
+                    left = right
+                if len(terms) == 1:
+                    col, op, value = terms[0]
+                    return lambda: self._term(col, op, value)
+                return lambda: np.bitwise_and.reduce([self._term(*term) for term in terms])
+
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                method, target = node.func.attr, node.func.value
+                try:
+                    args = [_literal(arg) for arg in node.args]
+                except ValueError:
+                    return fallback(node)
+                if method == 'isin' and column(target) and len(args) == 1:
+                    return lambda: self._term(column(target), 'in', tuple(args[0]))
+                if method == 'between' and column(target) and len(args) == 2:
+                    col = column(target)
+                    return lambda: np.bitwise_and(self._term(col, '>=', args[0]), self._term(col, '<=', args[1]))
+                if (method == 'contains' and isinstance(target, ast.Attribute) and target.attr == 'str'
+                        and column(target.value) and len(args) == 1 and not node.keywords):
+                    return lambda: self._contains(column(target.value), args[0])
+
+            return fallback(node)
+
+        return visit(tree)
+
+    def _bits(self, expr):
+        return self._plans.lookup(expr, lambda: self._compile(expr))()
+
+    # -- public API ------------------------------------------------------
+
+    def mask(self, expr):
+        """Boolean array aligned with the frame's rows."""
+        return np.unpackbits(self._bits(expr), count=self.n).astype(bool)
+
+    def positions(self, expr):
+        """Row positions (for ``df.iloc``) of the matching rows, in order."""
+        return np.flatnonzero(np.unpackbits(self._bits(expr), count=self.n))
+
+    def count(self, expr):
+        """Number of matching rows, counted straight from the bitmap."""
+        bits = self._bits(expr)
+        total = int(_POPCOUNT[bits].sum())
+        tail = self.n % 8
+        if tail:
+            # Padding bits in the last byte may be set by an inversion
+            total -= int(_POPCOUNT[bits[-1] & ((1 << (8 - tail)) - 1)])
+        return total
+
+    def query(self, expr, columns=None):
+        """Matching rows as a DataFrame, like ``df.query(expr)``."""
+        rows = self.df.iloc[self.positions(expr)]
+        return rows if columns is None else rows[columns]
+
+    def top(self, by, k=5, ascending=False, groupby=None, where=None):
+        """First ``k`` rows of the frame sorted by ``by``, optionally filtered.
+
+        Same rows and order as ``df.query(where).sort_values(by,
+        ascending=ascending, kind='stable').head(k)``; with ``groupby``, the
+        first ``k`` of every group (``k=None`` keeps them all). The stable
+        sort permutation for each ordering is computed once and cached.
+        """
+        by, ascending = _ordering(by, ascending)
+        order = self._orders.lookup(('order', by, ascending),
+                                    lambda: _lexsort(_keys(self.df, by, ascending)))
+        if where is not None:
+            order = order[self.mask(where)[order]]
+        if groupby is None:
+            order = order if k is None else order[:k]
+        else:
+            codes = (self._bitmaps[groupby][0] if groupby in self._bitmaps
+                     else pd.factorize(self.df[groupby])[0])
+            order = _within_groups(order, codes, k)
+        return self.df.iloc[order]
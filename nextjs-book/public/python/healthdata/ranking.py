@@ -0,0 +1,113 @@
+# Top-k selection without sorting the whole table
+# "Oldest / highest BMI" queries via partitioning, with the same tie order as sort_values
+
+import numpy as np
+import pandas as pd
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _ranked(series, ascending):
+    """Values that order the rows ascending as requested, plus the missing mask.
+
+    Strings and categories become their sorted factor codes and datetimes
+    their integer nanoseconds, so every key compares as a plain number.
+    """
+    missing = series.isna().to_numpy()
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        values = np.asarray(series.array.asi8)
+    elif pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        values, _ = pd.factorize(series, sort=True)
+    values = np.where(missing, 0, values)
+    return (values if ascending else -values), missing
+
+
+def _ordering(by, ascending):
+    """Normalize ``by``/``ascending`` to equal-length tuples."""
+    by = tuple(_as_list(by))
+    ascending = tuple(_as_list(ascending)) if isinstance(ascending, (list, tuple)) else (ascending,) * len(by)
+    if len(ascending) != len(by):
+        raise ValueError(f'got {len(ascending)} ascending flags for {len(by)} sort keys')
+    return by, ascending
+
+
+def _keys(df, by, ascending):
+    return [_ranked(df[col], asc) for col, asc in zip(by, ascending)]
+
+
+def _select(keys, positions, k):
+    """The first ``k`` of ``positions`` in key order, ties kept in row order.
+
+    Partitions on the first key: rows strictly ahead of the k-th value are
+    in, rows behind it are out, and only the rows tied with it go on to be
+    decided by the next key. Missing values rank after every present one.
+    """
+    if k <= 0:
+        return positions[:0]
+    if len(positions) <= k or not keys:
+        return positions[:k]
+    values, missing = keys[0]
+    absent = missing[positions]
+    present = positions[~absent]
+    if len(present) < k:
+        return np.concatenate([present, _select(keys[1:], positions[absent], k - len(present))])
+    present_values = values[present]
+    kth = np.partition(present_values, k - 1)[k - 1]
+    ahead = present[present_values < kth]
+    tied = present[present_values == kth]
+    return np.concatenate([ahead, _select(keys[1:], tied, k - len(ahead))])
+
+
+def _lexsort(keys):
+    """Stable permutation sorting every row by ``keys`` (missing last per key)."""
+    columns = []
+    for values, missing in reversed(keys):
+        columns.extend([values, missing])
+    return np.lexsort(columns)
+
+
+def _within_groups(order, codes, k):
+    """Keep the first ``k`` rows of each group (code) along ``order``."""
+    ordered_codes = codes[order]
+    keep = ordered_codes >= 0
+    if k is not None:
+        rank = pd.Series(ordered_codes).groupby(ordered_codes).cumcount().to_numpy()
+        keep &= rank < k
+    return order[keep]
+
+
+def top_k(df, by, k=5, ascending=False, groupby=None):
+    """The first ``k`` rows of ``df.sort_values(by, ascending=ascending)``.
+
+    Only the rows that can make the cut are sorted, so asking for the five
+    oldest patients costs a partition of the table rather than a full
+    sort. ``by`` and ``ascending`` take lists for multi-key orderings;
+    ties (and missing values, which come last) are ordered exactly as a
+    stable ``sort_values`` orders them. With ``groupby`` the first ``k``
+    rows of every group are returned, like
+    ``df.sort_values(...).groupby(groupby).head(k)``.
+
+    Example:
+        top_k(df, 'age', 5)                                     # five oldest
+        top_k(df, ['diagnosis', 'age'], 10, ascending=[True, False])
+        top_k(df, 'systolic_bp', 3, groupby='diagnosis')        # per diagnosis
+    """
+    keys = _keys(df, *_ordering(by, ascending))
+    if groupby is None:
+        chosen = _select(keys, np.arange(len(df)), k)
+    else:
+        codes, _ = pd.factorize(df[groupby])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.cumsum(np.bincount(codes[codes >= 0], minlength=codes.max() + 1 if len(codes) else 0))
+        # codes of -1 (missing group) sort first; skip them like groupby does
+        order = order[(codes < 0).sum():]
+        chosen = np.concatenate([_select(keys, group, k)
+                                 for group in np.split(order, bounds[:-1])] or [np.arange(0)])
+    chosen = np.sort(chosen)
+    rows = df.iloc[chosen]
+    return rows.iloc[_lexsort([(values[chosen], missing[chosen]) for values, missing in keys])]
@@ -0,0 +1,248 @@
+# Cohort summaries in one pass
+# Means, medians, category counts and flag counts, optionally per group and chunk by chunk
+
+import numpy as np
+import pandas as pd
+
+from .ingest import _row_mask
+
+ALL = 'All'
+
+# Group of the rows whose ``by`` value is missing: counted in 'All' only
+_NO_GROUP = object()
+
+
+def _median_from_counts(counts):
+    """Exact median of a distribution given as value -> count (sorted)."""
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    values = counts.index.to_numpy(dtype=np.float64)
+    cumulative = np.cumsum(counts.to_numpy())
+    low = values[np.searchsorted(cumulative, (total + 1) // 2)]
+    high = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return (low + high) / 2
+
+
+class CohortSummary:
+    """Result of :func:`summarize_cohort`.
+
+    ``table`` has one row per group plus an ``'All'`` row, with columns
+    ``n``, ``<col>_mean``, ``<col>_median`` and one per condition.
+    ``counts[col]`` holds category counts with the same rows.
+    """
+
+    def __init__(self, table, counts, first_seen=None):
+        self.table = table
+        self.counts = counts
+        # Row position where each category first appears, per group
+        self._first_seen = first_seen
+
+    @property
+    def overall(self):
+        return self.table.loc[ALL]
+
+    def most_common(self, column, group=ALL):
+        """Most frequent category of ``column`` (within ``group``).
+
+        Ties go to the category seen first, as in ``value_counts().index[0]``.
+        """
+        counts = self.counts[column].loc[group]
+        if self._first_seen is not None:
+            first = self._first_seen[column].loc[group].dropna()
+            counts = counts[first.sort_values(kind='stable').index]
+        return counts[counts > 0].sort_values(ascending=False, kind='stable').index[0]
+
+    def __repr__(self):
+        return f'CohortSummary(\n{self.table!r}\n)'
+
+
+class _Accumulator:
+    """Running totals per group; groups are numbered as they first appear."""
+
+    def __init__(self, by, mean, median, counts, conditions):
+        self.by = by
+        self.mean = list(mean)
+        self.median = list(median)
+        self.counts = list(counts)
+        self.conditions = dict(conditions)
+        self.groups = {}
+        # Set when ``by`` is categorical: groups are listed in category order
+        self.categories = None
+        self.rows = 0
+        self.n = np.zeros(0, dtype=np.int64)
+        self.sums = {col: np.zeros(0) for col in self.mean}
+        self.nonnull = {col: np.zeros(0, dtype=np.int64) for col in self.mean}
+        self.flags = {name: np.zeros(0, dtype=np.int64) for name in self.conditions}
+        # (group code, value) -> count; merged chunk by chunk
+        self.value_counts = {col: None for col in self.median}
+        self.category_counts = {col: None for col in self.counts}
+        self.category_first = {col: None for col in self.counts}
+
+    def _codes(self, chunk):
+        if self.by is None:
+            self.groups.setdefault(ALL, 0)
+            return np.zeros(len(chunk), dtype=np.intp)
+        if isinstance(chunk[self.by].dtype, pd.CategoricalDtype):
+            self.categories = chunk[self.by].cat.categories
+        codes, uniques = pd.factorize(chunk[self.by], sort=True)
+        lookup = [self.groups.setdefault(label, len(self.groups)) for label in uniques]
+        if (codes < 0).any():
+            lookup.append(self.groups.setdefault(_NO_GROUP, len(self.groups)))
+        return np.array(lookup, dtype=np.intp)[codes]
+
+    def _bincount(self, codes, weights=None):
+        return np.bincount(codes, weights=weights, minlength=len(self.groups))
+
+    @staticmethod
+    def _add(total, new):
+        if len(total) < len(new):
+            total = np.concatenate([total, np.zeros(len(new) - len(total), dtype=total.dtype)])
+        total[:len(new)] += new
+        return total
+
+    @staticmethod
+    def _merge(total, new):
+        return new if total is None else total.add(new, fill_value=0)
+
+    def update(self, chunk):
+        codes = self._codes(chunk)
+
+        self.n = self._add(self.n, self._bincount(codes))
+        for col in self.mean:
+            values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            self.sums[col] = self._add(self.sums[col], self._bincount(codes, np.where(present, values, 0)))
+            self.nonnull[col] = self._add(self.nonnull[col], self._bincount(codes, present).astype(np.int64))
+        for name, condition in self.conditions.items():
+            mask = np.asarray(_row_mask(chunk, condition), dtype=bool)
+            self.flags[name] = self._add(self.flags[name], self._bincount(codes[mask]))
+        for col in self.median:
+            counts, _ = self._pair_counts(codes, chunk[col])
+            self.value_counts[col] = self._merge(self.value_counts[col], counts)
+        for col in self.counts:
+            counts, first = self._pair_counts(codes, chunk[col], first_seen=True)
+            self.category_counts[col] = self._merge(self.category_counts[col], counts)
+            if self.category_first[col] is None:
+                self.category_first[col] = first
+            else:
+                # Earlier chunks always win, so only new pairs are added
+                new = first.index.difference(self.category_first[col].index, sort=False)
+                self.category_first[col] = pd.concat([self.category_first[col], first[new]])
+        self.rows += len(chunk)
+
+    def _pair_counts(self, codes, values, first_seen=False):
+        """Counts of (group, value) pairs via one bincount over combined codes.
+
+        With ``first_seen`` also returns the row position (across chunks)
+        where each pair first appears.
+        """
+        value_codes, uniques = pd.factorize(values)
+        present = value_codes >= 0
+        combined = codes[present] * len(uniques) + value_codes[present]
+        size = len(self.groups) * len(uniques)
+        counts = np.bincount(combined, minlength=size)
+        index = pd.MultiIndex.from_product([range(len(self.groups)), np.asarray(uniques)],
+                                           names=['group', 'value'])
+        seen = counts > 0
+        counts = pd.Series(counts, index=index)[seen]
+        if not first_seen:
+            return counts, None
+        first = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, combined, self.rows + np.flatnonzero(present))
+        return counts, pd.Series(first, index=index)[seen]
+
+    def result(self):
+        size = len(self.groups)
+        labels = list(self.groups)
+        # Output rows: every real group, sorted as groupby sorts them however
+        # the chunks revealed them, then 'All' (which also counts the rows
+        # without a group)
+        keep = [code for code, label in enumerate(labels) if label is not _NO_GROUP]
+        if self.categories is not None:
+            keep.sort(key=lambda code: self.categories.get_loc(labels[code]))
+        else:
+            try:
+                keep.sort(key=lambda code: labels[code])
+            except TypeError:
+                pass  # mixed label types stay in order of appearance
+        keep.append(size)
+        per_group = {'n': self._add(np.zeros(size, dtype=np.int64), self.n)}
+        for col in self.mean:
+            per_group[f'{col}_mean'] = (self._add(np.zeros(size), self.sums[col]),
+                                        self._add(np.zeros(size, dtype=np.int64), self.nonnull[col]))
+        for name in self.conditions:
+            per_group[name] = self._add(np.zeros(size, dtype=np.int64), self.flags[name])
+
+        rows = {}
+        for key, values in per_group.items():
+            if isinstance(values, tuple):
+                sums, counts = values
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    column = np.append(sums / counts, sums.sum() / counts.sum() if counts.sum() else np.nan)
+            else:
+                column = np.append(values, values.sum())
+            rows[key] = column
+
+        for col in self.median:
+            counts = self.value_counts[col]
+            column = np.full(size + 1, np.nan)
+            if counts is not None:
+                counts = counts.sort_index()
+                for code, group_counts in counts.groupby(level='group'):
+                    column[code] = _median_from_counts(group_counts.droplevel('group'))
+                column[size] = _median_from_counts(counts.groupby(level='value').sum())
+            rows[f'{col}_median'] = column
+
+        if self.by is None:
+            index = pd.Index([ALL])
+            rows = {key: values[-1:] for key, values in rows.items()}
+        else:
+            index = pd.Index([labels[code] for code in keep[:-1]] + [ALL], name=self.by)
+            rows = {key: values[keep] for key, values in rows.items()}
+        table = pd.DataFrame(rows, index=index)
+
+        category_tables = {}
+        first_tables = {}
+        for col in self.counts:
+            counts = self.category_counts[col]
+            if counts is None:
+                category_tables[col] = first_tables[col] = pd.DataFrame(index=index)
+                continue
+            wide = counts.unstack('value', fill_value=0)
+            wide = wide.reindex(range(size), fill_value=0).astype(np.int64)
+            first = self.category_first[col].unstack('value').reindex(index=range(size), columns=wide.columns)
+            if self.by is not None:
+                wide.loc[size] = wide.sum()
+                first.loc[size] = first.min()
+                wide, first = wide.loc[keep], first.loc[keep]
+            wide.index = first.index = index
+            wide.columns.name = first.columns.name = col
+            category_tables[col] = wide
+            first_tables[col] = first
+        return CohortSummary(table, category_tables, first_tables)
+
+
+def summarize_cohort(data, mean=(), median=(), counts=(), conditions=None, by=None):
+    """Compute a whole block of summary statistics in one pass over the data.
+
+    ``data`` is a DataFrame or any iterable of DataFrame chunks (for
+    example :func:`iter_csv` or :func:`iter_cohort_chunks`), so extracts
+    larger than memory can be summarized too; the numbers are the same
+    either way. Medians are exact: they are computed from merged value
+    counts, which stay small for the rounded/integer columns typical of
+    clinical extracts. ``conditions`` maps names to query strings or
+    callables; the result counts the rows where each holds. With ``by``
+    every statistic is also broken down per group.
+
+    Example:
+        summary = summarize_cohort(df, mean=['age', 'bmi'], counts=['diagnosis'],
+                                   conditions={'high_risk': '(systolic_bp > 140) & (bmi > 30)'},
+                                   by='gender')
+        summary.overall['age_mean'], summary.table.loc['F', 'high_risk']
+    """
+    accumulator = _Accumulator(by, mean, median, counts, conditions or {})
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.result()
@@ -0,0 +1,94 @@
+# Vital-sign parsing
+# Turns '140/90' and '98.6 F' style strings into compact numeric columns
+
+import re
+
+import numpy as np
+import pandas as pd
+
+_BP_PATTERN = re.compile(r'^\s*(\d{2,3})\s*/\s*(\d{2,3})\s*(?:mm\s*hg)?\s*$', re.IGNORECASE)
+_TEMPERATURE_PATTERN = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*°?\s*([CF])?\s*$', re.IGNORECASE)
+
+# Physiologically plausible ranges; anything outside is masked, not raised
+SYSTOLIC_RANGE = (50, 300)
+DIASTOLIC_RANGE = (20, 200)
+TEMPERATURE_RANGE_F = (80.0, 115.0)
+
+
+def _factorize(values):
+    """Codes plus unique strings; parsing runs once per unique value."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    # Trailing sentinel so NA codes (-1) index a value that is always invalid
+    uniques = pd.Series(list(uniques) + [None], dtype=object)
+    return codes, uniques
+
+
+def _in_range(values, bounds):
+    return (values >= bounds[0]) & (values <= bounds[1])
+
+
+def parse_blood_pressure(values):
+    """Split blood pressure strings into ``systolic`` and ``diastolic`` columns.
+
+    Returns a DataFrame of nullable ``Int16`` columns aligned with
+    ``values``. Unparseable, missing or implausible readings (including
+    systolic <= diastolic) come back as ``<NA>`` instead of raising.
+
+    Example:
+        parse_blood_pressure(pd.Series(['140/90', '120 / 80 mmHg', 'n/a']))
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    codes, uniques = _factorize(values)
+
+    parts = uniques.where(uniques.notna(), '').astype(str).str.extract(_BP_PATTERN)
+    systolic = pd.to_numeric(parts[0]).to_numpy(dtype=np.float64, na_value=np.nan)
+    diastolic = pd.to_numeric(parts[1]).to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        valid = (_in_range(systolic, SYSTOLIC_RANGE) & _in_range(diastolic, DIASTOLIC_RANGE)
+                 & (systolic > diastolic))
+
+    mask = ~valid[codes]
+    return pd.DataFrame({
+        'systolic': pd.arrays.IntegerArray(np.where(valid, systolic, 0).astype(np.int16)[codes], mask),
+        'diastolic': pd.arrays.IntegerArray(np.where(valid, diastolic, 0).astype(np.int16)[codes], mask),
+    }, index=index)
+
+
+def parse_temperature(values, unit='F', default_unit='F'):
+    """Parse temperature strings such as ``'98.6'``, ``'37 C'`` or ``'99.1°F'``.
+
+    Readings are converted to ``unit`` and returned as a ``float32``
+    Series; readings without a unit are assumed to be ``default_unit``.
+    Implausible or unparseable readings become NaN.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    codes, uniques = _factorize(values)
+
+    parts = uniques.where(uniques.notna(), '').astype(str).str.extract(_TEMPERATURE_PATTERN)
+    number = pd.to_numeric(parts[0]).to_numpy(dtype=np.float64, na_value=np.nan)
+    units = parts[1].fillna(default_unit).str.upper().to_numpy()
+    fahrenheit = np.where(units == 'C', number * 9 / 5 + 32, number)
+    with np.errstate(invalid='ignore'):
+        fahrenheit = np.where(_in_range(fahrenheit, TEMPERATURE_RANGE_F), fahrenheit, np.nan)
+
+    converted = fahrenheit if unit.upper() == 'F' else (fahrenheit - 32) * 5 / 9
+    return pd.Series(converted.astype(np.float32)[codes], index=index, name='temperature')
+
+
+def parse_vitals(df, blood_pressure=None, temperature=None, temperature_unit='F', drop=True):
+    """Replace raw vital-sign string columns with parsed numeric columns.
+
+    ``blood_pressure`` becomes ``systolic_bp``/``diastolic_bp``;
+    ``temperature`` is parsed in place. The source columns are dropped
+    unless ``drop=False``.
+    """
+    out = df.copy(deep=False)
+    if blood_pressure is not None:
+        bp = parse_blood_pressure(df[blood_pressure])
+        out['systolic_bp'] = bp['systolic']
+        out['diastolic_bp'] = bp['diastolic']
+        if drop:
+            out = out.drop(columns=[blood_pressure])
+    if temperature is not None:
+        out[temperature] = parse_temperature(df[temperature], unit=temperature_unit)
+    return out
@@ -0,0 +1,28 @@
+# Shared fixtures for the healthdata tests
+# Run from nextjs-book with: python -m pytest public/python/tests
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def patients():
+    """A small patient frame with compact dtypes, ties and missing values."""
+    rng = np.random.default_rng(7)
+    n = 2000
+    bmi = np.round(rng.normal(27, 5, n), 1).astype(np.float32)
+    bmi[::97] = np.nan
+    return pd.DataFrame({
+        'age': rng.integers(18, 95, n).astype(np.int8),
+        'bmi': bmi,
+        'systolic_bp': rng.integers(95, 190, n).astype(np.int16),
+        'gender': pd.Categorical(rng.choice(['M', 'F'], n)),
+        'diagnosis': pd.Categorical(rng.choice(['Hypertension', 'Diabetes', 'Asthma', 'Healthy'], n)),
+        'has_insurance': rng.random(n) < 0.8,
+    })
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from healthdata import LocalAPIServer, aiter_ndjson, read_ndjson_api, read_paginated
+from healthdata import api
+
+
+@pytest.fixture(scope='module')
+def export():
+    return pd.DataFrame({'id': range(250), 'age': [20 + i % 70 for i in range(250)],
+                         'dept': ['ER', 'ICU'] * 125})
+
+
+def _expected(df):
+    return pd.DataFrame([json.loads(line) for line in df.to_json(orient='records', lines=True).splitlines()])
+
+
+@pytest.mark.parametrize('page_size, batch_size', [(40, 33), (250, 1000), (1, 7)])
+def test_paginated_reads_every_page(export, page_size, batch_size):
+    with LocalAPIServer(export, page_size=page_size) as server:
+        df = read_paginated(server.url + '/patients', batch_size=batch_size, optimize=False)
+    pd.testing.assert_frame_equal(df, _expected(export))
+
+
+@pytest.mark.parametrize('batch_size', [1, 33, 1000])
+def test_ndjson_batches(export, batch_size):
+    async def collect(url):
+        return [batch async for batch in aiter_ndjson(url, batch_size=batch_size)]
+
+    with LocalAPIServer(export, page_size=64) as server:
+        batches = asyncio.run(collect(server.url + '/patients.ndjson'))
+        df = read_ndjson_api(server.url + '/patients.ndjson', optimize=False)
+    assert all(len(batch) == batch_size for batch in batches[:-1])
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), _expected(export))
+    pd.testing.assert_frame_equal(df, _expected(export))
+
+
+def test_empty_export():
+    with LocalAPIServer(pd.DataFrame({'id': []})) as server:
+        assert read_paginated(server.url + '/patients').empty
+        assert read_ndjson_api(server.url + '/patients.ndjson').empty
+
+
+def test_missing_endpoint_raises(export):
+    with LocalAPIServer(export) as server:
+        with pytest.raises(OSError):
+            read_paginated(server.url + '/nowhere')
+
+
+def test_fetch_lines_carry_split_lines(monkeypatch):
+    # The Pyodide reader: chunks cut lines anywhere, even mid-number
+    pieces = [b'{"id": 1}\n{"id"', b': 2}\n', b'{"id": 3', b'}']
+
+    class Reader:
+        def __init__(self):
+            self.pieces = iter(pieces)
+
+        async def read(self):
+            piece = next(self.pieces, None)
+            if piece is None:
+                return SimpleNamespace(done=True)
+            return SimpleNamespace(done=False, value=SimpleNamespace(to_bytes=lambda: piece))
+
+    response = SimpleNamespace(js_response=SimpleNamespace(body=SimpleNamespace(getReader=Reader)))
+
+    async def fake_pyfetch(url, timeout):
+        return response
+
+    async def collect():
+        return [line async for lines in api._pyfetch_lines('x', 1) for line in lines]
+
+    monkeypatch.setattr(api, '_pyfetch', fake_pyfetch)
+    assert [json.loads(line) for line in asyncio.run(collect())] == [{'id': 1}, {'id': 2}, {'id': 3}]
+
+
+def test_blocking_wrappers_point_to_async_in_the_browser(monkeypatch):
+    monkeypatch.setattr(api, '_IN_PYODIDE', True)
+    with pytest.raises(RuntimeError, match='aiter_ndjson'):
+        read_ndjson_api('http://example.invalid/patients.ndjson')
+
+
+def test_next_link_in_either_case():
+    link = '</patients?page=2>; rel="next"'
+    assert api._next_link({'Link': link}) == api._next_link({'link': link}) == '/patients?page=2'
+    assert api._next_link({}) is None
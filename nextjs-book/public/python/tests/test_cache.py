@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+from healthdata import DatasetCache, cached_cohort, generate_cohort
+from healthdata import cache as cache_module
+
+
+@pytest.fixture(params=['arrow', 'pickle'])
+def cache(request, tmp_path):
+    if request.param == 'arrow' and cache_module.pa is None:
+        pytest.skip('pyarrow is not installed')
+    return DatasetCache(str(tmp_path), format=request.param)
+
+
+def test_builds_once_then_reloads(cache):
+    calls = []
+
+    def build(n):
+        calls.append(n)
+        return pd.DataFrame({'x': range(n)})
+
+    first = cache.get_or_create('frame', build, n=5)
+    second = cache.get_or_create('frame', build, n=5)
+    pd.testing.assert_frame_equal(second, first)
+    assert calls == [5]
+    cache.get_or_create('frame', build, n=5, version=2)
+    assert calls == [5, 5]
+
+
+def test_cached_cohort_round_trips(cache):
+    expected = generate_cohort(300, seed=4)
+    cached_cohort(300, seed=4, cache=cache)
+    reloaded = cached_cohort(300, seed=4, cache=cache)
+    pd.testing.assert_frame_equal(reloaded, expected)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DatasetCache(str(tmp_path), format='pickle')
+    frame = pd.DataFrame({'x': range(1000)})
+    old = cache.put('old', frame)
+    os.utime(old, (0, 0))
+    cache.max_bytes = os.path.getsize(old) + 1
+    new = cache.put('new', frame)
+    assert not os.path.exists(old) and os.path.exists(new)
+    assert cache.get('old') is None
+
+
+def test_empty_frame(cache):
+    empty = pd.DataFrame({'x': pd.Series([], dtype='int64')})
+    cache.put('empty', empty)
+    pd.testing.assert_frame_equal(cache.get('empty'), empty)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import generate_cohort, iter_cohort_chunks
+
+
+@pytest.mark.parametrize('chunk_size', [1, 333, 1000, 5000])
+def test_chunks_match_whole_cohort(chunk_size):
+    whole = generate_cohort(1000, seed=3, chunk_size=chunk_size)
+    chunks = list(iter_cohort_chunks(1000, seed=3, chunk_size=chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), whole)
+
+
+def test_seed_is_reproducible():
+    pd.testing.assert_frame_equal(generate_cohort(500, seed=9), generate_cohort(500, seed=9))
+    assert not generate_cohort(500, seed=9).equals(generate_cohort(500, seed=10))
+
+
+def test_default_dtypes_are_safe_for_arithmetic():
+    df = generate_cohort(100)
+    assert df['age'].dtype == np.int64 and df['bmi'].dtype == np.float64
+    assert (df['age'] * 1000 > 0).all()
+    assert df['bmi'].equals(df['bmi'].round(1))
+
+
+def test_compact_holds_the_same_values():
+    wide = generate_cohort(2000, seed=5)
+    compact = generate_cohort(2000, seed=5, compact=True)
+    assert compact['age'].dtype == np.int8 and compact['bmi'].dtype == np.float32
+    assert compact.memory_usage(deep=True).sum() < wide.memory_usage(deep=True).sum()
+    restored = compact.astype(wide.dtypes.to_dict())
+    restored['bmi'] = compact['bmi'].astype(np.float64).round(1)
+    pd.testing.assert_frame_equal(restored, wide)
+
+
+def test_empty_cohort():
+    df = generate_cohort(0)
+    assert len(df) == 0 and df.shape[1] == 11
+    assert list(iter_cohort_chunks(0)) == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import memory_report, optimize_dtypes, plan_dtypes
+
+
+@pytest.fixture
+def raw():
+    n = 200
+    return pd.DataFrame({
+        'age': np.arange(n) % 90 + 1,
+        'cost': np.arange(n) * 1000,
+        'bmi': np.round(np.linspace(18, 40, n), 1),
+        'visits': np.where(np.arange(n) % 10 == 0, np.nan, np.arange(n) % 5),
+        'dept': np.array(['ER', 'ICU', 'Ward'], dtype=object)[np.arange(n) % 3],
+        'admitted': pd.date_range('2024-01-01', periods=n).strftime('%Y-%m-%d').to_numpy(dtype=object),
+        'note': np.array([f'note {i}' for i in range(n)], dtype=object),
+    })
+
+
+def test_values_survive(raw):
+    compact = optimize_dtypes(raw)
+    for column in ['age', 'cost', 'visits']:
+        np.testing.assert_array_equal(compact[column].to_numpy(dtype=np.float64),
+                                      raw[column].to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(compact['bmi'], raw['bmi'], rtol=1e-6)
+    assert (compact['dept'].astype(str) == raw['dept']).all()
+    assert (compact['admitted'] == pd.to_datetime(raw['admitted'])).all()
+    assert (compact['note'].astype(str) == raw['note']).all()
+
+
+def test_planned_dtypes(raw):
+    plan = plan_dtypes(raw)
+    assert plan['age'] == np.int32 and plan['cost'] == np.int32  # int32 floor by default
+    assert plan['bmi'] == np.float32
+    assert 'visits' not in plan or plan['visits'] == np.float32  # gaps keep it float
+    assert isinstance(plan['dept'], pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(plan['admitted'])
+
+
+def test_opt_in_narrow_and_nullable(raw):
+    plan = plan_dtypes(raw, min_int=np.int8, nullable_ints=True)
+    assert plan['age'] == np.int8
+    assert plan['visits'] == pd.Int8Dtype()
+
+
+def test_arithmetic_headroom(raw):
+    compact = optimize_dtypes(raw[['age']])
+    assert (compact['age'] * 1000).equals((raw['age'] * 1000).astype(compact['age'].dtype))
+
+
+def test_mixed_dates_and_all_nan_are_left(raw):
+    df = pd.DataFrame({'when': ['2024-01-01', 'soon'], 'x': [np.nan, np.nan]})
+    plan = plan_dtypes(df, float32=False)
+    assert 'when' not in plan or not pd.api.types.is_datetime64_any_dtype(plan['when'])
+    assert 'x' not in plan
+
+
+def test_empty_frame_is_unchanged():
+    df = pd.DataFrame({'a': pd.Series([], dtype=np.int64), 'b': pd.Series([], dtype=object)})
+    assert plan_dtypes(df) == {}
+    assert optimize_dtypes(df) is df
+
+
+def test_memory_report_totals(raw):
+    report = memory_report(raw, optimize_dtypes(raw))
+    assert report['bytes_after'].iloc[-1] < report['bytes_before'].iloc[-1]
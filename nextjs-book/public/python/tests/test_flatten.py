@@ -0,0 +1,80 @@
+import json
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import flatten_records, iter_ndjson, read_ndjson
+
+HOSPITAL = {
+    'name': 'General',
+    'departments': [
+        {'name': 'Cardiology', 'floor': 2, 'patients': [
+            {'id': 'P1', 'vitals': {'hr': 72, 'bp': '120/80'}},
+            {'id': 'P2', 'vitals': {'hr': 88}, 'allergies': ['nuts', 'dust']},
+        ]},
+        {'name': 'Oncology', 'patients': [{'id': 'P3', 'vitals': {'bp': '135/90'}}]},
+        {'name': 'Empty', 'floor': 1, 'patients': []},
+    ],
+}
+
+
+def test_matches_json_normalize():
+    result = flatten_records(HOSPITAL, ['departments', 'patients'],
+                             meta=[['departments', 'name'], ['departments', 'floor'], 'name'])
+    expected = pd.json_normalize(HOSPITAL['departments'], 'patients',
+                                 meta=['name', 'floor'], meta_prefix='departments.', errors='ignore')
+    expected['name'] = 'General'
+    expected['departments.floor'] = expected['departments.floor'].astype(np.float64)
+    pd.testing.assert_frame_equal(result, expected[result.columns])
+
+
+def test_without_record_path_matches_json_normalize():
+    records = [{'a': 1, 'b': {'c': 2}}, {'a': 3, 'd': 'x'}, {'b': {'c': None}}]
+    result = flatten_records(records)
+    pd.testing.assert_frame_equal(result, pd.json_normalize(records)[result.columns])
+
+
+def test_missing_keys_are_nan():
+    df = flatten_records(HOSPITAL, ['departments', 'patients'])
+    assert df['vitals.hr'].dtype == np.float64 and np.isnan(df.loc[2, 'vitals.hr'])
+    assert pd.isna(df.loc[1, 'vitals.bp'])
+
+
+@pytest.mark.parametrize('record_path, meta', [
+    (None, ['name']),
+    (['departments', 'patients'], [['departments', 'patients', 'id']]),
+])
+def test_unreachable_meta_raises(record_path, meta):
+    with pytest.raises(ValueError, match='meta path'):
+        flatten_records(HOSPITAL, record_path, meta=meta)
+
+
+def test_conflicting_meta_raises():
+    with pytest.raises(ValueError, match='Conflicting'):
+        flatten_records(HOSPITAL, ['departments', 'patients'], meta={'id': ['departments', 'name']})
+
+
+def test_explode():
+    df = flatten_records(HOSPITAL, ['departments', 'patients'], explode='allergies')
+    assert df['allergies'].tolist()[1:3] == ['nuts', 'dust'] and len(df) == 4
+
+
+def test_empty_input():
+    assert flatten_records([]).empty
+    assert len(flatten_records({'departments': []}, 'departments')) == 0
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 100])
+def test_ndjson_chunk_boundaries(chunksize):
+    records = [{'id': i, 'vitals': {'hr': 60 + i}} if i % 3 else {'id': i} for i in range(7)]
+    text = b'\n'.join(json.dumps(record).encode() for record in records) + b'\n\n'
+    chunks = list(iter_ndjson(BytesIO(text), chunksize=chunksize))
+    assert len(chunks) == -(-len(records) // chunksize)
+    result = read_ndjson(BytesIO(text), chunksize=chunksize, optimize=False)
+    pd.testing.assert_frame_equal(result, pd.json_normalize(records)[result.columns])
+
+
+def test_empty_ndjson():
+    assert read_ndjson(BytesIO(b'\n')).empty
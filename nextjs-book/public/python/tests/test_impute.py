@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import Imputer, missing_summary
+
+
+@pytest.fixture
+def gappy(patients):
+    df = patients.copy()
+    df['age'] = df['age'].astype(np.float64)
+    df.loc[df.index % 13 == 0, 'age'] = np.nan
+    df.loc[df.index % 17 == 0, 'diagnosis'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('strategy', ['mean', 'median'])
+def test_statistics_match_fillna(gappy, strategy):
+    expected = gappy.fillna({column: getattr(gappy[column], strategy)() for column in ['age', 'bmi']})
+    result = Imputer({'age': strategy, 'bmi': strategy}).fit_transform(gappy.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_mode_and_constant(gappy):
+    expected = gappy.fillna({'diagnosis': gappy['diagnosis'].mode()[0], 'bmi': 0.0})
+    result = Imputer({'diagnosis': 'mode', 'bmi': 0.0}).fit_transform(gappy.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_constant_adds_category(gappy):
+    result = Imputer({'diagnosis': 'Unknown'}).fit_transform(gappy.copy())
+    expected = gappy['diagnosis'].cat.add_categories(['Unknown']).fillna('Unknown')
+    pd.testing.assert_series_equal(result['diagnosis'], expected)
+
+
+def test_grouped_median_matches_transform(gappy):
+    medians = gappy.groupby('gender', observed=True)['age'].transform('median')
+    expected = gappy.assign(age=gappy['age'].fillna(medians))
+    result = Imputer().fill('age', 'median', by='gender').fit_transform(gappy.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_where_only_fills_matching_rows(gappy):
+    expected = gappy.copy()
+    rows = expected['age'].isna() & (expected['systolic_bp'] > 140)
+    expected.loc[rows, 'age'] = gappy['age'].median()
+    result = Imputer().fill('age', 'median', where='systolic_bp > 140').fit_transform(gappy.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('sizes', [[2000], [13, 13, 1974], [1] * 40 + [1960]])
+def test_chunked_matches_whole_frame(gappy, sizes):
+    plan = {'age': 'median', 'bmi': 'mean', 'diagnosis': 'mode'}
+    whole = Imputer(plan).fit_transform(gappy.copy())
+
+    bounds = np.cumsum([0, *sizes])
+    chunks = lambda: (gappy.iloc[a:b].copy() for a, b in zip(bounds[:-1], bounds[1:]))
+    imputer = Imputer(plan).fit(chunks())
+    pd.testing.assert_frame_equal(pd.concat(imputer.transform(chunks())), whole)
+
+
+def test_ffill_carries_across_chunks(gappy):
+    expected = gappy.assign(age=gappy['age'].ffill())
+    chunks = (gappy.iloc[start:start + 13].copy() for start in range(0, len(gappy), 13))
+    result = pd.concat(Imputer({'age': 'ffill'}).transform(chunks))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_leading_gap_stays_without_ffill_source():
+    df = pd.DataFrame({'x': [np.nan, 1.0, np.nan]})
+    pd.testing.assert_frame_equal(Imputer({'x': 'ffill'}).fit_transform(df.copy()), df.ffill())
+
+
+def test_all_nan_column_is_left_alone():
+    df = pd.DataFrame({'x': [np.nan, np.nan], 'y': [1.0, np.nan]})
+    result = Imputer({'x': 'mean', 'y': 'mean'}).fit_transform(df.copy())
+    pd.testing.assert_frame_equal(result, df.fillna({'y': 1.0}))
+
+
+def test_missing_summary_matches_isna(gappy):
+    expected = pd.DataFrame({'missing': gappy.isna().sum().astype(np.int64),
+                             'percent': gappy.isna().mean() * 100})
+    pd.testing.assert_frame_equal(missing_summary(gappy), expected)
+    chunks = (gappy.iloc[start:start + 300] for start in range(0, len(gappy), 300))
+    pd.testing.assert_frame_equal(missing_summary(chunks), expected)
+
+
+def test_missing_summary_empty():
+    summary = missing_summary(pd.DataFrame({'x': pd.Series([], dtype=np.float64)}))
+    assert summary.loc['x', 'missing'] == 0 and np.isnan(summary.loc['x', 'percent'])
@@ -0,0 +1,71 @@
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import iter_csv, read_csv_filtered, sample_csv
+
+
+@pytest.fixture
+def csv_text(patients):
+    return patients.iloc[:300].to_csv(index=False)
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 300, 5000])
+def test_iter_csv_matches_read_csv(csv_text, chunksize):
+    expected = pd.read_csv(StringIO(csv_text), usecols=['age', 'bmi']).query('age > 60')
+    chunks = list(iter_csv(StringIO(csv_text), usecols=['age', 'bmi'], where='age > 60',
+                           chunksize=chunksize))
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    assert all(len(chunk) for chunk in chunks)
+
+
+def test_read_csv_filtered_callable(csv_text):
+    expected = pd.read_csv(StringIO(csv_text))
+    expected = expected[expected['bmi'].isna()].reset_index(drop=True)
+    result = read_csv_filtered(StringIO(csv_text), lambda chunk: chunk['bmi'].isna(),
+                               chunksize=40, optimize=False)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_read_csv_filtered_no_match_keeps_columns(csv_text):
+    result = read_csv_filtered(StringIO(csv_text), 'age > 500', usecols=['age', 'gender'])
+    assert list(result.columns) == ['age', 'gender']
+    assert len(result) == 0
+
+
+def test_sample_csv_rows_come_from_the_file_in_order(csv_text):
+    df = pd.read_csv(StringIO(csv_text))
+    df['row'] = np.arange(len(df))
+    sample = sample_csv(StringIO(df.to_csv(index=False)), n=50, seed=3, chunksize=64, optimize=False)
+    assert len(sample) == 50
+    assert sample['row'].is_unique and sample['row'].is_monotonic_increasing
+    pd.testing.assert_frame_equal(sample, df.iloc[sample['row']].reset_index(drop=True))
+
+
+def test_sample_csv_ignores_chunk_boundaries(csv_text):
+    samples = [sample_csv(StringIO(csv_text), n=25, seed=11, chunksize=size)
+               for size in (1, 25, 77, 10_000)]
+    for sample in samples[1:]:
+        pd.testing.assert_frame_equal(sample, samples[0])
+
+
+def test_sample_csv_larger_than_file(csv_text):
+    sample = sample_csv(StringIO(csv_text), n=10_000, seed=0, chunksize=70, optimize=False)
+    pd.testing.assert_frame_equal(sample, pd.read_csv(StringIO(csv_text)))
+
+
+def test_sample_csv_is_uniform():
+    text = pd.DataFrame({'row': np.arange(20)}).to_csv(index=False)
+    hits = np.zeros(20)
+    for seed in range(200):
+        hits[sample_csv(StringIO(text), n=5, seed=seed, chunksize=6, optimize=False)['row']] += 1
+    # Each row is expected in a quarter of the samples (50 of 200)
+    assert hits.min() > 25 and hits.max() < 75
+
+
+def test_empty_csv():
+    text = 'age,bmi\n'
+    assert len(read_csv_filtered(StringIO(text), 'age > 1')) == 0
+    assert list(sample_csv(StringIO(text), n=5).columns) == ['age', 'bmi']
@@ -0,0 +1,39 @@
+import importlib.util
+import sys
+
+import pytest
+
+from healthdata import lazy
+
+
+@pytest.fixture
+def nothing_installed(monkeypatch):
+    """Pretend only the standard library is importable."""
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None)
+    for name in ('pandas', 'matplotlib', 'pyarrow'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('import pandas as pd\ndf = pd.DataFrame()\ndf.plot()', ['matplotlib', 'pandas']),
+    ("pd.read_csv('a.csv').hist()", ['matplotlib', 'pandas']),
+    ("df = pd.read_parquet('a.parquet')", ['pandas', 'pyarrow']),
+    ("from pandas import read_parquet", ['pandas', 'pyarrow']),
+    ('from pandas.plotting import scatter_matrix', ['matplotlib', 'pandas']),
+    ('plt.hist([1, 2])', ['matplotlib']),
+])
+def test_pandas_optional_dependencies(nothing_installed, source, expected):
+    assert lazy.find_imports(source) == expected
+
+
+def test_methods_without_pandas_need_nothing(nothing_installed):
+    assert lazy.find_imports('canvas.plot()') == []
+
+
+def test_frame_from_an_earlier_cell(monkeypatch, nothing_installed):
+    monkeypatch.setitem(sys.modules, 'pandas', object())
+    assert lazy.find_imports("df.to_parquet('out.parquet')") == ['pyarrow']
+
+
+def test_syntax_error_yields_nothing():
+    assert lazy.find_imports('df.plot(') == []
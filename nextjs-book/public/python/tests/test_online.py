@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import OnlineCohortStats, QuantileSketch, RunningMoments
+
+NUMERIC = ['age', 'bmi', 'systolic_bp']
+
+
+def _batches(df, sizes):
+    bounds = np.cumsum([0, *sizes])
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+@pytest.mark.parametrize('sizes', [[2000], [1] * 5 + [1995], [700, 0, 1300], [3] * 666 + [2]])
+def test_describe_matches_pandas(patients, sizes):
+    stats = OnlineCohortStats(numeric=NUMERIC)
+    for batch in _batches(patients, sizes):
+        stats.update(batch)
+    expected = patients[NUMERIC].astype(np.float64).describe()
+    pd.testing.assert_frame_equal(stats.describe(), expected, rtol=1e-9)
+    assert stats.rows == len(patients)
+
+
+def test_describe_other_percentiles(patients):
+    stats = OnlineCohortStats(numeric=['age']).update(patients)
+    expected = patients[['age']].astype(np.float64).describe(percentiles=[0.05, 0.5, 0.95])
+    pd.testing.assert_frame_equal(stats.describe((0.05, 0.5, 0.95)), expected)
+
+
+def test_all_nan_and_empty_columns():
+    stats = OnlineCohortStats(numeric=['x'])
+    empty = stats.describe()
+    assert empty.loc['count', 'x'] == 0 and empty['x'].iloc[1:].isna().all()
+
+    df = pd.DataFrame({'x': [np.nan, np.nan, np.nan]})
+    stats.update(df.iloc[:1]).update(df.iloc[1:])
+    pd.testing.assert_frame_equal(stats.describe(), df.describe())
+
+
+def test_single_value_has_no_std():
+    df = pd.DataFrame({'x': [4.0]})
+    stats = OnlineCohortStats(numeric=['x']).update(df)
+    pd.testing.assert_frame_equal(stats.describe(), df.describe())
+
+
+def test_value_counts_and_group_means(patients):
+    stats = OnlineCohortStats(categorical=['diagnosis'], group_means={'gender': ['age', 'bmi']})
+    for batch in _batches(patients, [500, 1, 1499]):
+        stats.update(batch)
+    counts = stats.value_counts('diagnosis')
+    assert counts.to_dict() == patients['diagnosis'].value_counts().to_dict()
+    assert counts.is_monotonic_decreasing
+    for column in ['age', 'bmi']:
+        expected = patients.groupby('gender', observed=True)[column].mean()
+        np.testing.assert_allclose(stats.group_mean('gender', column).to_numpy(),
+                                   expected.sort_index().to_numpy(), rtol=1e-6)
+
+
+def test_running_moments_are_stable_far_from_zero():
+    rng = np.random.default_rng(0)
+    values = 1e9 + rng.normal(0, 1, 10_000)
+    moments = RunningMoments()
+    for batch in np.array_split(values, 37):
+        moments.update(batch)
+    assert moments.var() == pytest.approx(np.var(values, ddof=1), rel=1e-6)
+    assert moments.min == values.min() and moments.max == values.max()
+
+
+def test_quantile_sketch_exact_with_ties():
+    values = pd.Series([1, 1, 1, 2, 2, 3, 3, 3, 3, 10], dtype=np.float64)
+    sketch = QuantileSketch()
+    sketch.update(values[:4])
+    sketch.update(values[4:])
+    q = [0, 0.1, 0.25, 0.5, 0.9, 1]
+    np.testing.assert_allclose(sketch.quantile(q), values.quantile(q).to_numpy())
+    assert sketch.exact
+
+
+def test_quantile_sketch_approximates_once_compressed():
+    rng = np.random.default_rng(1)
+    values = rng.normal(50, 10, 50_000)
+    sketch = QuantileSketch(max_centroids=512)
+    for batch in np.array_split(values, 10):
+        sketch.update(batch)
+    assert not sketch.exact and sketch.count == len(values)
+    q = [0.1, 0.5, 0.9]
+    np.testing.assert_allclose(sketch.quantile(q), np.quantile(values, q), atol=0.5)
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from healthdata import IndexedFrame
+
+OPERATORS = ['==', '!=', '<', '<=', '>', '>=']
+
+# Values both present in the data and between stored values
+CASES = [
+    ('bmi', [26.3, 38.1, 13.7, 30.1, 27.05]),
+    ('age', [18, 60, 94, 60.5, 200, -5]),
+]
+
+
+def _check(index, df, expr):
+    expected = df.query(expr)
+    result = index.query(expr)
+    pd.testing.assert_frame_equal(result, expected)
+    assert index.count(expr) == len(expected)
+
+
+@pytest.mark.parametrize('kind', ['bitmap', 'sorted'])
+@pytest.mark.parametrize('column, values', CASES)
+@pytest.mark.parametrize('op', OPERATORS)
+def test_comparisons_match_pandas(patients, kind, column, values, op):
+    index = IndexedFrame(patients, **{kind: [column]})
+    for value in values:
+        _check(index, patients, f'{column} {op} {value}')
+
+
+@pytest.mark.parametrize('op', ['==', '!='])
+@pytest.mark.parametrize('value', ['Diabetes', 'Cardiac'])
+def test_categorical_matches_pandas(patients, op, value):
+    index = IndexedFrame(patients, bitmap=['diagnosis', 'gender'])
+    _check(index, patients, f"diagnosis {op} '{value}'")
+
+
+def test_combined_and_cached_terms_match_pandas(patients):
+    index = IndexedFrame(patients, bitmap=['gender', 'diagnosis'], sorted=['age', 'bmi'])
+    for expr in [
+        "gender == 'F' & diagnosis == 'Diabetes' & age > 60",
+        "(bmi > 30 | systolic_bp >= 160) & ~has_insurance",
+        "diagnosis in ['Asthma', 'Healthy'] & 40 <= age < 50",
+        "gender == 'F' & age > 60",  # reuses cached terms
+    ]:
+        _check(index, patients, expr)
+
+
+def test_methods_match_pandas(patients):
+    index = IndexedFrame(patients, bitmap=['diagnosis'], sorted=['age'])
+    pd.testing.assert_frame_equal(index.query("age.between(30, 40)"), patients[patients.age.between(30, 40)])
+    pd.testing.assert_frame_equal(index.query("diagnosis.isin(['Asthma'])"),
+                                  patients[patients.diagnosis.isin(['Asthma'])])
+
+
+def test_empty_frame():
+    df = pd.DataFrame({'age': pd.Series([], dtype='int8')})
+    index = IndexedFrame(df, sorted=['age'])
+    assert len(index.query('age > 3')) == 0
+    assert index.count('age != 3') == 0
+
+
+def test_refresh_sees_changes(patients):
+    df = patients.copy()
+    index = IndexedFrame(df, sorted=['age'])
+    before = index.count('age > 90')
+    df.loc[:, 'age'] = 91
+    assert index.count('age > 90') == before
+    index.refresh()
+    assert index.count('age > 90') == len(df)
+
+
+def test_top_matches_sort_values(patients):
+    index = IndexedFrame(patients, bitmap=['gender'])
+    expected = (patients.query('has_insurance')
+                .sort_values(['age', 'bmi'], ascending=[False, True], kind='stable').head(10))
+    pd.testing.assert_frame_equal(
+        index.top(['age', 'bmi'], k=10, ascending=[False, True], where='has_insurance'), expected)
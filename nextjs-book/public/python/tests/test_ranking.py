@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import top_k
+
+
+def _expected(df, by, k, ascending=False, groupby=None):
+    ordered = df.sort_values(by, ascending=ascending, kind='stable')
+    return ordered.head(k) if groupby is None else ordered.groupby(groupby, observed=True).head(k)
+
+
+@pytest.mark.parametrize('k', [0, 1, 5, 1999, 2000, 5000])
+@pytest.mark.parametrize('by, ascending', [
+    ('age', False),            # many ties
+    ('bmi', True),             # NaNs go last
+    ('bmi', False),
+    (['diagnosis', 'age'], [True, False]),
+    (['gender', 'bmi', 'systolic_bp'], False),
+])
+def test_matches_sort_values(patients, by, ascending, k):
+    pd.testing.assert_frame_equal(top_k(patients, by, k, ascending=ascending),
+                                  _expected(patients, by, k, ascending))
+
+
+@pytest.mark.parametrize('k', [1, 3, 600])
+def test_groupby_matches_sort_values(patients, k):
+    pd.testing.assert_frame_equal(top_k(patients, 'systolic_bp', k, groupby='diagnosis'),
+                                  _expected(patients, 'systolic_bp', k, groupby='diagnosis'))
+
+
+def test_missing_groups_are_skipped():
+    df = pd.DataFrame({'g': ['a', None, 'a', 'b'], 'v': [1, 9, 3, 2]})
+    pd.testing.assert_frame_equal(top_k(df, 'v', 1, groupby='g'), _expected(df, 'v', 1, groupby='g'))
+
+
+def test_all_nan_and_empty():
+    df = pd.DataFrame({'v': [np.nan, np.nan, np.nan]})
+    pd.testing.assert_frame_equal(top_k(df, 'v', 2), df.head(2))
+    empty = df.iloc[:0]
+    pd.testing.assert_frame_equal(top_k(empty, 'v', 2), empty)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthdata import summarize_cohort
+
+CONDITIONS = {'high_bp': 'systolic_bp > 140', 'obese': lambda df: df['bmi'] > 30}
+
+
+def _summarize(data, by=None):
+    return summarize_cohort(data, mean=['age', 'bmi'], median=['age', 'bmi'],
+                            counts=['diagnosis'], conditions=CONDITIONS, by=by)
+
+
+@pytest.mark.parametrize('by', [None, 'gender', 'diagnosis'])
+def test_matches_pandas(patients, by):
+    table = _summarize(patients, by).table
+    groups = [('All', patients)]
+    if by is not None:
+        groups += list(patients.groupby(by, observed=True))
+    for label, group in groups:
+        row = table.loc[label]
+        assert row['n'] == len(group)
+        for column in ['age', 'bmi']:
+            assert row[f'{column}_mean'] == pytest.approx(group[column].astype(np.float64).mean())
+            assert row[f'{column}_median'] == group[column].astype(np.float64).median()
+        assert row['high_bp'] == (group['systolic_bp'] > 140).sum()
+        assert row['obese'] == (group['bmi'] > 30).sum()
+
+
+@pytest.mark.parametrize('n_chunks', [1, 3, 250])
+def test_chunks_match_whole_frame(patients, n_chunks):
+    chunks = [patients.iloc[rows] for rows in np.array_split(np.arange(len(patients)), n_chunks)]
+    whole = _summarize(patients, 'gender')
+    chunked = _summarize(iter(chunks), 'gender')
+    pd.testing.assert_frame_equal(chunked.table, whole.table)
+    pd.testing.assert_frame_equal(chunked.counts['diagnosis'], whole.counts['diagnosis'])
+
+
+def test_counts_match_crosstab(patients):
+    counts = _summarize(patients, 'gender').counts['diagnosis']
+    expected = pd.crosstab(patients['gender'], patients['diagnosis'], margins=True, margins_name='All')
+    expected = expected.drop(columns='All')
+    assert counts.loc[:, expected.columns].to_numpy().tolist() == expected.loc[counts.index].to_numpy().tolist()
+
+
+def test_most_common_ties_go_to_first_seen():
+    df = pd.DataFrame({'dx': ['b', 'a', 'a', 'b', 'c']})
+    chunks = [df.iloc[:2], df.iloc[2:]]
+    summary = summarize_cohort(iter(chunks), counts=['dx'])
+    assert summary.most_common('dx') == df['dx'].value_counts().index[0] == 'b'
+
+
+def test_missing_group_counts_in_all_only():
+    df = pd.DataFrame({'g': ['x', None, 'y', 'x'], 'v': [1.0, 2.0, 3.0, 5.0]})
+    table = summarize_cohort(df, mean=['v'], by='g').table
+    assert list(table.index) == ['x', 'y', 'All']
+    assert table.loc['x', 'v_mean'] == 3.0
+    assert table.loc['All', 'n'] == 4 and table.loc['All', 'v_mean'] == 2.75
+
+
+def test_all_nan_column():
+    df = pd.DataFrame({'v': [np.nan, np.nan], 'g': ['a', 'b']})
+    table = summarize_cohort(df, mean=['v'], median=['v'], by='g').table
+    assert table['v_mean'].isna().all() and table['v_median'].isna().all()
+    assert table.loc['All', 'n'] == 2
+
+
+def test_empty_frame():
+    df = pd.DataFrame({'v': pd.Series([], dtype=np.float64)})
+    overall = summarize_cohort(df, mean=['v'], median=['v']).overall
+    assert overall['n'] == 0
+    assert np.isnan(overall['v_mean']) and np.isnan(overall['v_median'])
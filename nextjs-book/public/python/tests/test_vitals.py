@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from healthdata import parse_blood_pressure, parse_temperature, parse_vitals
+
+
+def test_blood_pressure():
+    values = pd.Series(['140/90', '120 / 80 mmHg', 'n/a', None, '80/120', '400/90', '140/90'],
+                       index=list('abcdefg'))
+    parsed = parse_blood_pressure(values)
+    assert list(parsed.index) == list('abcdefg')
+    assert parsed['systolic'].dtype == 'Int16'
+    assert parsed['systolic'].tolist() == [140, 120, pd.NA, pd.NA, pd.NA, pd.NA, 140]
+    assert parsed['diastolic'].tolist() == [90, 80, pd.NA, pd.NA, pd.NA, pd.NA, 90]
+
+
+def test_temperature():
+    values = pd.Series(['98.6', '37 C', '99.1°F', 'hot', None, '150'])
+    fahrenheit = parse_temperature(values)
+    np.testing.assert_allclose(fahrenheit[:3], [98.6, 98.6, 99.1], rtol=1e-6)
+    assert fahrenheit[3:].isna().all()
+    np.testing.assert_allclose(parse_temperature(values, unit='C')[:2], [37.0, 37.0], rtol=1e-5)
+
+
+def test_empty_and_all_missing():
+    assert len(parse_blood_pressure(pd.Series([], dtype=object))) == 0
+    assert parse_temperature(pd.Series([None, None], dtype=object)).isna().all()
+
+
+def test_parse_vitals_replaces_columns():
+    df = pd.DataFrame({'bp': ['130/85', 'bad'], 'temp': ['37C', '98.2']})
+    out = parse_vitals(df, blood_pressure='bp', temperature='temp')
+    assert list(out.columns) == ['temp', 'systolic_bp', 'diastolic_bp']
+    assert out['systolic_bp'].tolist() == [130, pd.NA]
@@ -0,0 +1,320 @@
+// Benchmarks every lesson script in public/python under CPython and under
+// Node-hosted Pyodide, appends the numbers to benchmarks/history.jsonl and
+// flags regressions against earlier runs on the same machine.
+//
+// Usage: node scripts/benchmark.mjs [options]
+//   --runtime cpython,pyodide     runtimes to measure (default: both)
+//   --rows 1000,100000,...        cohort sizes for scaled variants
+//                                 (default 1k/100k/1M/10M; "none" skips them)
+//   --script <name>               only scripts whose file name contains this
+//                                 (repeatable)
+//   --repeat <n>                  runs per variant; the fastest is kept
+//   --threshold <ratio>           regression threshold (default 0.2 = +20%)
+//   --timeout <seconds>           per run (default 900)
+//   --python <path>               CPython interpreter (default $PYTHON or python3)
+//   --history <file>              history file (default benchmarks/history.jsonl)
+//   --no-record                   measure and compare without appending
+//   --fail-on-regression          exit with status 1 when anything regressed
+//
+// Scaled variants resize the cohort a script builds with generate_cohort or
+// cached_cohort (see scripts/benchmark_runner.py); scripts that build none
+// are only measured as written. Each run gets a fresh interpreter, so the
+// Pyodide numbers include loading the runtime and its packages (load_ms).
+// The Pyodide runs need the self-hosted bundle: npm run pyodide:fetch.
+
+import { execFileSync, spawn } from 'node:child_process';
+import { existsSync } from 'node:fs';
+import { appendFile, mkdir, readFile, readdir } from 'node:fs/promises';
+import { dirname, join } from 'node:path';
+import { fileURLToPath, pathToFileURL } from 'node:url';
+import { parseArgs } from 'node:util';
+
+const root = join(dirname(fileURLToPath(import.meta.url)), '..');
+const scriptsDir = join(root, 'public', 'python');
+const runnerDir = join(root, 'scripts');
+const bundle = JSON.parse(await readFile(join(root, 'pyodide-bundle.json'), 'utf8'));
+const pyodideDir = join(root, 'public', 'pyodide', `v${bundle.version}`);
+
+const DEFAULT_ROWS = [1_000, 100_000, 1_000_000, 10_000_000];
+
+// Earlier successful runs a new result is compared against (their median)
+const BASELINE_RUNS = 5;
+
+// Differences below these are noise however large the ratio
+const NOISE_FLOOR = { wall_ms: 5, import_ms: 5, peak_rss_bytes: 1e6, wasm_heap_bytes: 1e6 };
+
+// Scripts that can be resized; benchmark_runner.py does the actual rewrite
+const COHORT_CALL = /\b(?:generate_cohort|cached_cohort)\(/;
+
+const { values: args } = parseArgs({
+  args: process.argv.slice(2),
+  options: {
+    runtime: { type: 'string', default: 'cpython,pyodide' },
+    rows: { type: 'string' },
+    script: { type: 'string', multiple: true },
+    repeat: { type: 'string', default: '1' },
+    threshold: { type: 'string', default: '0.2' },
+    timeout: { type: 'string', default: '900' },
+    python: { type: 'string', default: process.env.PYTHON || 'python3' },
+    history: { type: 'string', default: join(root, 'benchmarks', 'history.jsonl') },
+    'no-record': { type: 'boolean', default: false },
+    'fail-on-regression': { type: 'boolean', default: false },
+    // Internal: run one script inside this process's own Pyodide
+    'pyodide-child': { type: 'string' }
+  }
+});
+
+const formatMs = (ms) => (ms >= 1000 ? `${(ms / 1000).toFixed(2)} s` : `${Math.round(ms)} ms`);
+
+const formatBytes = (bytes) => {
+  if (bytes >= 1e9) return `${(bytes / 1e9).toFixed(2)} GB`;
+  if (bytes >= 1e6) return `${(bytes / 1e6).toFixed(1)} MB`;
+  if (bytes >= 1e3) return `${(bytes / 1e3).toFixed(1)} KB`;
+  return `${bytes} B`;
+};
+
+const formatRows = (rows) =>
+  rows === null ? 'as written'
+    : rows >= 1e6 ? `${rows / 1e6}M rows`
+      : rows >= 1e3 ? `${rows / 1e3}k rows`
+        : `${rows} rows`;
+
+const median = (values) => {
+  const sorted = [...values].sort((a, b) => a - b);
+  const mid = Math.floor(sorted.length / 2);
+  return sorted.length % 2 ? sorted[mid] : (sorted[mid - 1] + sorted[mid]) / 2;
+};
+
+// Runs inside the child process started by runPyodide()
+const pyodideChild = async (script, rows) => {
+  const started = performance.now();
+  const { loadPyodide } = await import(pathToFileURL(join(pyodideDir, 'pyodide.mjs')).href);
+  const pyodide = await loadPyodide({ indexURL: `${pyodideDir}/` });
+  await pyodide.loadPackage(bundle.packageSets.default, { messageCallback: () => undefined });
+  const loadMs = performance.now() - started;
+
+  pyodide.setStdout({ batched: () => undefined });
+  pyodide.setStderr({ batched: () => undefined });
+  for (const [source, target] of [[scriptsDir, '/book'], [runnerDir, '/bench']]) {
+    pyodide.FS.mkdirTree(target);
+    pyodide.FS.mount(pyodide.FS.filesystems.NODEFS, { root: source }, target);
+  }
+  pyodide.runPython("import sys; sys.path.insert(0, '/bench')");
+
+  const runner = pyodide.pyimport('benchmark_runner');
+  const measured = runner.run(`/book/${script}`, rows);
+  const result = measured.toJs({ dict_converter: Object.fromEntries });
+  measured.destroy();
+
+  result.load_ms = Math.round(loadMs * 1000) / 1000;
+  result.wasm_heap_bytes = pyodide._module.HEAPU8.length;
+  result.peak_rss_bytes = process.resourceUsage().maxRSS * 1024;
+  process.stdout.write(`${JSON.stringify(result)}\n`);
+};
+
+// Start a child process and parse the JSON line it prints last
+const runChild = (command, childArgs, timeoutMs) => new Promise((resolve) => {
+  const child = spawn(command, childArgs, { cwd: root, stdio: ['ignore', 'pipe', 'pipe'] });
+  let stdout = '';
+  let stderr = '';
+  let timedOut = false;
+  const timer = setTimeout(() => {
+    timedOut = true;
+    child.kill('SIGKILL');
+  }, timeoutMs);
+
+  child.stdout.on('data', (chunk) => { stdout += chunk; });
+  child.stderr.on('data', (chunk) => { stderr = (stderr + chunk).slice(-2000); });
+  child.on('error', (error) => {
+    clearTimeout(timer);
+    resolve({ status: 'crashed', error: error.message });
+  });
+  child.on('close', (code, signal) => {
+    clearTimeout(timer);
+    if (timedOut) {
+      resolve({ status: 'timeout', error: `No result after ${timeoutMs / 1000}s` });
+      return;
+    }
+    const last = stdout.trim().split('\n').pop();
+    try {
+      resolve(JSON.parse(last));
+    } catch {
+      // Killed for running out of memory, or the runner itself failed
+      const reason = signal ? `killed by ${signal}` : `exit code ${code}`;
+      resolve({ status: 'crashed', error: `${reason}: ${stderr.trim().split('\n').pop() || ''}`.trim() });
+    }
+  });
+});
+
+const RUNTIMES = {
+  cpython: {
+    version: () => execFileSync(args.python, ['-c', 'import platform; print(platform.python_version())'])
+      .toString().trim(),
+    run: (script, rows, timeoutMs) => runChild(
+      args.python,
+      [join(runnerDir, 'benchmark_runner.py'), join(scriptsDir, script), ...(rows === null ? [] : ['--rows', String(rows)])],
+      timeoutMs
+    )
+  },
+  pyodide: {
+    version: () => {
+      if (!existsSync(join(pyodideDir, 'pyodide.mjs'))) {
+        throw new Error(`no Pyodide bundle in ${pyodideDir}; run npm run pyodide:fetch`);
+      }
+      return bundle.version;
+    },
+    run: (script, rows, timeoutMs) => runChild(
+      process.execPath,
+      [fileURLToPath(import.meta.url), '--pyodide-child', script, ...(rows === null ? [] : ['--rows', String(rows)])],
+      timeoutMs
+    )
+  }
+};
+
+const readHistory = async (file) => {
+  if (!existsSync(file)) return [];
+  const text = await readFile(file, 'utf8');
+  return text.split('\n').filter(Boolean).map(line => JSON.parse(line));
+};
+
+const historyKey = (entry) => `${entry.runtime}|${entry.script}|${entry.rows ?? ''}`;
+
+// Metrics that grew past the threshold against the median of earlier runs
+const findRegressions = (entry, history, threshold) => {
+  const earlier = history.filter(past => historyKey(past) === historyKey(entry));
+  const baseline = earlier.filter(past => past.status === 'ok').slice(-BASELINE_RUNS);
+  if (baseline.length === 0) return [];
+
+  if (entry.status !== 'ok') {
+    return [`now fails (${entry.status}) after ${baseline.length} successful run(s)`];
+  }
+
+  const regressions = [];
+  for (const [metric, floor] of Object.entries(NOISE_FLOOR)) {
+    const values = baseline.map(past => past[metric]).filter(value => typeof value === 'number');
+    if (values.length === 0 || typeof entry[metric] !== 'number') continue;
+    const reference = median(values);
+    const change = entry[metric] - reference;
+    if (change > floor && entry[metric] > reference * (1 + threshold)) {
+      const format = metric.endsWith('_ms') ? formatMs : formatBytes;
+      regressions.push(
+        `${metric} ${format(reference)} -> ${format(entry[metric])} (+${Math.round((change / reference) * 100)}%)`
+      );
+    }
+  }
+  return regressions;
+};
+
+const gitCommit = () => {
+  try {
+    const commit = execFileSync('git', ['rev-parse', '--short', 'HEAD'], { cwd: root }).toString().trim();
+    const dirty = execFileSync('git', ['status', '--porcelain', '--', '.'], { cwd: root }).toString().trim() !== '';
+    return dirty ? `${commit}-dirty` : commit;
+  } catch {
+    return null;
+  }
+};
+
+const main = async () => {
+  const threshold = Number(args.threshold);
+  const repeat = Math.max(1, Number(args.repeat));
+  const timeoutMs = Number(args.timeout) * 1000;
+  const rows = args.rows === 'none' ? []
+    : args.rows ? args.rows.split(',').map(Number)
+      : DEFAULT_ROWS;
+
+  const runtimes = [];
+  for (const name of args.runtime.split(',')) {
+    if (!RUNTIMES[name]) throw new Error(`Unknown runtime ${name}; expected cpython or pyodide`);
+    try {
+      runtimes.push({ name, version: RUNTIMES[name].version(), run: RUNTIMES[name].run });
+    } catch (error) {
+      console.warn(`Skipping ${name}: ${error.message}`);
+    }
+  }
+
+  const scripts = (await readdir(scriptsDir))
+    .filter(file => file.endsWith('.py'))
+    .filter(file => !args.script || args.script.some(pattern => file.includes(pattern)))
+    .sort();
+
+  const jobs = [];
+  for (const script of scripts) {
+    const source = await readFile(join(scriptsDir, script), 'utf8');
+    const variants = [null, ...(COHORT_CALL.test(source) ? rows : [])];
+    for (const runtime of runtimes) {
+      variants.forEach(variant => jobs.push({ runtime, script, rows: variant }));
+    }
+  }
+
+  const history = await readHistory(args.history);
+  const timestamp = new Date().toISOString();
+  const commit = gitCommit();
+  const entries = [];
+  const flagged = [];
+
+  for (const { runtime, script, rows: variant } of jobs) {
+    let best = null;
+    for (let i = 0; i < repeat; i++) {
+      const result = await runtime.run(script, variant, timeoutMs);
+      if (!best || (result.status === 'ok' && (best.status !== 'ok' || result.wall_ms < best.wall_ms))) {
+        best = result;
+      }
+      if (result.status !== 'ok') break;
+    }
+    if (best.status === 'skipped') continue;
+
+    const entry = {
+      timestamp,
+      commit,
+      runtime: runtime.name,
+      runtime_version: runtime.version,
+      script,
+      ...best,
+      rows: variant,
+      runs: repeat
+    };
+    entries.push(entry);
+
+    const memory = entry.wasm_heap_bytes ?? entry.peak_rss_bytes;
+    console.log([
+      runtime.name.padEnd(8),
+      script.padEnd(32),
+      formatRows(variant).padEnd(11),
+      entry.status === 'ok'
+        ? `${formatMs(entry.wall_ms).padStart(9)}  import ${formatMs(entry.import_ms).padStart(8)}`
+          + `  ${entry.wasm_heap_bytes ? 'heap' : 'rss '} ${formatBytes(memory).padStart(9)}`
+          + `  output ${formatBytes(entry.output_bytes + entry.figure_bytes)}`
+        : `${entry.status}: ${entry.error}`
+    ].join(' '));
+
+    const regressions = findRegressions(entry, history, threshold);
+    if (regressions.length > 0) {
+      flagged.push({ entry, regressions });
+      regressions.forEach(message => console.log(`  ! ${message}`));
+    }
+  }
+
+  if (!args['no-record'] && entries.length > 0) {
+    await mkdir(dirname(args.history), { recursive: true });
+    await appendFile(args.history, entries.map(entry => `${JSON.stringify(entry)}\n`).join(''));
+    console.log(`\n${entries.length} result(s) appended to ${args.history}`);
+  }
+
+  if (flagged.length > 0) {
+    console.log(`\n${flagged.length} regression(s) above ${Math.round(threshold * 100)}%:`);
+    flagged.forEach(({ entry, regressions }) => {
+      console.log(`  ${entry.runtime} ${entry.script} (${formatRows(entry.rows)}): ${regressions.join('; ')}`);
+    });
+    if (args['fail-on-regression']) process.exitCode = 1;
+  }
+};
+
+const entry = args['pyodide-child']
+  ? pyodideChild(args['pyodide-child'], args.rows ? Number(args.rows) : null)
+  : main();
+
+entry.catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,194 @@
+# Runs one lesson script and reports what it cost, as a JSON object.
+#
+# Usage: python scripts/benchmark_runner.py <script.py> [--rows N]
+#
+# scripts/benchmark.mjs calls this in a fresh CPython process per run, and
+# imports it inside a fresh Node-hosted Pyodide for the Pyodide numbers, so
+# both runtimes measure a script exactly the same way. Nothing heavy is
+# imported here: the script's own imports are part of what gets timed.
+
+import ast
+import builtins
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Calls whose first argument sets the cohort size of a scaled variant
+COHORT_FUNCTIONS = ('generate_cohort', 'cached_cohort')
+
+
+class _Counter(io.TextIOBase):
+    """A text stream that only counts what is written to it."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8', 'replace'))
+        return len(text)
+
+
+class _ImportTimer:
+    """Total time spent in top-level import statements while installed."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._depth = 0
+        self._import = builtins.__import__
+
+    def __call__(self, *args, **kwargs):
+        if self._depth:
+            return self._import(*args, **kwargs)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._import(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self._depth -= 1
+
+    def __enter__(self):
+        builtins.__import__ = self
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.__import__ = self._import
+        return False
+
+
+class _Scaler(ast.NodeTransformer):
+    """Rewrite the cohort size of every generate_cohort/cached_cohort call.
+
+    The size may be a literal (``generate_cohort(200_000)``) or a name bound
+    to one at module level (``n_patients = 100; cached_cohort(n_patients)``).
+    """
+
+    def __init__(self, rows, tree):
+        self.rows = rows
+        self.scaled = False
+        self._names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call) and _callee(node) in COHORT_FUNCTIONS and node.args:
+                if isinstance(node.args[0], ast.Name):
+                    self._names.add(node.args[0].id)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if _callee(node) in COHORT_FUNCTIONS and node.args and _is_int(node.args[0]):
+            node.args[0] = ast.copy_location(ast.Constant(self.rows), node.args[0])
+            self.scaled = True
+        return node
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        if _is_int(node.value) and self._names.intersection(targets):
+            node.value = ast.copy_location(ast.Constant(self.rows), node.value)
+            self.scaled = True
+        return node
+
+
+def _callee(call):
+    func = call.func
+    return func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+
+
+def _is_int(node):
+    return isinstance(node, ast.Constant) and type(node.value) is int
+
+
+def compile_script(path, rows=None):
+    """Compile ``path``, resized to ``rows`` patients when given.
+
+    Returns ``(code, scaled)``; ``scaled`` is False when the script builds
+    no cohort, in which case it has no scaled variants.
+    """
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    tree = ast.parse(source, path)
+    scaled = False
+    if rows is not None:
+        scaler = _Scaler(rows, tree)
+        tree = ast.fix_missing_locations(scaler.visit(tree))
+        scaled = scaler.scaled
+    return compile(tree, path, 'exec'), scaled
+
+
+def run(path, rows=None):
+    """Execute the script once and return its measurements.
+
+    stdout and stderr are counted rather than shown, figures go through the
+    healthdata.figures backend as in the browser, and the dataset cache
+    starts empty so cached_cohort always pays for generating the cohort.
+    """
+    path = os.path.abspath(path)
+    code, scaled = compile_script(path, rows)
+    result = {'script': os.path.basename(path), 'rows': rows if scaled else None}
+    if rows is not None and not scaled:
+        result.update(status='skipped', error='script builds no cohort to scale')
+        return result
+
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    os.environ['MPLBACKEND'] = 'module://healthdata.figures'
+    cache_dir = tempfile.TemporaryDirectory()
+    os.environ['HEALTHDATA_CACHE_DIR'] = cache_dir.name
+
+    out = _Counter()
+    stdout, stderr = sys.stdout, sys.stderr
+    namespace = {'__name__': '__main__', '__file__': path}
+    error = None
+    sys.stdout = sys.stderr = out
+    start = time.perf_counter()
+    try:
+        with _ImportTimer() as imports:
+            exec(code, namespace)
+    except BaseException as exc:  # SystemExit and KeyboardInterrupt included
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        wall = time.perf_counter() - start
+        sys.stdout, sys.stderr = stdout, stderr
+        cache_dir.cleanup()
+
+    figures = sys.modules.get('healthdata.figures')
+    captured = figures.captured if figures is not None else []
+    result.update(
+        status='error' if error else 'ok',
+        wall_ms=round(wall * 1000, 3),
+        import_ms=round(imports.seconds * 1000, 3),
+        output_bytes=out.bytes,
+        figures=len(captured),
+        figure_bytes=sum(len(data) for _, _, data in captured),
+    )
+    if error:
+        result['error'] = error[:500]
+    return result
+
+
+def _peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def main(argv):
+    path = argv[0]
+    rows = int(argv[argv.index('--rows') + 1]) if '--rows' in argv else None
+    result = run(path, rows)
+    result['peak_rss_bytes'] = _peak_rss_bytes()
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
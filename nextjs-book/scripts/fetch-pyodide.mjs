@@ -0,0 +1,125 @@
+// Downloads the pinned Pyodide distribution into public/pyodide/v<version>/
+// and writes one lockfile per package set listed in pyodide-bundle.json.
+//
+// Usage: node scripts/fetch-pyodide.mjs [--force] [--out <dir>]
+//   --out <dir>   write the bundle to <dir>/v<version>/ instead, e.g. into
+//                 the Flutter app's assets (npm run pyodide:fetch:flutter)
+//
+// Files that are already present with the expected checksum are skipped,
+// so running this before every build is cheap once the bundle exists.
+
+import { createHash } from 'node:crypto';
+import { existsSync } from 'node:fs';
+import { mkdir, readFile, rename, writeFile } from 'node:fs/promises';
+import { dirname, join, resolve } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const root = join(dirname(fileURLToPath(import.meta.url)), '..');
+const bundle = JSON.parse(await readFile(join(root, 'pyodide-bundle.json'), 'utf8'));
+const outIndex = process.argv.indexOf('--out');
+const outRoot = outIndex === -1 ? join(root, 'public', 'pyodide') : resolve(process.argv[outIndex + 1]);
+const outDir = join(outRoot, `v${bundle.version}`);
+const force = process.argv.includes('--force');
+
+// Everything loadPyodide() fetches before the first package
+const CORE_FILES = [
+  'pyodide.js',
+  'pyodide.mjs',
+  'pyodide.asm.js',
+  'pyodide.asm.wasm',
+  'python_stdlib.zip',
+  'pyodide-lock.json'
+];
+
+const sha256 = (data) => createHash('sha256').update(data).digest('hex');
+
+// Same key the browser derives from a chapter's package list
+const packageSetKey = (packages) =>
+  [...new Set(packages.map(name => name.toLowerCase()))].sort().join('+');
+
+const download = async (fileName, expectedSha256) => {
+  const target = join(outDir, fileName);
+  if (!force && existsSync(target)) {
+    if (!expectedSha256) return false;
+    if (sha256(await readFile(target)) === expectedSha256) return false;
+  }
+
+  const response = await fetch(new URL(fileName, bundle.cdn));
+  if (!response.ok) {
+    throw new Error(`Failed to download ${fileName}: ${response.status}`);
+  }
+  const data = Buffer.from(await response.arrayBuffer());
+  if (expectedSha256 && sha256(data) !== expectedSha256) {
+    throw new Error(`Checksum mismatch for ${fileName}`);
+  }
+
+  // Write then rename so an interrupted run never leaves a truncated file
+  await writeFile(`${target}.tmp`, data);
+  await rename(`${target}.tmp`, target);
+  return true;
+};
+
+// Package names plus everything they depend on, per pyodide-lock.json
+const resolveClosure = (lock, packages) => {
+  const resolved = new Set();
+  const visit = (name) => {
+    const key = name.toLowerCase();
+    if (resolved.has(key)) return;
+    const entry = lock.packages[key];
+    if (!entry) {
+      throw new Error(`${name} is not part of Pyodide ${bundle.version}`);
+    }
+    resolved.add(key);
+    entry.depends.forEach(visit);
+  };
+  packages.forEach(visit);
+  return [...resolved].sort().map(key => lock.packages[key]);
+};
+
+const main = async () => {
+  if (process.env.NEXT_PUBLIC_PYODIDE_INDEX_URL && outIndex === -1) {
+    console.log('NEXT_PUBLIC_PYODIDE_INDEX_URL is set; skipping the self-hosted bundle');
+    return;
+  }
+
+  await mkdir(join(outDir, 'locks'), { recursive: true });
+
+  let downloaded = 0;
+  for (const fileName of CORE_FILES) {
+    if (await download(fileName)) downloaded++;
+  }
+
+  const lock = JSON.parse(await readFile(join(outDir, 'pyodide-lock.json'), 'utf8'));
+  for (const [setName, packages] of Object.entries(bundle.packageSets)) {
+    const entries = resolveClosure(lock, packages);
+    for (const entry of entries) {
+      if (await download(entry.file_name, entry.sha256)) downloaded++;
+    }
+
+    const key = packageSetKey(packages);
+    const contents = JSON.stringify({
+      name: setName,
+      version: bundle.version,
+      packages: packages.map(name => name.toLowerCase()).sort(),
+      files: entries.map(entry => ({
+        name: entry.name,
+        version: entry.version,
+        file_name: entry.file_name,
+        sha256: entry.sha256
+      }))
+    }, null, 2) + '\n';
+    await writeFile(join(outDir, 'locks', `${key}.json`), contents);
+    // The service worker precaches this set on install
+    if (setName === 'default') {
+      await writeFile(join(outDir, 'locks', 'default.json'), contents);
+    }
+    console.log(`${setName}: ${entries.length} wheels -> locks/${key}.json`);
+  }
+
+  console.log(`Pyodide ${bundle.version}: ${downloaded} file(s) downloaded to ${outDir}`);
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
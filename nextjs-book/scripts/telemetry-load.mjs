@@ -0,0 +1,131 @@
+// Load generator for code-execution telemetry: replays a class of learners
+// pressing Ctrl+Enter against a running server, once through the per-run
+// endpoint and once through the bulk endpoint, and reports the throughput.
+//
+// Usage: node scripts/telemetry-load.mjs --chapter <uuid> --cookie "<Cookie header>" [options]
+//   --url <base>          server to load (default http://localhost:3000)
+//   --org <slug>          organization slug, sent in the Referer like the app does
+//   --learners <n>        simulated learners (default 300)
+//   --runs <n>            runs per learner (default 3)
+//   --batch <n>           runs per bulk request (default 25, as the client queue)
+//   --concurrency <n>     requests in flight at once (default 50)
+//   --mode single|bulk|both
+//
+// The cookie must belong to a signed-in user who can see the chapter (copy
+// it from the browser's dev tools). Every simulated run is really inserted.
+
+import { randomUUID } from 'node:crypto';
+import { parseArgs } from 'node:util';
+
+const { values: args } = parseArgs({
+  args: process.argv.slice(2),
+  options: {
+    url: { type: 'string', default: 'http://localhost:3000' },
+    cookie: { type: 'string', default: process.env.TELEMETRY_COOKIE },
+    chapter: { type: 'string' },
+    org: { type: 'string' },
+    learners: { type: 'string', default: '300' },
+    runs: { type: 'string', default: '3' },
+    batch: { type: 'string', default: '25' },
+    concurrency: { type: 'string', default: '50' },
+    mode: { type: 'string', default: 'both' }
+  }
+});
+
+if (!args.chapter || !args.cookie) {
+  console.error('--chapter and --cookie (or TELEMETRY_COOKIE) are required');
+  process.exit(1);
+}
+
+const learners = Number(args.learners);
+const runsPerLearner = Number(args.runs);
+const batchSize = Number(args.batch);
+const concurrency = Number(args.concurrency);
+
+const headers = {
+  'Content-Type': 'application/json',
+  Cookie: args.cookie,
+  ...(args.org ? { Referer: `${args.url}/org/${args.org}/books` } : {})
+};
+
+const makeRun = (learner, run) => ({
+  chapterId: args.chapter,
+  sectionId: `load-test-${run % 5}`,
+  codeContent: `print(${learner} * ${run})`,
+  executionResult: String(learner * run),
+  executionStatus: 'success',
+  executionMode: 'shared',
+  contextId: args.chapter,
+  sessionId: randomUUID(),
+  executedAt: new Date().toISOString(),
+  durationMs: 5 + (run % 20)
+});
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+
+// Send every request with at most `concurrency` in flight
+const replay = async (label, path, bodies, eventsPerBody) => {
+  const latencies = [];
+  let failures = 0;
+  let next = 0;
+  const started = performance.now();
+
+  const workerLoop = async () => {
+    while (next < bodies.length) {
+      const body = bodies[next++];
+      const sent = performance.now();
+      try {
+        const response = await fetch(`${args.url}${path}`, { method: 'POST', headers, body });
+        await response.arrayBuffer();
+        if (!response.ok) failures++;
+      } catch {
+        failures++;
+      }
+      latencies.push(performance.now() - sent);
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(concurrency, bodies.length) }, workerLoop));
+
+  const seconds = (performance.now() - started) / 1000;
+  const events = eventsPerBody.reduce((sum, n) => sum + n, 0);
+  latencies.sort((a, b) => a - b);
+  console.log(
+    `${label.padEnd(7)} ${String(bodies.length).padStart(6)} requests  ${String(events).padStart(6)} runs  ` +
+    `${seconds.toFixed(2)} s  ${Math.round(events / seconds)} runs/s  ${Math.round(bodies.length / seconds)} req/s  ` +
+    `p50 ${Math.round(percentile(latencies, 0.5))} ms  p95 ${Math.round(percentile(latencies, 0.95))} ms  ` +
+    `${failures} failed`
+  );
+};
+
+const main = async () => {
+  const runs = Array.from({ length: learners }, (_, learner) =>
+    Array.from({ length: runsPerLearner }, (_, run) => makeRun(learner, run)));
+  console.log(`${learners} learners x ${runsPerLearner} runs against ${args.url}`);
+
+  if (args.mode !== 'bulk') {
+    const bodies = runs.flat().map(run => JSON.stringify(run));
+    await replay('single', '/api/code-executions', bodies, bodies.map(() => 1));
+  }
+
+  if (args.mode !== 'single') {
+    // Each learner's queue flushes on its own, as in the browser
+    const batches = runs.flatMap(learnerRuns => {
+      const chunks = [];
+      for (let i = 0; i < learnerRuns.length; i += batchSize) {
+        chunks.push(learnerRuns.slice(i, i + batchSize));
+      }
+      return chunks;
+    });
+    await replay(
+      'bulk',
+      '/api/code-executions/bulk',
+      batches.map(executions => JSON.stringify({ executions })),
+      batches.map(batch => batch.length)
+    );
+  }
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
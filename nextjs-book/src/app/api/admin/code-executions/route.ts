@@ -50,25 +50,27 @@ export async function GET(request: NextRequest) {
         return NextResponse.json({ error: 'Failed to fetch statistics' }, { status: 500 });
       }
 
-      // Additional organization-wide stats
-      const { data: orgStats, error: orgStatsError } = await supabase
-        .from('code_executions')
-        .select('execution_status, executed_at')
-        .eq('organization_id', user.organization_id);
-
-      if (orgStatsError) {
-        console.error('Error fetching org stats:', orgStatsError);
+      // Organization-wide totals come from the hourly rollups, never the raw runs
+      const startOfToday = new Date();
+      startOfToday.setHours(0, 0, 0, 0);
+      const [allTime, today] = await Promise.all([
+        supabase.rpc('code_execution_summary', { org: user.organization_id }).single(),
+        supabase.rpc('code_execution_summary', { org: user.organization_id, since: startOfToday.toISOString() }).single()
+      ]);
+
+      if (allTime.error || today.error) {
+        console.error('Error fetching org stats:', allTime.error || today.error);
         return NextResponse.json({ error: 'Failed to fetch organization statistics' }, { status: 500 });
       }
 
-      const totalExecutions = orgStats?.length || 0;
-      const successfulExecutions = orgStats?.filter(e => e.execution_status === 'success').length || 0;
-      const errorExecutions = orgStats?.filter(e => e.execution_status === 'error').length || 0;
-      const todayExecutions = orgStats?.filter(e => {
-        const today = new Date();
-        const executedDate = new Date(e.executed_at);
-        return executedDate.toDateString() === today.toDateString();
-      }).length || 0;
+      const summaryTotal = (summary: any) =>
+        (summary?.successful_executions || 0) + (summary?.error_executions || 0) + (summary?.timeout_executions || 0);
+
+      const totalExecutions = summaryTotal(allTime.data);
+      const successfulExecutions = allTime.data?.successful_executions || 0;
+      const errorExecutions = allTime.data?.error_executions || 0;
+      const timeoutExecutions = allTime.data?.timeout_executions || 0;
+      const todayExecutions = summaryTotal(today.data);
 
       // Transform stats to camelCase
       const transformedStats = (stats || []).map(stat => ({
@@ -95,8 +97,11 @@ export async function GET(request: NextRequest) {
             totalExecutions,
             successfulExecutions,
             errorExecutions,
+            timeoutExecutions,
             successRate: totalExecutions > 0 ? Math.round((successfulExecutions / totalExecutions) * 100) : 0,
-            todayExecutions
+            todayExecutions,
+            learners: allTime.data?.learners || 0,
+            learnersToday: today.data?.learners || 0
           }
         }
       });
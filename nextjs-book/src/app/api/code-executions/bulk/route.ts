@@ -0,0 +1,95 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getAuthenticatedUser, createClient } from '@/lib/supabase-server';
+import { z } from 'zod';
+import {
+  MAX_BULK_EXECUTIONS,
+  codeExecutionSchema,
+  getChapterAccess,
+  toExecutionRow
+} from '@/lib/codeExecutions';
+
+// Batches are validated as a whole only for their shape; each execution is
+// checked on its own so one bad event does not cost the rest of the batch
+const bulkSchema = z.object({
+  executions: z.array(z.unknown()).min(1).max(MAX_BULK_EXECUTIONS)
+});
+
+// Receives the batches queued by lib/executionTelemetry: one auth check,
+// one (usually cached) access check and one insert per batch
+export async function POST(request: NextRequest) {
+  try {
+    // Extract organization slug from the referer header
+    const referer = request.headers.get('referer');
+    let orgSlug: string | undefined = undefined;
+
+    if (referer) {
+      const urlMatch = referer.match(/\/org\/([^\/]+)/);
+      if (urlMatch && urlMatch[1]) {
+        orgSlug = urlMatch[1];
+      }
+    }
+
+    // Get authenticated user using the helper function
+    const { user, error: authError } = await getAuthenticatedUser(orgSlug);
+    if (authError || !user) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+    }
+
+    const supabase = await createClient();
+
+    // sendBeacon bodies may arrive as text/plain, so parse the text directly
+    const { executions } = bulkSchema.parse(JSON.parse(await request.text()));
+
+    const rejected: { index: number; error: string }[] = [];
+    const valid: { index: number; execution: z.infer<typeof codeExecutionSchema> }[] = [];
+    executions.forEach((candidate, index) => {
+      const parsed = codeExecutionSchema.safeParse(candidate);
+      if (parsed.success) {
+        valid.push({ index, execution: parsed.data });
+      } else {
+        rejected.push({ index, error: 'Invalid execution data' });
+      }
+    });
+
+    const access = await getChapterAccess(supabase, user, valid.map(({ execution }) => execution.chapterId));
+    const rows = valid.flatMap(({ index, execution }) => {
+      if (access.get(execution.chapterId) === 'allowed') {
+        return [toExecutionRow(user, execution)];
+      }
+      rejected.push({ index, error: 'Access denied to this content' });
+      return [];
+    });
+
+    if (rows.length > 0) {
+      // One multi-row INSERT for the whole batch
+      const { error: insertError } = await supabase
+        .from('code_executions')
+        .insert(rows);
+
+      if (insertError) {
+        console.error('Error inserting code executions:', insertError);
+        return NextResponse.json({ error: 'Failed to save executions' }, { status: 500 });
+      }
+    }
+
+    return NextResponse.json({
+      success: true,
+      inserted: rows.length,
+      rejected
+    });
+
+  } catch (error) {
+    console.error('Code execution bulk API error:', error);
+
+    if (error instanceof z.ZodError || error instanceof SyntaxError) {
+      return NextResponse.json({
+        error: 'Invalid request data',
+        details: error instanceof z.ZodError ? error.errors : undefined
+      }, { status: 400 });
+    }
+
+    return NextResponse.json({
+      error: 'Internal server error'
+    }, { status: 500 });
+  }
+}
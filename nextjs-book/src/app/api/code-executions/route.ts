@@ -1,18 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { getAuthenticatedUser, createClient } from '@/lib/supabase-server';
 import { z } from 'zod';
-
-const createExecutionSchema = z.object({
-  chapterId: z.string().uuid(),
-  sectionId: z.string().min(1),
-  codeContent: z.string().min(1),
-  executionResult: z.string().optional(),
-  executionStatus: z.enum(['success', 'error', 'timeout']),
-  errorMessage: z.string().optional(),
-  executionMode: z.enum(['shared', 'isolated']),
-  contextId: z.string().min(1),
-  sessionId: z.string().uuid().optional()
-});
+import { codeExecutionSchema, getChapterAccess, toExecutionRow } from '@/lib/codeExecutions';
 
 export async function POST(request: NextRequest) {
   try {
@@ -37,47 +26,24 @@ export async function POST(request: NextRequest) {
 
     // Parse and validate request body
     const body = await request.json();
-    const validatedData = createExecutionSchema.parse(body);
+    const validatedData = codeExecutionSchema.parse(body);
 
-    // Verify user has access to the chapter
-    const { data: chapterAccess, error: chapterError } = await supabase
-      .from('chapters')
-      .select('id, book_id')
-      .eq('id', validatedData.chapterId)
-      .single();
+    // Verify user has access to the chapter (cached per user)
+    const access = (await getChapterAccess(supabase, user, [validatedData.chapterId]))
+      .get(validatedData.chapterId);
 
-    if (chapterError || !chapterAccess) {
+    if (access === 'missing') {
       return NextResponse.json({ error: 'Chapter not found' }, { status: 404 });
     }
 
-    // Check if user has access to this book
-    const { data: bookAccess, error: bookAccessError } = await supabase
-      .from('books')
-      .select('id')
-      .eq('id', chapterAccess.book_id)
-      .or(`organization_id.eq.${user.organization_id},is_public.eq.true`)
-      .single();
-
-    if (bookAccessError || !bookAccess) {
+    if (access !== 'allowed') {
       return NextResponse.json({ error: 'Access denied to this content' }, { status: 403 });
     }
 
     // Insert code execution record
     const { data: execution, error: insertError } = await supabase
       .from('code_executions')
-      .insert({
-        user_id: user.id,
-        organization_id: user.organization_id,
-        chapter_id: validatedData.chapterId,
-        section_id: validatedData.sectionId,
-        code_content: validatedData.codeContent,
-        execution_result: validatedData.executionResult,
-        execution_status: validatedData.executionStatus,
-        error_message: validatedData.errorMessage,
-        execution_mode: validatedData.executionMode,
-        context_id: validatedData.contextId,
-        session_id: validatedData.sessionId
-      })
+      .insert(toExecutionRow(user, validatedData))
       .select()
       .single();
 
@@ -146,6 +146,18 @@ export async function DELETE(request: NextRequest) {
       // Don't throw - this is not critical
     }
 
+    // Delete the rollups built from them
+    for (const rollup of ['code_execution_hourly_rollups', 'code_execution_user_rollups']) {
+      const { error: rollupError } = await supabase
+        .from(rollup)
+        .delete()
+        .eq('organization_id', organization.id);
+
+      if (rollupError) {
+        console.error(`Error deleting ${rollup}:`, rollupError);
+      }
+    }
+
     // Delete invitations
     const { error: invitationsError } = await supabase
       .from('invitations')
@@ -118,6 +118,15 @@ export async function GET(request: NextRequest) {
     const completedProgress = progressData?.filter(p => p.completed).length || 0;
     const completionRate = totalProgress > 0 ? Math.round((completedProgress / totalProgress) * 100) : 0;
 
+    // Code runs in the last 7 days, from the hourly rollups
+    const { data: runs, error: runsError } = await supabase
+      .rpc('code_execution_summary', { org: user.organization_id, since: sevenDaysAgo.toISOString() })
+      .single();
+
+    if (runsError) {
+      console.error('Error fetching code execution summary:', runsError);
+    }
+
     const organizationStats = {
       users: {
         total: totalUsers || 0,
@@ -131,6 +140,11 @@ export async function GET(request: NextRequest) {
         totalProgress,
         completedProgress,
         completionRate
+      },
+      codeExecutions: {
+        last7Days: (runs?.successful_executions || 0) + (runs?.error_executions || 0) + (runs?.timeout_executions || 0),
+        successfulLast7Days: runs?.successful_executions || 0,
+        learnersLast7Days: runs?.learners || 0
       }
     };
 
@@ -2,10 +2,19 @@
 
 import { useState, useRef, useEffect, useCallback } from 'react';
 import Editor from '@monaco-editor/react';
-
-// Global shared Pyodide instances per execution context
-const sharedPyodideInstances: Record<string, unknown> = {};
-const isolatedPyodideInstances: Record<string, unknown> = {};
+import {
+  getPyodideWorkerPool,
+  DEFAULT_RUN_TIMEOUT_MS,
+  PythonCancelledError,
+  PythonTimeoutError,
+  type RunProfile
+} from '@/lib/pyodideWorkerPool';
+import { useStreamingOutput } from '@/lib/outputBuffer';
+import { addFigure, type RenderedFigure } from '@/lib/figures';
+import { trackCodeExecution } from '@/lib/executionTelemetry';
+import RunProfileSummary from '@/components/RunProfileSummary';
+
+const DEFAULT_HOT_LINES = 5;
 
 interface ExecutionAwarePythonEditorProps {
   initialCode?: string;
@@ -13,6 +22,8 @@ interface ExecutionAwarePythonEditorProps {
   contextId: string; // Chapter ID for shared mode, unique ID for isolated
   sectionId: string; // Unique identifier for this section
   chapterId?: string; // Chapter ID for tracking purposes
+  timeoutMs?: number; // Wall-clock limit per run; 0 disables it
+  profile?: boolean; // Start with profiling on (learners can toggle it)
   onCodeRun?: (code: string, success: boolean) => void;
 }
 
@@ -22,47 +33,49 @@ export default function ExecutionAwarePythonEditor({
   contextId,
   sectionId,
   chapterId,
+  timeoutMs = DEFAULT_RUN_TIMEOUT_MS,
+  profile = false,
   onCodeRun
 }: ExecutionAwarePythonEditorProps) {
   const [code, setCode] = useState(initialCode);
-  const [output, setOutput] = useState('');
+  const { output, append, setOutput, flush, reset } = useStreamingOutput();
+  const [figures, setFigures] = useState<RenderedFigure[]>([]);
   const [isRunning, setIsRunning] = useState(false);
   const [isLoadingPyodide, setIsLoadingPyodide] = useState(false);
+  const [profiling, setProfiling] = useState(profile);
+  const [runProfile, setRunProfile] = useState<RunProfile | null>(null);
   const editorRef = useRef<any>(null);
   const sessionId = useRef<string>(`${crypto.randomUUID()}`);
+  const runController = useRef<AbortController | null>(null);
+  const hasRun = useRef(false);
 
-  // Track code execution
-  const trackExecution = async (
+  // Track code execution; queued and sent in batches, so this never waits
+  const trackExecution = (
     code: string, 
     result: string, 
-    status: 'success' | 'error', 
-    errorMessage?: string
+    status: 'success' | 'error' | 'timeout', 
+    errorMessage?: string,
+    measured?: RunProfile,
+    elapsedMs?: number
   ) => {
     // Only track if we have a chapterId
     if (!chapterId) return;
 
-    try {
-      await fetch('/api/code-executions', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          chapterId,
-          sectionId,
-          codeContent: code,
-          executionResult: result,
-          executionStatus: status,
-          errorMessage,
-          executionMode,
-          contextId,
-          sessionId: sessionId.current
-        }),
-      });
-    } catch (error) {
-      // Silently fail - don't disrupt user experience if tracking fails
-      console.warn('Failed to track code execution:', error);
-    }
+    trackCodeExecution({
+      chapterId,
+      sectionId,
+      codeContent: code,
+      executionResult: result,
+      executionStatus: status,
+      errorMessage,
+      executionMode,
+      contextId,
+      sessionId: sessionId.current,
+      durationMs: measured ? Math.round(measured.wallMs) : elapsedMs,
+      wasmHeapBytes: measured?.heapBytes,
+      pythonPeakBytes: measured?.pythonPeakBytes,
+      hotLines: measured?.hotLines
+    });
   };
 
   useEffect(() => {
@@ -71,57 +84,40 @@ export default function ExecutionAwarePythonEditor({
     }
   }, [initialCode]);
 
-  const getPyodideInstance = useCallback(async () => {
-    const instanceKey = executionMode === 'shared' ? contextId : sectionId;
-    const instanceStore = executionMode === 'shared' ? sharedPyodideInstances : isolatedPyodideInstances;
-
-    if (instanceStore[instanceKey]) {
-      return instanceStore[instanceKey];
-    }
+  // Shared cells use the chapter context; isolated cells get their own namespace
+  const namespaceKey = executionMode === 'shared'
+    ? `shared:${contextId}`
+    : `isolated:${sectionId}`;
 
+  // Start a warm interpreter in the background as soon as a cell is on screen;
+  // it runs first so the key retained below can be pinned to it
+  useEffect(() => {
+    getPyodideWorkerPool().warm().catch((error) => {
+      console.warn('Failed to pre-warm Python worker:', error);
+    });
+  }, []);
+
+  // Drop this key's variables (and the DataFrames they hold in the Wasm
+  // heap) once no cell on screen uses it any more. If they are lost while
+  // still in use, because a stuck cell got its interpreter killed, say so
+  // under whatever this cell printed last.
+  useEffect(() => getPyodideWorkerPool().retain(namespaceKey, () => {
+    if (!hasRun.current) return;
+    append(executionMode === 'shared'
+      ? '\n⚠️ Python was restarted: variables from earlier cells in this chapter are gone. Re-run those cells first.\n'
+      : '\n⚠️ Python was restarted: this cell\'s variables are gone. Run it again.\n');
+  }), [namespaceKey, executionMode, append]);
+
+  const getPyodidePool = useCallback(async () => {
+    const pool = getPyodideWorkerPool();
     setIsLoadingPyodide(true);
     try {
-      // Load Pyodide
-      const pyodideScript = document.createElement('script');
-      pyodideScript.src = 'https://cdn.jsdelivr.net/pyodide/v0.26.2/full/pyodide.js';
-      
-      if (!document.querySelector('script[src*="pyodide.js"]')) {
-        document.head.appendChild(pyodideScript);
-        await new Promise((resolve, reject) => {
-          pyodideScript.onload = resolve;
-          pyodideScript.onerror = reject;
-        });
-      }
-
-      // Wait for loadPyodide to be available
-      while (typeof (window as any).loadPyodide === 'undefined') {
-        await new Promise(resolve => setTimeout(resolve, 100));
-      }
-
-      const pyodide = await (window as any).loadPyodide({
-        stdout: () => {}, // Will be set per execution
-        stderr: () => {}  // Will be set per execution
-      });
-
-      // Load essential packages
-      await pyodide.loadPackage(['pandas', 'numpy', 'matplotlib']);
-
-      // Setup common imports and configurations
-      await pyodide.runPythonAsync(`
-import sys, warnings, pandas as pd, numpy as np
-import matplotlib.pyplot as plt
-warnings.filterwarnings("ignore")
-pd.set_option("display.width", 100)
-pd.set_option("display.max_colwidth", 80)
-print("Python environment ready!")
-      `);
-
-      instanceStore[instanceKey] = pyodide;
-      return pyodide;
+      await pool.warm();
+      return pool;
     } finally {
       setIsLoadingPyodide(false);
     }
-  }, [executionMode, contextId, sectionId]);
+  }, []);
 
   const handleEditorDidMount = (editor: unknown, monaco: unknown) => {
     editorRef.current = editor;
@@ -147,77 +143,80 @@ print("Python environment ready!")
     if (!code.trim() || isRunning || isLoadingPyodide) return;
 
     setIsRunning(true);
-    setOutput('Running...');
+    hasRun.current = true;
+    reset();
+    setFigures([]);
+    setRunProfile(null);
 
-    try {
-      const pyodide = await getPyodideInstance();
-      let outputBuffer = '';
-
-      // Helper function to convert Pyodide output to text
-      const toText = (s: any): string => {
-        if (typeof s === 'string') return s;
-        
-        // Handle Uint8Array or array of character codes
-        if (s instanceof Uint8Array) {
-          return new TextDecoder().decode(s);
-        }
-        
-        // Handle individual character codes (common in some Pyodide versions)
-        if (typeof s === 'number' && s > 0 && s < 65536) {
-          return String.fromCharCode(s);
-        }
-        
-        // Handle arrays of character codes
-        if (Array.isArray(s)) {
-          return String.fromCharCode(...s);
-        }
-        
-        return String(s);
-      };
+    const controller = new AbortController();
+    runController.current = controller;
+    let figureCount = 0;
+    let measured: RunProfile | undefined;
+    let runStarted = 0;
 
-      // Capture output with proper text conversion
-      pyodide.setStdout({ 
-        raw: (text: any) => {
-          const converted = toText(text);
-          outputBuffer += converted;
-        }
-      });
-      pyodide.setStderr({ 
-        raw: (text: any) => {
-          const converted = toText(text);
-          outputBuffer += converted;
+    try {
+      const pool = await getPyodidePool();
+      runStarted = performance.now();
+
+      // Output streams into the console while the cell is still running
+      await pool.run(namespaceKey, code, {
+        timeoutMs,
+        signal: controller.signal,
+        onStdout: append,
+        onStderr: append,
+        onFigure: (figure) => {
+          figureCount++;
+          setFigures(prev => addFigure(prev, figure));
+        },
+        // Wall time and heap size come with every run; tracemalloc and
+        // line timings only when profiling is switched on
+        profile: profiling ? { hotLines: DEFAULT_HOT_LINES } : undefined,
+        onProfile: (result) => {
+          measured = result;
+          setRunProfile(result);
         }
       });
 
-      // Execute the code
-      await pyodide.runPythonAsync(code);
-
-      // Reset stdout/stderr
-      pyodide.setStdout();
-      pyodide.setStderr();
-
-      const result = outputBuffer || 'Code executed successfully (no output)';
-      setOutput(result);
+      let result = flush();
+      if (!result && figureCount === 0) {
+        result = 'Code executed successfully (no output)';
+        setOutput(result);
+      }
       onCodeRun?.(code, true);
       
       // Track successful execution
-      await trackExecution(code, result, 'success');
+      trackExecution(code, result, 'success', undefined, measured);
 
     } catch (err: any) {
       const errorMessage = err?.message || String(err);
-      const result = `Error: ${errorMessage}`;
-      setOutput(result);
+      append(`Error: ${errorMessage}`);
+      const result = flush();
       onCodeRun?.(code, false);
-      
-      // Track failed execution
-      await trackExecution(code, result, 'error', errorMessage);
+
+      // Cancelled runs were stopped by the learner and are not recorded
+      if (!(err instanceof PythonCancelledError)) {
+        const timedOut = err instanceof PythonTimeoutError;
+        // A timed-out run's profile comes later, if at all, once the worker
+        // unwinds; record the time the learner waited instead
+        const elapsedMs = timedOut && runStarted
+          ? Math.round(performance.now() - runStarted)
+          : undefined;
+        trackExecution(code, result, timedOut ? 'timeout' : 'error', errorMessage, measured, elapsedMs);
+      }
     } finally {
+      runController.current = null;
       setIsRunning(false);
     }
   };
 
+  const stopCode = () => {
+    runController.current?.abort();
+  };
+
   const clearConsole = () => {
-    setOutput('');
+    reset();
+    setFigures([]);
+    setRunProfile(null);
   };
 
   const getExecutionModeInfo = () => {
@@ -293,6 +292,24 @@ print("Python environment ready!")
         </div>
 
         <div style={{ display: 'flex', gap: '8px' }}>
+          <button
+            onClick={() => setProfiling(on => !on)}
+            disabled={isRunning}
+            title="Measure time, memory and the slowest lines of each run"
+            style={{
+              background: profiling ? 'rgba(122, 162, 247, 0.15)' : 'transparent',
+              border: `1px solid ${profiling ? 'rgba(122, 162, 247, 0.4)' : '#2a3769'}`,
+              borderRadius: '6px',
+              padding: '6px 12px',
+              color: profiling ? '#7aa2f7' : '#a6b0d6',
+              cursor: 'pointer',
+              fontSize: '12px',
+              transition: 'all 0.2s ease'
+            }}
+          >
+            ⏱ Profile
+          </button>
+
           <button
             onClick={clearConsole}
             disabled={isRunning || isLoadingPyodide}
@@ -317,7 +334,32 @@ print("Python environment ready!")
           >
             🗑️ Clear
           </button>
-          
+
+          {isRunning && (
+            <button
+              onClick={stopCode}
+              style={{
+                background: 'transparent',
+                border: '1px solid rgba(247, 118, 142, 0.4)',
+                borderRadius: '6px',
+                padding: '6px 12px',
+                color: '#f7768e',
+                cursor: 'pointer',
+                fontSize: '12px',
+                fontWeight: '600',
+                transition: 'all 0.2s ease'
+              }}
+              onMouseEnter={(e) => {
+                e.currentTarget.style.background = 'rgba(247, 118, 142, 0.1)';
+              }}
+              onMouseLeave={(e) => {
+                e.currentTarget.style.background = 'transparent';
+              }}
+            >
+              ⏹ Stop
+            </button>
+          )}
+
           <button
             onClick={handleRunCode}
             disabled={isRunning || isLoadingPyodide || !code.trim()}
@@ -390,7 +432,7 @@ print("Python environment ready!")
       </div>
 
       {/* Output Console */}
-      {output && (
+      {(output || isRunning || figures.length > 0) && (
         <div style={{
           borderTop: '1px solid #23305d',
           background: '#0d1428'
@@ -417,8 +459,19 @@ print("Python environment ready!")
             overflowY: 'auto',
             lineHeight: 1.5
           }}>
-            {output}
+            {output || (isRunning ? 'Running...' : '')}
           </div>
+          {figures.map(figure => (
+            <div key={figure.hash} style={{ padding: '0 16px 12px' }}>
+              {/* eslint-disable-next-line @next/next/no-img-element */}
+              <img
+                src={figure.url}
+                alt="Matplotlib figure"
+                style={{ maxWidth: '100%', background: '#ffffff', borderRadius: '6px' }}
+              />
+            </div>
+          ))}
+          {profiling && runProfile && <RunProfileSummary profile={runProfile} />}
         </div>
       )}
     </div>
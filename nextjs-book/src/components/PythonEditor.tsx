@@ -3,26 +3,35 @@
 import { useState, useRef, useEffect } from 'react';
 import Editor from '@monaco-editor/react';
 import { usePyodide } from '@/lib/usePyodide';
+import type { RunProfile } from '@/lib/pyodideWorkerPool';
+import RunProfileSummary from '@/components/RunProfileSummary';
+import { useStreamingOutput } from '@/lib/outputBuffer';
+import { addFigure, type RenderedFigure } from '@/lib/figures';
 
 interface PythonEditorProps {
   initialCode?: string;
   onCodeRun?: (code: string, success: boolean) => void;
   chapterId?: string; // For loading chapter-specific packages
+  profile?: boolean; // Start with profiling on (learners can toggle it)
 }
 
 export default function PythonEditor({ 
   initialCode = '', 
   onCodeRun,
-  chapterId
+  chapterId,
+  profile = false
 }: PythonEditorProps) {
   const [code, setCode] = useState(initialCode);
-  const [output, setOutput] = useState('');
+  const { output, append, setOutput, flush, reset } = useStreamingOutput();
+  const [figures, setFigures] = useState<RenderedFigure[]>([]);
   const [isRunning, setIsRunning] = useState(false);
+  const [profiling, setProfiling] = useState(profile);
+  const [runProfile, setRunProfile] = useState<RunProfile | null>(null);
   const [currentlyLoadingPackage, setCurrentlyLoadingPackage] = useState<string>('');
   const editorRef = useRef<{ addAction: (action: { id: string; label: string; keybindings: number[]; run: () => void }) => void } | null>(null);
   
   // Configure Pyodide with chapter-specific packages
-  const { runPython, isLoading: pyodideLoading, loadingState } = usePyodide({
+  const { runPython, interrupt, isLoading: pyodideLoading, loadingState } = usePyodide({
     chapterId,
     onPackageLoadStart: (packageName: string) => {
       setCurrentlyLoadingPackage(packageName);
@@ -30,7 +39,7 @@ export default function PythonEditor({
     onPackageLoadComplete: (packageName: string, success: boolean, error?: string) => {
       setCurrentlyLoadingPackage('');
       if (!success && error) {
-        setOutput(prev => prev + `\nWarning: Failed to load ${packageName}: ${error}`);
+        append(`\nWarning: Failed to load ${packageName}: ${error}`);
       }
     }
   });
@@ -75,16 +84,28 @@ export default function PythonEditor({
     if (!code.trim() || isRunning || pyodideLoading) return;
 
     setIsRunning(true);
-    setOutput('');
+    reset();
+    setFigures([]);
+    setRunProfile(null);
+    let figureCount = 0;
 
     try {
-      const result = await runPython(code);
+      const result = await runPython(code, {
+        onOutput: append,
+        onFigure: (figure) => {
+          figureCount++;
+          setFigures(prev => addFigure(prev, figure));
+        },
+        profile: profiling ? { hotLines: 5 } : undefined
+      });
+      setRunProfile(result.profile ?? null);
       
       if (result.error) {
-        setOutput(`Error: ${result.error}`);
+        append(`Error: ${result.error}`);
+        flush();
         onCodeRun?.(code, false);
       } else {
-        setOutput(result.output || 'Code executed successfully (no output)');
+        if (!flush() && figureCount === 0) setOutput('Code executed successfully (no output)');
         onCodeRun?.(code, true);
       }
     } catch (err) {
@@ -97,7 +118,9 @@ export default function PythonEditor({
   };
 
   const clearConsole = () => {
-    setOutput('');
+    reset();
+    setFigures([]);
+    setRunProfile(null);
   };
 
   return (
@@ -109,6 +132,16 @@ export default function PythonEditor({
             <p className="mt-1 text-sm text-gray-500">Write and execute Python code in real-time</p>
           </div>
           <div className="flex items-center space-x-3">
+            <button
+              onClick={() => setProfiling(on => !on)}
+              title="Measure time, memory and the slowest lines of each run"
+              className={`inline-flex items-center px-3 py-1.5 border text-sm font-medium rounded-md focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 ${
+                profiling ? 'border-indigo-300 text-indigo-700 bg-indigo-50' : 'border-gray-300 text-zinc-700 bg-white hover:bg-gray-50'
+              }`}
+              disabled={isRunning}
+            >
+              ⏱ Profile
+            </button>
             <button
               onClick={clearConsole}
               className="inline-flex items-center px-3 py-1.5 border border-gray-300 text-sm font-medium rounded-md text-zinc-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500"
@@ -116,6 +149,14 @@ export default function PythonEditor({
             >
               Clear Console
             </button>
+            {isRunning && (
+              <button
+                onClick={interrupt}
+                className="inline-flex items-center px-3 py-1.5 border border-red-300 text-sm font-medium rounded-md text-red-700 bg-white hover:bg-red-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-red-500"
+              >
+                Stop
+              </button>
+            )}
             <button
               onClick={handleRunCode}
               disabled={isRunning || pyodideLoading || !code.trim()}
@@ -173,16 +214,19 @@ export default function PythonEditor({
               )}
             </div>
             
-            {loadingState.totalEstimatedTime > 0 && (
+            {loadingState.totalBytes > 0 && (
               <div className="mt-2">
                 <div className="w-full bg-blue-200 rounded-full h-1.5">
                   <div 
                     className="bg-blue-600 h-1.5 rounded-full transition-all duration-500" 
                     style={{ 
-                      width: `${Math.min(100, (loadingState.currentProgress / loadingState.totalEstimatedTime) * 100)}%` 
+                      width: `${Math.min(100, (loadingState.downloadedBytes / loadingState.totalBytes) * 100)}%` 
                     }}
                   ></div>
                 </div>
+                <div className="mt-1 text-xs text-blue-700">
+                  {(loadingState.downloadedBytes / 1e6).toFixed(1)} of {(loadingState.totalBytes / 1e6).toFixed(1)} MB
+                </div>
               </div>
             )}
           </div>
@@ -208,6 +252,22 @@ export default function PythonEditor({
             output || 'No output yet. Run some code!'
           }
         </pre>
+
+        {figures.map(figure => (
+          // eslint-disable-next-line @next/next/no-img-element
+          <img
+            key={figure.hash}
+            src={figure.url}
+            alt="Matplotlib figure"
+            className="mt-3 max-w-full bg-white border border-gray-200 rounded-md"
+          />
+        ))}
+
+        {profiling && runProfile && (
+          <div className="mt-3 rounded-md overflow-hidden border border-gray-200">
+            <RunProfileSummary profile={runProfile} variant="light" />
+          </div>
+        )}
       </div>
     </div>
   );
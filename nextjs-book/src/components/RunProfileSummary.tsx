@@ -0,0 +1,81 @@
+'use client';
+
+import type { RunProfile } from '@/lib/pyodideWorkerPool';
+
+interface RunProfileSummaryProps {
+  profile: RunProfile;
+  variant?: 'dark' | 'light';
+}
+
+const formatBytes = (bytes: number) => {
+  const abs = Math.abs(bytes);
+  if (abs >= 1e9) return `${(bytes / 1e9).toFixed(2)} GB`;
+  if (abs >= 1e6) return `${(bytes / 1e6).toFixed(1)} MB`;
+  if (abs >= 1e3) return `${(bytes / 1e3).toFixed(1)} KB`;
+  return `${bytes} B`;
+};
+
+const formatMs = (ms: number) => (ms >= 1000 ? `${(ms / 1000).toFixed(2)} s` : `${ms.toFixed(ms < 10 ? 1 : 0)} ms`);
+
+// Where the time and memory of the last run went, shown under a cell
+export default function RunProfileSummary({ profile, variant = 'dark' }: RunProfileSummaryProps) {
+  const colors = variant === 'dark'
+    ? { text: '#a6b0d6', strong: '#e8ecff', bar: 'rgba(122, 162, 247, 0.35)', border: '#23305d', background: '#0d1428' }
+    : { text: '#4b5563', strong: '#111827', bar: 'rgba(37, 99, 235, 0.2)', border: '#e5e7eb', background: '#f9fafb' };
+
+  const stats = [
+    ['Wall time', formatMs(profile.wallMs)],
+    profile.pythonPeakBytes !== undefined && ['Python peak', formatBytes(profile.pythonPeakBytes)],
+    profile.heapBytes !== undefined && [
+      'Wasm heap',
+      formatBytes(profile.heapBytes)
+        + (profile.heapGrowthBytes ? ` (+${formatBytes(profile.heapGrowthBytes)})` : '')
+    ]
+  ].filter(Boolean) as [string, string][];
+
+  const slowest = profile.hotLines?.[0]?.ms || 0;
+
+  return (
+    <div style={{
+      padding: '8px 16px',
+      borderTop: `1px solid ${colors.border}`,
+      background: colors.background,
+      color: colors.text,
+      fontSize: '11px',
+      fontFamily: 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace'
+    }}>
+      <div style={{ display: 'flex', flexWrap: 'wrap', gap: '16px' }}>
+        {stats.map(([label, value]) => (
+          <span key={label}>
+            {label} <strong style={{ color: colors.strong }}>{value}</strong>
+          </span>
+        ))}
+      </div>
+      {profile.hotLines && profile.hotLines.length > 0 && (
+        <table style={{ marginTop: '6px', borderCollapse: 'collapse', width: '100%' }}>
+          <tbody>
+            {profile.hotLines.map(hot => (
+              <tr key={hot.line}>
+                <td style={{ padding: '1px 8px 1px 0', whiteSpace: 'nowrap' }}>line {hot.line}</td>
+                <td style={{ padding: '1px 8px 1px 0', whiteSpace: 'nowrap', width: '120px' }}>
+                  <div style={{
+                    background: colors.bar,
+                    width: `${slowest ? Math.max(2, (hot.ms / slowest) * 100) : 0}%`,
+                    padding: '0 4px',
+                    color: colors.strong
+                  }}>
+                    {formatMs(hot.ms)}
+                  </div>
+                </td>
+                <td style={{ padding: '1px 8px 1px 0', whiteSpace: 'nowrap' }}>×{hot.hits}</td>
+                <td style={{ padding: '1px 0', color: colors.strong, overflow: 'hidden', textOverflow: 'ellipsis' }}>
+                  {hot.source}
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+    </div>
+  );
+}
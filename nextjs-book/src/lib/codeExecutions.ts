@@ -0,0 +1,134 @@
+import { z } from 'zod';
+import type { createClient } from '@/lib/supabase-server';
+
+type ServerClient = Awaited<ReturnType<typeof createClient>>;
+
+// One code run, as sent by the editors (singly or in a batch)
+export const codeExecutionSchema = z.object({
+  chapterId: z.string().uuid(),
+  sectionId: z.string().min(1),
+  codeContent: z.string().min(1),
+  executionResult: z.string().optional(),
+  executionStatus: z.enum(['success', 'error', 'timeout']),
+  errorMessage: z.string().optional(),
+  executionMode: z.enum(['shared', 'isolated']),
+  contextId: z.string().min(1),
+  sessionId: z.string().uuid().optional(),
+  executedAt: z.string().datetime().optional(), // when the run happened, for batched events
+  durationMs: z.number().int().nonnegative().optional(),
+  wasmHeapBytes: z.number().int().nonnegative().optional(),
+  pythonPeakBytes: z.number().int().nonnegative().optional(),
+  hotLines: z.array(z.object({
+    line: z.number().int().positive(),
+    ms: z.number().nonnegative(),
+    hits: z.number().int().nonnegative(),
+    source: z.string().max(200)
+  })).max(20).optional()
+});
+
+export type CodeExecution = z.infer<typeof codeExecutionSchema>;
+
+export const MAX_BULK_EXECUTIONS = 100;
+
+// Client clocks are trusted for ordering within this window, not beyond it
+const MAX_CLOCK_SKEW_MS = 60_000;
+const MAX_EVENT_AGE_MS = 24 * 60 * 60 * 1000;
+
+// Always set: in a multi-row insert a missing value becomes NULL, not the default
+const executedAt = (value?: string) => {
+  const now = Date.now();
+  const age = value ? now - Date.parse(value) : NaN;
+  return age >= -MAX_CLOCK_SKEW_MS && age <= MAX_EVENT_AGE_MS ? value! : new Date(now).toISOString();
+};
+
+export const toExecutionRow = (
+  user: { id: string; organization_id: string },
+  execution: CodeExecution
+) => ({
+  user_id: user.id,
+  organization_id: user.organization_id,
+  chapter_id: execution.chapterId,
+  section_id: execution.sectionId,
+  code_content: execution.codeContent,
+  execution_result: execution.executionResult,
+  execution_status: execution.executionStatus,
+  error_message: execution.errorMessage,
+  execution_mode: execution.executionMode,
+  context_id: execution.contextId,
+  session_id: execution.sessionId,
+  executed_at: executedAt(execution.executedAt),
+  duration_ms: execution.durationMs,
+  wasm_heap_bytes: execution.wasmHeapBytes,
+  python_peak_bytes: execution.pythonPeakBytes,
+  hot_lines: execution.hotLines
+});
+
+export type ChapterAccess = 'allowed' | 'denied' | 'missing';
+
+// Chapter access per user, so repeated runs skip the chapter and book
+// lookups. Grants are kept longer than refusals, which may be lifted soon.
+const ACCESS_TTL_MS = 5 * 60 * 1000;
+const DENIED_TTL_MS = 30 * 1000;
+const MAX_ACCESS_ENTRIES = 10_000;
+
+const accessCache = new Map<string, { access: ChapterAccess; expires: number }>();
+
+const cacheAccess = (key: string, access: ChapterAccess) => {
+  // Maps iterate in insertion order, so the first key is the oldest
+  if (accessCache.size >= MAX_ACCESS_ENTRIES) {
+    accessCache.delete(accessCache.keys().next().value!);
+  }
+  const ttl = access === 'allowed' ? ACCESS_TTL_MS : DENIED_TTL_MS;
+  accessCache.set(key, { access, expires: Date.now() + ttl });
+};
+
+// Whether the user may record executions for each chapter. Uncached
+// chapters are checked together: one chapters query and one books query.
+export async function getChapterAccess(
+  supabase: ServerClient,
+  user: { id: string; organization_id: string },
+  chapterIds: string[]
+): Promise<Map<string, ChapterAccess>> {
+  const now = Date.now();
+  const result = new Map<string, ChapterAccess>();
+  const unknown: string[] = [];
+
+  for (const chapterId of new Set(chapterIds)) {
+    const cached = accessCache.get(`${user.id}:${chapterId}`);
+    if (cached && cached.expires > now) {
+      result.set(chapterId, cached.access);
+    } else {
+      unknown.push(chapterId);
+    }
+  }
+  if (unknown.length === 0) return result;
+
+  const { data: chapters, error: chapterError } = await supabase
+    .from('chapters')
+    .select('id, book_id')
+    .in('id', unknown);
+  if (chapterError) throw chapterError;
+
+  const bookIds = [...new Set((chapters || []).map(chapter => chapter.book_id))];
+  const accessibleBooks = new Set<string>();
+  if (bookIds.length > 0) {
+    const { data: books, error: bookError } = await supabase
+      .from('books')
+      .select('id')
+      .in('id', bookIds)
+      .or(`organization_id.eq.${user.organization_id},is_public.eq.true`);
+    if (bookError) throw bookError;
+    (books || []).forEach(book => accessibleBooks.add(book.id));
+  }
+
+  const bookOf = new Map((chapters || []).map(chapter => [chapter.id, chapter.book_id]));
+  for (const chapterId of unknown) {
+    const bookId = bookOf.get(chapterId);
+    const access: ChapterAccess = bookId === undefined ? 'missing'
+      : accessibleBooks.has(bookId) ? 'allowed'
+        : 'denied';
+    cacheAccess(`${user.id}:${chapterId}`, access);
+    result.set(chapterId, access);
+  }
+  return result;
+}
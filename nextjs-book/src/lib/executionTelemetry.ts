@@ -0,0 +1,186 @@
+'use client';
+
+import type { HotLine } from '@/lib/pyodideWorkerPool';
+
+// One code run as recorded by /api/code-executions(/bulk)
+export interface ExecutionEvent {
+  chapterId: string;
+  sectionId: string;
+  codeContent: string;
+  executionResult?: string;
+  executionStatus: 'success' | 'error' | 'timeout';
+  errorMessage?: string;
+  executionMode: 'shared' | 'isolated';
+  contextId: string;
+  sessionId?: string;
+  executedAt?: string;
+  durationMs?: number;
+  wasmHeapBytes?: number;
+  pythonPeakBytes?: number;
+  hotLines?: HotLine[];
+}
+
+const BULK_ENDPOINT = '/api/code-executions/bulk';
+
+// Flush once this many runs are queued, or this long after the first one
+const MAX_BATCH_SIZE = 25;
+const FLUSH_INTERVAL_MS = 5000;
+
+// Browsers cap the bytes queued by sendBeacon/keepalive at about 64 KB
+const MAX_BEACON_BYTES = 60_000;
+
+// Console output is kept up to 1 MB; telemetry only needs the end of it
+const MAX_RESULT_CHARS = 10_000;
+
+// Runs kept while the endpoint is unreachable; the oldest are dropped
+const MAX_QUEUED = 500;
+
+const encoder = new TextEncoder();
+
+// The beacon limit counts UTF-8 bytes, not UTF-16 code units
+const byteLength = (text: string) => encoder.encode(text).length;
+
+// Batches executions in memory and sends them in bulk, so a run never waits
+// on the network and the server sees one request per batch instead of one
+// per Ctrl+Enter. Whatever is queued when the page is hidden goes out via
+// sendBeacon, which the browser delivers even if the tab is closed.
+class ExecutionTelemetry {
+  private queue: ExecutionEvent[] = [];
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private sending = false;
+  private listening = false;
+
+  track(event: ExecutionEvent) {
+    const result = event.executionResult;
+    this.queue.push({
+      ...event,
+      executedAt: event.executedAt ?? new Date().toISOString(),
+      executionResult: result && result.length > MAX_RESULT_CHARS
+        ? `[…truncated]\n${result.slice(-MAX_RESULT_CHARS)}`
+        : result
+    });
+    this.trim();
+    this.listen();
+
+    if (this.queue.length >= MAX_BATCH_SIZE) {
+      void this.flush();
+    } else if (!this.timer) {
+      this.timer = setTimeout(() => void this.flush(), FLUSH_INTERVAL_MS);
+    }
+  }
+
+  // Send everything queued. With beacon, the page is going away: requests
+  // are handed to the browser and not awaited or retried.
+  async flush(beacon = false) {
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = null;
+
+    if (beacon) {
+      const pending = this.queue.splice(0);
+      this.batches(pending).forEach(batch => this.beacon(batch));
+      return;
+    }
+    if (this.sending) return;
+
+    this.sending = true;
+    try {
+      while (this.queue.length > 0) {
+        // Taken off the queue while in flight, so a beacon sent meanwhile
+        // neither sends it again nor loses runs queued after it
+        const [batch] = this.batches(this.queue.slice(0, MAX_BATCH_SIZE));
+        this.queue.splice(0, batch.length);
+        const ok = await this.post(batch);
+        if (!ok) {
+          // Back at the head, to be retried later with the rest
+          this.queue.unshift(...batch);
+          this.trim();
+          break;
+        }
+      }
+    } finally {
+      this.sending = false;
+      if (this.queue.length > 0 && !this.timer) {
+        this.timer = setTimeout(() => void this.flush(), FLUSH_INTERVAL_MS);
+      }
+    }
+  }
+
+  // Split events into batches whose request body fits a beacon
+  private batches(events: ExecutionEvent[]) {
+    const batches: ExecutionEvent[][] = [];
+    let current: ExecutionEvent[] = [];
+    let size = 0;
+    for (const event of events) {
+      const bytes = byteLength(JSON.stringify(event));
+      if (current.length > 0 && (current.length >= MAX_BATCH_SIZE || size + bytes > MAX_BEACON_BYTES)) {
+        batches.push(current);
+        current = [];
+        size = 0;
+      }
+      current.push(event);
+      size += bytes;
+    }
+    if (current.length > 0) batches.push(current);
+    return batches;
+  }
+
+  private trim() {
+    if (this.queue.length > MAX_QUEUED) {
+      this.queue.splice(0, this.queue.length - MAX_QUEUED);
+    }
+  }
+
+  private body(batch: ExecutionEvent[]) {
+    return JSON.stringify({ executions: batch });
+  }
+
+  // Resolves false when the batch should be retried
+  private async post(batch: ExecutionEvent[]) {
+    const body = this.body(batch);
+    try {
+      const response = await fetch(BULK_ENDPOINT, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body,
+        keepalive: byteLength(body) <= MAX_BEACON_BYTES
+      });
+      // Client errors will not succeed on retry; drop the batch
+      return response.ok || (response.status >= 400 && response.status < 500);
+    } catch (error) {
+      console.warn('Failed to send code executions:', error);
+      return false;
+    }
+  }
+
+  private beacon(batch: ExecutionEvent[]) {
+    const body = this.body(batch);
+    const sent = typeof navigator.sendBeacon === 'function'
+      && navigator.sendBeacon(BULK_ENDPOINT, new Blob([body], { type: 'application/json' }));
+    if (!sent) {
+      fetch(BULK_ENDPOINT, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body,
+        keepalive: true
+      }).catch(() => undefined);
+    }
+  }
+
+  private listen() {
+    if (this.listening || typeof document === 'undefined') return;
+    this.listening = true;
+    const leave = () => void this.flush(true);
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') leave();
+    });
+    window.addEventListener('pagehide', leave);
+  }
+}
+
+let telemetry: ExecutionTelemetry | null = null;
+
+// Queue a code run for recording; never blocks and never throws
+export const trackCodeExecution = (event: ExecutionEvent) => {
+  telemetry ??= new ExecutionTelemetry();
+  telemetry.track(event);
+};
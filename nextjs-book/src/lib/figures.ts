@@ -0,0 +1,42 @@
+import type { FigureData } from '@/lib/pyodideWorkerPool';
+
+export interface RenderedFigure {
+  hash: string;
+  url: string;
+}
+
+const MIME_TYPES: Record<FigureData['format'], string> = {
+  png: 'image/png',
+  svg: 'image/svg+xml'
+};
+
+// Object URLs for recently shown figures, keyed by content hash, so
+// re-running an unchanged plot reuses the same blob. Oldest entries are
+// revoked once the cache is full.
+const MAX_CACHED_FIGURES = 64;
+const urls = new Map<string, string>();
+
+export const figureUrl = ({ format, hash, data }: FigureData) => {
+  const key = `${format}:${hash}`;
+  let url = urls.get(key);
+  if (url) {
+    // Refresh its position in the eviction order
+    urls.delete(key);
+  } else {
+    url = URL.createObjectURL(new Blob([data], { type: MIME_TYPES[format] }));
+  }
+  urls.set(key, url);
+
+  while (urls.size > MAX_CACHED_FIGURES) {
+    const [oldestKey, oldestUrl] = urls.entries().next().value as [string, string];
+    urls.delete(oldestKey);
+    URL.revokeObjectURL(oldestUrl);
+  }
+  return url;
+};
+
+// Append a figure unless an identical one is already listed
+export const addFigure = (figures: RenderedFigure[], figure: FigureData): RenderedFigure[] =>
+  figures.some(existing => existing.hash === figure.hash)
+    ? figures
+    : [...figures, { hash: figure.hash, url: figureUrl(figure) }];
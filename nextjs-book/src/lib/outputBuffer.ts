@@ -0,0 +1,115 @@
+'use client';
+
+import { useCallback, useEffect, useRef, useState } from 'react';
+
+// Roughly 1 MB of console text; anything older is dropped
+export const DEFAULT_OUTPUT_LIMIT = 1_000_000;
+
+// Keeps the most recent output up to a size limit (counted in characters).
+// Chunks are stored as they arrive and only joined when read, so appending
+// is cheap no matter how chatty the program is.
+export class OutputBuffer {
+  private chunks: string[] = [];
+  private head = 0;
+  private size = 0;
+  private dropped = 0;
+
+  constructor(private readonly limit = DEFAULT_OUTPUT_LIMIT) {}
+
+  append(text: string) {
+    if (!text) return;
+    this.chunks.push(text);
+    this.size += text.length;
+
+    while (this.size > this.limit) {
+      const excess = this.size - this.limit;
+      const oldest = this.chunks[this.head];
+      if (oldest.length <= excess) {
+        this.head++;
+        this.size -= oldest.length;
+        this.dropped += oldest.length;
+      } else {
+        this.chunks[this.head] = oldest.slice(excess);
+        this.size -= excess;
+        this.dropped += excess;
+      }
+    }
+
+    // Compact once the consumed prefix dominates the array
+    if (this.head > 1024 && this.head * 2 > this.chunks.length) {
+      this.chunks = this.chunks.slice(this.head);
+      this.head = 0;
+    }
+  }
+
+  get truncated() {
+    return this.dropped;
+  }
+
+  get length() {
+    return this.size;
+  }
+
+  clear() {
+    this.chunks = [];
+    this.head = 0;
+    this.size = 0;
+    this.dropped = 0;
+  }
+
+  toString() {
+    const text = this.chunks.slice(this.head).join('');
+    this.chunks = [text];
+    this.head = 0;
+    if (!this.dropped) return text;
+    return `… ${this.dropped.toLocaleString()} earlier characters truncated …\n${text}`;
+  }
+}
+
+// Console state that streams while a cell runs. Appends go to a bounded
+// buffer and React re-renders at most once per animation frame.
+export const useStreamingOutput = (limit = DEFAULT_OUTPUT_LIMIT) => {
+  const [output, setOutputState] = useState('');
+  const buffer = useRef(new OutputBuffer(limit));
+  const frame = useRef<number | null>(null);
+
+  const cancelFrame = () => {
+    if (frame.current !== null) cancelAnimationFrame(frame.current);
+    frame.current = null;
+  };
+
+  const append = useCallback((text: string) => {
+    buffer.current.append(text);
+    if (frame.current !== null) return;
+    frame.current = requestAnimationFrame(() => {
+      frame.current = null;
+      setOutputState(buffer.current.toString());
+    });
+  }, []);
+
+  // Replace the console contents outright (status messages, final errors)
+  const setOutput = useCallback((text: string) => {
+    cancelFrame();
+    buffer.current.clear();
+    buffer.current.append(text);
+    setOutputState(buffer.current.toString());
+  }, []);
+
+  // Render anything still waiting for a frame and return the full text
+  const flush = useCallback(() => {
+    cancelFrame();
+    const text = buffer.current.toString();
+    setOutputState(text);
+    return text;
+  }, []);
+
+  const reset = useCallback(() => {
+    cancelFrame();
+    buffer.current.clear();
+    setOutputState('');
+  }, []);
+
+  useEffect(() => cancelFrame, []);
+
+  return { output, append, setOutput, flush, reset };
+};
@@ -0,0 +1,40 @@
+import bundle from '../../pyodide-bundle.json';
+
+// One pinned Pyodide build for every editor, served from our own origin by
+// default (see scripts/fetch-pyodide.mjs). Setting
+// NEXT_PUBLIC_PYODIDE_INDEX_URL points the workers somewhere else instead.
+export const PYODIDE_VERSION: string = bundle.version;
+
+export const PYODIDE_INDEX_URL =
+  process.env.NEXT_PUBLIC_PYODIDE_INDEX_URL || `/pyodide/v${PYODIDE_VERSION}/`;
+
+const SELF_HOSTED = !process.env.NEXT_PUBLIC_PYODIDE_INDEX_URL;
+
+// Matches the lockfile names written by scripts/fetch-pyodide.mjs
+export const packageSetKey = (packages: string[]) =>
+  [...new Set(packages.map(name => name.toLowerCase()))].sort().join('+');
+
+let registration: Promise<ServiceWorkerRegistration | null> | null = null;
+
+// Caches the runtime and wheels so warm starts skip the network entirely
+export const registerPyodideServiceWorker = () => {
+  if (!registration) {
+    registration = SELF_HOSTED && typeof navigator !== 'undefined' && 'serviceWorker' in navigator
+      ? navigator.serviceWorker
+          .register(`/pyodide-sw.js?v=${PYODIDE_VERSION}`, { scope: '/' })
+          .catch((error) => {
+            console.warn('Failed to register Pyodide service worker:', error);
+            return null;
+          })
+      : Promise.resolve(null);
+  }
+  return registration;
+};
+
+// Fetch a chapter's whole wheel set ahead of time so it also works offline
+export const precachePyodidePackages = async (packages: string[]) => {
+  const registered = await registerPyodideServiceWorker();
+  const worker = registered?.active;
+  if (!worker || packages.length === 0) return;
+  worker.postMessage({ type: 'precache', lock: packageSetKey(packages) });
+};
@@ -0,0 +1,482 @@
+import { HEALTHDATA_BASE_URL, HEALTHDATA_MODULES } from '@/lib/pythonModules';
+import {
+  PYODIDE_INDEX_URL,
+  precachePyodidePackages,
+  registerPyodideServiceWorker
+} from '@/lib/pyodideServiceWorker';
+import type {
+  FigureData,
+  HotLine,
+  PackageStatus,
+  ProfileRequest,
+  PyodideWorkerRequest,
+  PyodideWorkerResponse,
+  RunProfile,
+  StartupTimings
+} from '@/workers/pyodide.worker';
+
+export type { FigureData, HotLine, ProfileRequest, RunProfile, StartupTimings };
+
+// Process-wide setup, run once per interpreter rather than once per cell.
+// It imports nothing heavy: pandas is configured when a cell first imports
+// it. Figures go through healthdata.figures, which matplotlib picks up from
+// MPLBACKEND; the DOM backend Pyodide defaults to cannot draw from inside
+// a worker.
+const SETUP_CODE = `
+import os, warnings
+from healthdata.lazy import when_imported
+os.environ["MPLBACKEND"] = "module://healthdata.figures"
+warnings.filterwarnings("ignore")
+
+def _pandas_display(pd):
+    pd.set_option("display.width", 100)
+    pd.set_option("display.max_colwidth", 80)
+
+when_imported("pandas", _pandas_display)
+del _pandas_display, when_imported
+`;
+
+const SIGINT = 2;
+
+// Execution keys a worker takes before the pool starts another one. Each
+// worker is a whole interpreter, so sections share one until it fills up.
+const KEYS_PER_WORKER = 8;
+
+// How long an interrupted run may take to unwind before its worker is killed
+const INTERRUPT_GRACE_MS = 2000;
+
+export const DEFAULT_RUN_TIMEOUT_MS = 30_000;
+
+export class PythonTimeoutError extends Error {
+  constructor(timeoutMs: number) {
+    super(`Execution timed out after ${Math.round(timeoutMs / 1000)}s`);
+    this.name = 'PythonTimeoutError';
+  }
+}
+
+export class PythonCancelledError extends Error {
+  constructor() {
+    super('Execution cancelled');
+    this.name = 'PythonCancelledError';
+  }
+}
+
+interface PoolOptions {
+  maxWorkers?: number;
+  minWorkers?: number;
+  idleTimeoutMs?: number;
+  // Packages cells may import. They are prefetched once an interpreter is
+  // up and installed before the first cell that imports them.
+  packages?: string[];
+  onPackageStatus?: (name: string, status: PackageStatus, error?: string) => void;
+  onDownloadProgress?: (loadedBytes: number, totalBytes: number) => void;
+  onStartup?: (timings: StartupTimings) => void;
+}
+
+export interface RunOptions {
+  onStdout?: (text: string) => void;
+  onStderr?: (text: string) => void;
+  onFigure?: (figure: FigureData) => void;
+  // Called before the run settles, for successful and failed runs alike
+  onProfile?: (profile: RunProfile) => void;
+  // Answers input(); null raises EOFError in the cell. Defaults to prompt().
+  onInput?: (prompt: string) => string | null;
+  profile?: ProfileRequest; // opt in to tracemalloc and line timings
+  timeoutMs?: number; // 0 disables the timeout; installing packages does not count
+  signal?: AbortSignal;
+}
+
+interface PendingRun {
+  options: RunOptions;
+  running: boolean; // the worker has reported 'started'
+  started: () => void;
+  resolve: (value?: string) => void;
+  reject: (error: Error) => void;
+}
+
+interface PooledWorker {
+  worker: Worker;
+  ready: Promise<void>;
+  namespaces: Set<string>;
+  pending: Map<number, PendingRun>;
+  // Runs cancelled before they started; the worker still answers each one
+  cancelled: Set<number>;
+  interruptBuffer: Uint8Array | null;
+  stdinBuffer: SharedArrayBuffer | null;
+  lastUsed: number;
+}
+
+// Interrupting a running cell needs memory shared with the worker, which
+// browsers only allow on cross-origin isolated pages. Without it a stuck
+// run can still be stopped, but only by terminating its worker.
+const createInterruptBuffer = () =>
+  typeof SharedArrayBuffer !== 'undefined' && globalThis.crossOriginIsolated
+    ? new Uint8Array(new SharedArrayBuffer(1))
+    : null;
+
+// input() blocks the worker until the page answers, which also needs
+// shared memory: a status word, the answer's length, then its UTF-8 bytes
+const STDIN_BYTES = 64 * 1024;
+
+const createStdinBuffer = () =>
+  typeof SharedArrayBuffer !== 'undefined' && globalThis.crossOriginIsolated
+    ? new SharedArrayBuffer(8 + STDIN_BYTES)
+    : null;
+
+// A bounded set of warm Pyodide interpreters, each living in a Web Worker.
+// Every execution key (a shared chapter context or an isolated section)
+// is pinned to one worker and gets its own globals dict there, so
+// isolation costs a dict instead of a whole runtime.
+export class PyodideWorkerPool {
+  private workers: PooledWorker[] = [];
+  private assignments = new Map<string, PooledWorker>();
+  // Everything that retains a key, each with its reset listener
+  private holders = new Map<string, Set<() => void>>();
+  private nextRunId = 0;
+  private evictionTimer: ReturnType<typeof setInterval> | null = null;
+  private readonly maxWorkers: number;
+  private readonly minWorkers: number;
+  private readonly idleTimeoutMs: number;
+  private readonly packages: string[];
+  private readonly onPackageStatus?: PoolOptions['onPackageStatus'];
+  private readonly onDownloadProgress?: PoolOptions['onDownloadProgress'];
+  private readonly onStartup?: PoolOptions['onStartup'];
+
+  constructor(options: PoolOptions = {}) {
+    const cores = typeof navigator !== 'undefined' ? navigator.hardwareConcurrency || 2 : 2;
+    this.maxWorkers = options.maxWorkers ?? Math.max(1, Math.min(4, cores - 1));
+    this.minWorkers = options.minWorkers ?? 1;
+    this.idleTimeoutMs = options.idleTimeoutMs ?? 5 * 60 * 1000;
+    this.packages = options.packages ?? ['pandas', 'numpy', 'matplotlib'];
+    this.onPackageStatus = options.onPackageStatus;
+    this.onDownloadProgress = options.onDownloadProgress;
+    this.onStartup = options.onStartup;
+    registerPyodideServiceWorker();
+  }
+
+  // Start interpreters ahead of the first run
+  warm(count = this.minWorkers): Promise<void> {
+    while (this.workers.length < Math.min(count, this.maxWorkers)) {
+      this.spawn();
+    }
+    return Promise.all(this.workers.map(w => w.ready)).then(() => undefined);
+  }
+
+  // Resolves with str() of the last expression's value, if any
+  async run(key: string, code: string, options: RunOptions = {}): Promise<string | undefined> {
+    if (options.signal?.aborted) throw new PythonCancelledError();
+
+    const pooled = this.assign(key);
+    await pooled.ready;
+
+    const id = this.nextRunId++;
+    const timeoutMs = options.timeoutMs ?? DEFAULT_RUN_TIMEOUT_MS;
+    pooled.lastUsed = Date.now();
+
+    return new Promise<string | undefined>((resolve, reject) => {
+      let settled = false;
+      let timer: ReturnType<typeof setTimeout> | null = null;
+
+      const cleanup = () => {
+        settled = true;
+        if (timer) clearTimeout(timer);
+        options.signal?.removeEventListener('abort', onAbort);
+      };
+
+      // A run still queued behind other cells is only taken off the queue;
+      // the cell running now may belong to another key and must not be hit
+      const stop = (error: Error) => {
+        if (settled) return;
+        cleanup();
+        reject(error);
+        if (pooled.pending.get(id)?.running) {
+          this.interrupt(pooled, id);
+        } else {
+          pooled.pending.delete(id);
+          pooled.cancelled.add(id);
+          this.post(pooled, { type: 'cancel', id });
+        }
+      };
+
+      const onAbort = () => stop(new PythonCancelledError());
+
+      pooled.pending.set(id, {
+        options,
+        running: false,
+        // Also called after input(): time spent typing does not count
+        started: () => {
+          if (settled || timeoutMs <= 0) return;
+          if (timer) clearTimeout(timer);
+          timer = setTimeout(() => stop(new PythonTimeoutError(timeoutMs)), timeoutMs);
+        },
+        resolve: (value) => {
+          if (settled) return;
+          cleanup();
+          resolve(value);
+        },
+        reject: (error) => {
+          if (settled) return;
+          cleanup();
+          reject(error);
+        }
+      });
+
+      options.signal?.addEventListener('abort', onAbort);
+      this.post(pooled, { type: 'run', id, namespace: key, code, profile: options.profile });
+    });
+  }
+
+  // Keep an execution key's Python state while something shows its cells.
+  // onReset is called if that state is lost anyway, when a stuck run
+  // forces its worker to be killed. Returns the matching release, e.g. as
+  // a React effect cleanup.
+  retain(key: string, onReset?: () => void): () => void {
+    const holder = () => onReset?.();
+    const holders = this.holders.get(key) ?? new Set();
+    holders.add(holder);
+    this.holders.set(key, holders);
+    this.pin(key);
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.release(key, holder);
+    };
+  }
+
+  // Forget the Python state held for an execution key once its last
+  // holder lets go of it
+  private release(key: string, holder: () => void) {
+    const holders = this.holders.get(key);
+    holders?.delete(holder);
+    if (holders?.size) return;
+    this.holders.delete(key);
+
+    const pooled = this.assignments.get(key);
+    if (!pooled) return;
+    this.post(pooled, { type: 'dropNamespace', namespace: key });
+    pooled.namespaces.delete(key);
+    this.assignments.delete(key);
+  }
+
+  dispose() {
+    if (this.evictionTimer) clearInterval(this.evictionTimer);
+    this.evictionTimer = null;
+    this.holders.clear();
+    this.workers.forEach(w => this.terminate(w));
+  }
+
+  // A key that already has a worker always runs there, however busy it is;
+  // only a key with no namespace anywhere yet can start a new worker
+  private assign(key: string): PooledWorker {
+    const owner = this.assignments.get(key);
+    if (owner) return owner;
+
+    // Least loaded first: fewest queued runs, then fewest keys. Grow the
+    // pool only when that worker is busy or already holds its share of keys.
+    const least = this.workers.reduce<PooledWorker | null>((best, w) =>
+      !best
+      || w.pending.size < best.pending.size
+      || (w.pending.size === best.pending.size && w.namespaces.size < best.namespaces.size)
+        ? w
+        : best, null);
+    const full = !least || least.pending.size > 0 || least.namespaces.size >= KEYS_PER_WORKER;
+    const pooled = full && this.workers.length < this.maxWorkers ? this.spawn() : least!;
+
+    pooled.namespaces.add(key);
+    this.assignments.set(key, pooled);
+    return pooled;
+  }
+
+  // Give a retained key its worker up front, on the running worker with the
+  // fewest keys, so its cells never race each other to pick one. Nothing is
+  // spawned here; a key that finds no room is assigned on its first run.
+  private pin(key: string) {
+    if (this.assignments.has(key)) return;
+    const roomiest = this.workers
+      .filter(w => w.namespaces.size < KEYS_PER_WORKER)
+      .sort((a, b) => a.namespaces.size - b.namespaces.size)[0];
+    if (!roomiest) return;
+    roomiest.namespaces.add(key);
+    this.assignments.set(key, roomiest);
+  }
+
+  // Ask Python to raise KeyboardInterrupt in a started run; kill the
+  // worker if it won't stop
+  private interrupt(pooled: PooledWorker, id: number) {
+    if (!pooled.interruptBuffer) {
+      this.terminate(pooled);
+      return;
+    }
+    pooled.interruptBuffer[0] = SIGINT;
+    setTimeout(() => {
+      if (pooled.pending.has(id) || pooled.cancelled.has(id)) this.terminate(pooled);
+    }, INTERRUPT_GRACE_MS);
+  }
+
+  private spawn(): PooledWorker {
+    const worker = new Worker(new URL('../workers/pyodide.worker.ts', import.meta.url));
+    const pooled: PooledWorker = {
+      worker,
+      ready: Promise.resolve(),
+      namespaces: new Set(),
+      pending: new Map(),
+      cancelled: new Set(),
+      interruptBuffer: createInterruptBuffer(),
+      stdinBuffer: createStdinBuffer(),
+      lastUsed: Date.now()
+    };
+
+    pooled.ready = new Promise<void>((resolve, reject) => {
+      worker.onmessage = (event: MessageEvent<PyodideWorkerResponse>) => {
+        const message = event.data;
+        if (message.type === 'ready') {
+          const { runtime, modules, setup, total } = message.timings;
+          console.info(
+            `Python worker ready in ${total}ms ` +
+            `(runtime ${runtime}ms, modules ${modules}ms, setup ${setup}ms)`
+          );
+          this.onStartup?.(message.timings);
+          resolve();
+        } else if (message.type === 'initError') {
+          // Nothing has run there yet, so no state is lost
+          pooled.namespaces.forEach(key => this.assignments.delete(key));
+          pooled.namespaces.clear();
+          this.terminate(pooled);
+          reject(new Error(message.error));
+        } else if (message.type === 'package') {
+          this.onPackageStatus?.(message.name, message.status, message.error);
+        } else if (message.type === 'progress') {
+          this.onDownloadProgress?.(message.loaded, message.total);
+        } else {
+          this.handleMessage(pooled, message);
+        }
+      };
+    });
+
+    // Once the interpreter is up, its wheels are cached by the service
+    // worker already; precaching fills in the rest of the locked set
+    pooled.ready.then(() => precachePyodidePackages(this.packages)).catch(() => undefined);
+
+    this.workers.push(pooled);
+    this.post(pooled, {
+      type: 'init',
+      // Workers resolve relative URLs against their own script, not the page
+      indexURL: new URL(PYODIDE_INDEX_URL, self.location.origin).href,
+      packages: this.packages,
+      setupCode: SETUP_CODE,
+      modules: { baseUrl: HEALTHDATA_BASE_URL, files: HEALTHDATA_MODULES },
+      interruptBuffer: pooled.interruptBuffer ?? undefined,
+      stdinBuffer: pooled.stdinBuffer ?? undefined
+    });
+    this.scheduleEviction();
+    return pooled;
+  }
+
+  private handleMessage(pooled: PooledWorker, message: PyodideWorkerResponse) {
+    if (message.type === 'input') {
+      this.answerInput(pooled, message.id, message.prompt);
+      return;
+    }
+    if (message.type !== 'started' && message.type !== 'stdout' && message.type !== 'stderr'
+      && message.type !== 'figure' && message.type !== 'result') return;
+    if (pooled.cancelled.has(message.id)) {
+      // The cancel crossed the run's start; stop it like any started run
+      if (message.type === 'started') this.interrupt(pooled, message.id);
+      if (message.type === 'result') pooled.cancelled.delete(message.id);
+      return;
+    }
+    const run = pooled.pending.get(message.id);
+    if (!run) return;
+
+    if (message.type === 'started') {
+      run.running = true;
+      run.started();
+    } else if (message.type === 'stdout') {
+      run.options.onStdout?.(message.text);
+    } else if (message.type === 'stderr') {
+      run.options.onStderr?.(message.text);
+    } else if (message.type === 'figure') {
+      const { format, hash, data } = message;
+      run.options.onFigure?.({ format, hash, data });
+    } else {
+      pooled.pending.delete(message.id);
+      pooled.lastUsed = Date.now();
+      run.options.onProfile?.(message.profile);
+      if (message.ok) {
+        run.resolve(message.value);
+      } else {
+        run.reject(new Error(message.error));
+      }
+    }
+  }
+
+  // Hand the answer to a worker blocked in input() and wake it up
+  private answerInput(pooled: PooledWorker, id: number, prompt: string) {
+    if (!pooled.stdinBuffer) return;
+    const run = pooled.pending.get(id);
+    let answer: string | null = null;
+    if (run) {
+      answer = run.options.onInput
+        ? run.options.onInput(prompt)
+        : (typeof window !== 'undefined' ? window.prompt(prompt) : null);
+    }
+
+    const header = new Int32Array(pooled.stdinBuffer, 0, 2);
+    if (answer === null) {
+      header[1] = -1;
+    } else {
+      const bytes = new TextEncoder().encode(answer).subarray(0, STDIN_BYTES);
+      new Uint8Array(pooled.stdinBuffer, 8).set(bytes);
+      header[1] = bytes.length;
+    }
+    Atomics.store(header, 0, 1);
+    Atomics.notify(header, 0);
+    run?.started();
+  }
+
+  private post(pooled: PooledWorker, message: PyodideWorkerRequest) {
+    pooled.worker.postMessage(message);
+  }
+
+  // Every namespace on the worker goes with it; whoever still retains one
+  // of them is told its state is gone
+  private terminate(pooled: PooledWorker) {
+    pooled.worker.terminate();
+    pooled.pending.forEach(run => run.reject(new Error('Python worker was terminated')));
+    pooled.pending.clear();
+    pooled.cancelled.clear();
+    this.workers = this.workers.filter(w => w !== pooled);
+    pooled.namespaces.forEach(key => {
+      this.assignments.delete(key);
+      this.holders.get(key)?.forEach(onReset => onReset());
+    });
+  }
+
+  private scheduleEviction() {
+    if (this.evictionTimer) return;
+    this.evictionTimer = setInterval(() => {
+      const now = Date.now();
+      // A worker holding state for a cell on screen is never idle
+      const idle = this.workers.filter(w =>
+        w.pending.size === 0
+        && now - w.lastUsed > this.idleTimeoutMs
+        && ![...w.namespaces].some(key => this.holders.has(key))
+      );
+      // Keep the most recently used workers warm
+      idle
+        .sort((a, b) => a.lastUsed - b.lastUsed)
+        .slice(0, Math.max(0, this.workers.length - this.minWorkers))
+        .forEach(w => this.terminate(w));
+    }, Math.max(1000, this.idleTimeoutMs / 2));
+  }
+}
+
+let sharedPool: PyodideWorkerPool | null = null;
+
+export const getPyodideWorkerPool = () => {
+  if (!sharedPool) {
+    sharedPool = new PyodideWorkerPool();
+  }
+  return sharedPool;
+};
@@ -0,0 +1,25 @@
+// Shared Python helpers served from public/python/healthdata.
+// Keep this list in sync with the files in that folder; the Pyodide
+// workers copy them into their filesystem so lesson code can
+// `from healthdata import ...` exactly like it does under CPython.
+export const HEALTHDATA_MODULES = [
+  '__init__.py',
+  'cohort.py',
+  'ingest.py',
+  'cache.py',
+  'flatten.py',
+  'api.py',
+  'vitals.py',
+  'figures.py',
+  'plotting.py',
+  'summary.py',
+  'online.py',
+  'query.py',
+  'ranking.py',
+  'impute.py',
+  'dtypes.py',
+  'profiler.py',
+  'lazy.py'
+];
+
+export const HEALTHDATA_BASE_URL = '/python/healthdata';
@@ -1,8 +1,15 @@
 'use client';
 
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { createClient } from '@/lib/supabase-client';
-import type { PyodideInstance } from '@/types';
+import {
+  PyodideWorkerPool,
+  PythonTimeoutError,
+  type RunOptions,
+  type RunProfile,
+  type StartupTimings
+} from '@/lib/pyodideWorkerPool';
+import { OutputBuffer } from '@/lib/outputBuffer';
 
 interface PyodideConfig {
   chapterId?: string;
@@ -16,21 +23,33 @@ interface PyodideLoadingState {
   loadingPackages: string[];
   loadedPackages: string[];
   failedPackages: { name: string; error: string }[];
-  totalEstimatedTime: number;
-  currentProgress: number;
+  downloadedBytes: number;
+  totalBytes: number;
+  startupTimings?: StartupTimings;
+}
+
+export interface RunPythonResult {
+  output: string;
+  error?: string;
+  status: 'success' | 'error' | 'timeout';
+  profile?: RunProfile; // missing when the run was cancelled or timed out
 }
 
 export const usePyodide = (config?: PyodideConfig) => {
-  const [pyodide, setPyodide] = useState<PyodideInstance | null>(null);
+  const [pool, setPool] = useState<PyodideWorkerPool | null>(null);
   const [loadingState, setLoadingState] = useState<PyodideLoadingState>({
     isLoading: true,
     loadingPackages: [],
     loadedPackages: [],
     failedPackages: [],
-    totalEstimatedTime: 0,
-    currentProgress: 0
+    downloadedBytes: 0,
+    totalBytes: 0
   });
   const [error, setError] = useState<string | null>(null);
+  const namespace = useRef<string>(`editor:${crypto.randomUUID()}`);
+  const runController = useRef<AbortController | null>(null);
+  const configRef = useRef(config);
+  configRef.current = config;
   const supabase = createClient();
 
   // Load chapter packages from database
@@ -51,98 +70,14 @@ export const usePyodide = (config?: PyodideConfig) => {
     }
   }, [supabase]);
 
-  // Load packages dynamically
-  const loadPackages = useCallback(async (
-    pyodideInstance: PyodideInstance, 
-    packages: string[]
-  ) => {
-    const startTime = Date.now();
-    
-    setLoadingState(prev => ({
-      ...prev,
-      loadingPackages: [...packages],
-      totalEstimatedTime: packages.reduce((sum, pkg) => {
-        // Estimate load time based on package
-        const estimateMap: { [key: string]: number } = {
-          'pandas': 3000, 'matplotlib': 3000, 'numpy': 2000, 'scipy': 4000,
-          'scikit-learn': 5000, 'plotly': 2000, 'seaborn': 2000
-        };
-        return sum + (estimateMap[pkg] || 1000);
-      }, 0)
-    }));
-
-    for (const packageName of packages) {
-      try {
-        config?.onPackageLoadStart?.(packageName);
-        
-        setLoadingState(prev => ({
-          ...prev,
-          loadingPackages: prev.loadingPackages.filter(name => name !== packageName),
-          currentProgress: Date.now() - startTime
-        }));
-
-        // Try to load from Pyodide first, then fall back to micropip
-        try {
-          await pyodideInstance.loadPackage(packageName);
-        } catch {
-          // If Pyodide package loading fails, try micropip
-          await pyodideInstance.loadPackage('micropip');
-          const micropip = pyodideInstance.pyimport('micropip');
-          await micropip.install(packageName);
-        }
-
-        setLoadingState(prev => ({
-          ...prev,
-          loadedPackages: [...prev.loadedPackages, packageName]
-        }));
-
-        config?.onPackageLoadComplete?.(packageName, true);
-
-      } catch (err) {
-        const errorMessage = err instanceof Error ? err.message : 'Unknown error';
-        
-        setLoadingState(prev => ({
-          ...prev,
-          loadingPackages: prev.loadingPackages.filter(name => name !== packageName),
-          failedPackages: [...prev.failedPackages, { name: packageName, error: errorMessage }]
-        }));
-
-        config?.onPackageLoadComplete?.(packageName, false, errorMessage);
-
-        console.warn(`Failed to load package ${packageName}:`, errorMessage);
-      }
-    }
-  }, [config, supabase]);
-
   useEffect(() => {
+    let cancelled = false;
+    let workerPool: PyodideWorkerPool | null = null;
+
     const loadPyodide = async () => {
       try {
         setLoadingState(prev => ({ ...prev, isLoading: true }));
 
-        // Load Pyodide script dynamically
-        let pyodideInstance: PyodideInstance;
-        
-        if (!window.loadPyodide) {
-          const script = document.createElement('script');
-          script.src = 'https://cdn.jsdelivr.net/pyodide/v0.26.4/full/pyodide.js';
-          
-          await new Promise<void>((resolve, reject) => {
-            script.onload = () => resolve();
-            script.onerror = () => reject(new Error('Failed to load Pyodide'));
-            document.head.appendChild(script);
-          });
-        }
-
-        pyodideInstance = await window.loadPyodide();
-        
-        // Always load micropip
-        await pyodideInstance.loadPackage('micropip');
-        
-        // Replace input() with JS prompt()
-        pyodideInstance.globals.set('input', (promptText: string) => 
-          prompt(promptText) || ''
-        );
-
         // Determine which packages to load
         let packagesToLoad: string[] = [];
 
@@ -157,84 +92,127 @@ export const usePyodide = (config?: PyodideConfig) => {
           packagesToLoad = ['numpy', 'pandas', 'matplotlib'];
         }
 
-        // Load packages
-        if (packagesToLoad.length > 0) {
-          await loadPackages(pyodideInstance, packagesToLoad);
-        }
-
-        setPyodide(pyodideInstance);
+        // The interpreter and its packages load inside a dedicated worker
+        workerPool = new PyodideWorkerPool({
+          maxWorkers: 1,
+          packages: packagesToLoad,
+          onPackageStatus: (packageName, status, packageError) => {
+            if (cancelled) return;
+            if (status === 'start') {
+              // Packages install when a cell first imports them
+              setLoadingState(prev => ({
+                ...prev,
+                loadingPackages: [...prev.loadingPackages, packageName]
+              }));
+              configRef.current?.onPackageLoadStart?.(packageName);
+            } else if (status === 'loaded') {
+              setLoadingState(prev => ({
+                ...prev,
+                loadingPackages: prev.loadingPackages.filter(name => name !== packageName),
+                loadedPackages: [...prev.loadedPackages, packageName]
+              }));
+              configRef.current?.onPackageLoadComplete?.(packageName, true);
+            } else {
+              const errorMessage = packageError || 'Unknown error';
+              setLoadingState(prev => ({
+                ...prev,
+                loadingPackages: prev.loadingPackages.filter(name => name !== packageName),
+                failedPackages: [...prev.failedPackages, { name: packageName, error: errorMessage }]
+              }));
+              configRef.current?.onPackageLoadComplete?.(packageName, false, errorMessage);
+              console.warn(`Failed to load package ${packageName}:`, errorMessage);
+            }
+          },
+          onDownloadProgress: (downloadedBytes, totalBytes) => {
+            if (cancelled) return;
+            setLoadingState(prev => ({ ...prev, downloadedBytes, totalBytes }));
+          },
+          onStartup: (timings) => {
+            if (cancelled) return;
+            setLoadingState(prev => ({ ...prev, startupTimings: timings }));
+          }
+        });
+
+        await workerPool.warm();
+        if (cancelled) return;
+
+        setPool(workerPool);
         setLoadingState(prev => ({
           ...prev,
           isLoading: false,
-          loadingPackages: [],
-          currentProgress: prev.totalEstimatedTime
+          loadingPackages: []
         }));
 
       } catch (err) {
+        if (cancelled) return;
         setError(err instanceof Error ? err.message : 'Unknown error');
         setLoadingState(prev => ({ ...prev, isLoading: false }));
       }
     };
 
     loadPyodide();
-  }, [config?.chapterId, loadChapterPackages, loadPackages]);
 
-  const runPython = useCallback(async (code: string): Promise<{ output: string; error?: string }> => {
-    if (!pyodide) {
-      return { output: '', error: 'Pyodide not loaded' };
+    return () => {
+      cancelled = true;
+      workerPool?.dispose();
+    };
+  }, [config?.chapterId, loadChapterPackages]);
+
+  // onOutput receives stdout/stderr as it is produced; the returned output
+  // holds the same text, capped like the editor console
+  const runPython = useCallback(async (
+    code: string,
+    { onOutput, ...options }: Pick<RunOptions, 'timeoutMs' | 'onFigure' | 'profile'> & { onOutput?: (text: string) => void } = {}
+  ): Promise<RunPythonResult> => {
+    if (!pool) {
+      return { output: '', error: 'Pyodide not loaded', status: 'error' };
     }
 
+    const output = new OutputBuffer();
+    const write = (text: string) => {
+      output.append(text);
+      onOutput?.(text);
+    };
+    const controller = new AbortController();
+    runController.current = controller;
+    let profile: RunProfile | undefined;
+
     try {
-      // Setup output capture
-      await pyodide.runPython(`
-        import sys
-        from io import StringIO
-
-        class OutputCapture:
-            def __init__(self):
-                self.output = StringIO()
-                self.original_stdout = sys.stdout
-
-            def capture(self):
-                sys.stdout = self.output
-
-            def release(self):
-                sys.stdout = self.original_stdout
-                content = self.output.getvalue()
-                self.output = StringIO()
-                return content
-
-        _output_capture = OutputCapture()
-        _output_capture.capture()
-      `);
-
-      // Execute user code
-      const result = await pyodide.runPythonAsync(code);
-
-      // Get captured output
-      const output = pyodide.runPython(`
-        _output_capture.release()
-      `) as string;
-
-      let finalOutput = output || '';
-      if (result !== undefined && result !== null) {
-        finalOutput += (finalOutput ? '\n' : '') + String(result);
+      const result = await pool.run(namespace.current, code, {
+        ...options,
+        signal: controller.signal,
+        onStdout: write,
+        onStderr: write,
+        onProfile: (measured) => { profile = measured; }
+      });
+
+      if (result !== undefined) {
+        write((output.length ? '\n' : '') + result);
       }
 
-      return { output: finalOutput };
+      return { output: output.toString(), status: 'success', profile };
     } catch (err) {
-      return { 
-        output: '', 
-        error: err instanceof Error ? err.message : 'Execution error' 
+      return {
+        output: output.toString(),
+        error: err instanceof Error ? err.message : 'Execution error',
+        status: err instanceof PythonTimeoutError ? 'timeout' : 'error',
+        profile
       };
+    } finally {
+      if (runController.current === controller) runController.current = null;
     }
-  }, [pyodide]);
+  }, [pool]);
+
+  // Stop the cell that is currently running, if any
+  const interrupt = useCallback(() => {
+    runController.current?.abort();
+  }, []);
 
   return {
-    pyodide,
     isLoading: loadingState.isLoading,
     loadingState,
     error,
-    runPython
+    runPython,
+    interrupt
   };
-};
\ No newline at end of file
+};
@@ -0,0 +1,578 @@
+/// <reference lib="webworker" />
+
+// Runs one pre-warmed Pyodide interpreter off the main thread.
+// Cells never get their own runtime: each execution key gets its own
+// Python globals dict inside this interpreter instead.
+
+export type PackageStatus = 'start' | 'loaded' | 'failed';
+
+// Milliseconds spent in each startup phase of one interpreter. Packages
+// are not part of startup: each is installed before the first cell that
+// imports it.
+export interface StartupTimings {
+  runtime: number;
+  modules: number;
+  setup: number;
+  total: number;
+}
+
+// One rendered matplotlib figure, identified by a hash of its bytes
+export interface FigureData {
+  format: 'png' | 'svg';
+  hash: string;
+  data: Uint8Array;
+}
+
+// One cell line from the optional line profile
+export interface HotLine {
+  line: number;
+  ms: number;
+  hits: number;
+  source: string;
+}
+
+// Measurements for one run. Wall time and heap size are always reported;
+// the Python-side numbers only when the run asked to be profiled.
+export interface RunProfile {
+  wallMs: number;
+  heapBytes?: number; // size of the Wasm heap after the run (it never shrinks)
+  heapGrowthBytes?: number;
+  pythonPeakBytes?: number; // tracemalloc peak during the run
+  hotLines?: HotLine[];
+}
+
+// hotLines > 0 also times the cell line by line and reports the slowest
+export interface ProfileRequest {
+  hotLines?: number;
+}
+
+export type PyodideWorkerRequest =
+  | {
+      type: 'init';
+      indexURL: string;
+      packages: string[];
+      setupCode: string;
+      modules: { baseUrl: string; files: string[] };
+      interruptBuffer?: Uint8Array;
+      stdinBuffer?: SharedArrayBuffer;
+    }
+  | { type: 'run'; id: number; namespace: string; code: string; profile?: ProfileRequest }
+  // Skip a queued run; a run that has already started is interrupted instead
+  | { type: 'cancel'; id: number }
+  | { type: 'dropNamespace'; namespace: string };
+
+export type PyodideWorkerResponse =
+  | { type: 'ready'; timings: StartupTimings }
+  | { type: 'initError'; error: string }
+  | { type: 'package'; name: string; status: PackageStatus; error?: string }
+  | { type: 'progress'; loaded: number; total: number }
+  // The cell's packages are installed and the code itself starts running
+  | { type: 'started'; id: number }
+  | { type: 'stdout' | 'stderr'; id: number; text: string }
+  // The cell called input(); the worker blocks until stdinBuffer is answered
+  | { type: 'input'; id: number; prompt: string }
+  | ({ type: 'figure'; id: number } & FigureData)
+  | { type: 'result'; id: number; ok: true; value?: string; profile: RunProfile }
+  | { type: 'result'; id: number; ok: false; error: string; profile: RunProfile };
+
+interface PyProxy {
+  set: (key: string, value: unknown) => void;
+  copy: () => PyProxy;
+  destroy: () => void;
+}
+
+// Python objects that expose the buffer protocol (the figure bytes)
+interface PyBufferProxy {
+  getBuffer: (type?: string) => { data: Uint8Array; release: () => void };
+}
+
+interface WorkerPyodide {
+  loadPackage: (
+    packages: string | string[],
+    options?: { messageCallback?: (message: string) => void; errorCallback?: (message: string) => void }
+  ) => Promise<void>;
+  loadedPackages: Record<string, string>;
+  runPythonAsync: (code: string, options?: { globals?: PyProxy }) => Promise<unknown>;
+  setStdout: (options: { batched: (text: string) => void }) => void;
+  setStderr: (options: { batched: (text: string) => void }) => void;
+  setInterruptBuffer: (buffer: Uint8Array) => void;
+  pyimport: (name: string) => any;
+  globals: { get: (name: string) => any; set: (name: string, value: unknown) => void };
+  _module?: { HEAPU8?: Uint8Array };
+  FS: {
+    mkdirTree: (path: string) => void;
+    writeFile: (path: string, data: string) => void;
+  };
+}
+
+declare const self: DedicatedWorkerGlobalScope & {
+  loadPyodide: (options: { indexURL: string }) => Promise<WorkerPyodide>;
+};
+
+// Names every namespace starts with, run once into a template at startup.
+// pd, np and plt are lazy proxies: the first cell that touches one pays
+// for its import, and cells that never do (chapter 1) never load pandas.
+const NAMESPACE_PRELUDE = `
+import sys, warnings
+from healthdata.lazy import install_prelude
+install_prelude(globals())
+del install_prelude
+`;
+
+// Replaces input() for every namespace. Without shared memory the worker
+// cannot wait for an answer, so input() says so instead of hanging.
+const INPUT_SHIM = `
+import builtins
+
+def _make_input(read):
+    def input(prompt=""):
+        if read is None:
+            raise RuntimeError(
+                "input() is not supported on this page: a running cell cannot "
+                "wait for typing here. Assign the value in your code instead.")
+        line = read(str(prompt))
+        if line is None:
+            raise EOFError("input() was cancelled")
+        return line
+    return input
+
+builtins.input = _make_input(_read_input)
+del builtins, _make_input, _read_input
+`;
+
+// Minimum gap between download progress messages
+const PROGRESS_INTERVAL_MS = 100;
+
+// Output is posted in chunks, not line by line: whichever limit is hit first.
+// A timer flushes text left waiting once the cell yields (awaits, finishes);
+// time is also checked on each write, because a busy cell blocks the timer.
+const OUTPUT_CHUNK_CHARS = 16_384;
+const OUTPUT_FLUSH_MS = 50;
+
+let pyodide: WorkerPyodide | null = null;
+let template: PyProxy | null = null;
+let figures: { reset: () => void; set_sink: (sink: typeof sendFigure) => void } | null = null;
+let lazy: {
+  find_imports: (code: string) => { toJs: () => string[]; destroy: () => void };
+  when_imported: (name: string, hook: () => void) => void;
+} | null = null;
+let profiler: { start: (...args: any[]) => void; stop: () => any } | null = null;
+let currentRunId = -1;
+let queue: Promise<void> = Promise.resolve();
+let interruptBuffer: Uint8Array | null = null;
+let stdinBuffer: SharedArrayBuffer | null = null;
+const cancelledRuns = new Set<number>();
+const namespaces = new Map<string, PyProxy>();
+
+// Where packages come from, and the packages this content may install
+// from PyPI when the distribution does not ship them
+let packageIndexURL = '';
+let allowedPackages: string[] = [];
+let lockPromise: Promise<Record<string, LockEntry>> | null = null;
+let importMap: Map<string, string> | null = null;
+
+let pendingStream: 'stdout' | 'stderr' = 'stdout';
+let pendingOutput: string[] = [];
+let pendingSize = 0;
+let lastFlush = 0;
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+
+const post = (message: PyodideWorkerResponse, transfer: Transferable[] = []) =>
+  self.postMessage(message, transfer);
+
+const errorMessage = (err: unknown) => err instanceof Error ? err.message : String(err);
+
+const flushOutput = () => {
+  if (flushTimer !== null) clearTimeout(flushTimer);
+  flushTimer = null;
+  lastFlush = performance.now();
+  if (pendingSize === 0) return;
+  post({ type: pendingStream, id: currentRunId, text: pendingOutput.join('') });
+  pendingOutput = [];
+  pendingSize = 0;
+};
+
+// Called from healthdata.figures.show(). The bytes are read through the
+// buffer proxy and copied once out of the Wasm heap; that copy is then
+// transferred to the main thread rather than cloned.
+const sendFigure = (format: FigureData['format'], hash: string, data: PyBufferProxy) => {
+  flushOutput(); // keep figures in order with the text printed around them
+  const buffer = data.getBuffer('u8');
+  try {
+    const bytes = buffer.data.slice();
+    post({ type: 'figure', id: currentRunId, format, hash, data: bytes }, [bytes.buffer]);
+  } finally {
+    buffer.release();
+  }
+};
+
+const writeOutput = (stream: 'stdout' | 'stderr', text: string) => {
+  if (stream !== pendingStream) {
+    flushOutput();
+    pendingStream = stream;
+  }
+  pendingOutput.push(text);
+  pendingSize += text.length;
+  if (pendingSize >= OUTPUT_CHUNK_CHARS || performance.now() - lastFlush >= OUTPUT_FLUSH_MS) {
+    flushOutput();
+  } else if (flushTimer === null) {
+    flushTimer = setTimeout(flushOutput, OUTPUT_FLUSH_MS);
+  }
+};
+
+// Called from the input() shim: show the prompt, ask the page, and block
+// until it writes the answer into stdinBuffer
+const readInput = (prompt: string) => {
+  const header = new Int32Array(stdinBuffer!, 0, 2);
+  writeOutput('stdout', prompt);
+  flushOutput();
+  Atomics.store(header, 0, 0);
+  post({ type: 'input', id: currentRunId, prompt });
+  Atomics.wait(header, 0, 0);
+
+  const length = header[1];
+  if (length < 0) return null;
+  // TextDecoder does not read shared memory; copy the bytes out first
+  const answer = new TextDecoder().decode(new Uint8Array(stdinBuffer!, 8, length).slice());
+  writeOutput('stdout', answer + '\n');
+  return answer;
+};
+
+interface LockEntry {
+  name: string;
+  file_name: string;
+  depends: string[];
+  imports: string[];
+}
+
+const getLock = () => {
+  if (!lockPromise) {
+    lockPromise = fetch(`${packageIndexURL}pyodide-lock.json`)
+      .then(response => {
+        if (!response.ok) throw new Error(`Failed to fetch pyodide-lock.json: ${response.status}`);
+        return response.json();
+      })
+      .then((lock: { packages: Record<string, LockEntry> }) => lock.packages);
+    // A failed fetch is retried by the next cell
+    lockPromise.catch(() => { lockPromise = null; });
+  }
+  return lockPromise;
+};
+
+// Top-level import name -> distribution package (sklearn -> scikit-learn)
+const getImportMap = async () => {
+  if (!importMap) {
+    const lock = await getLock();
+    importMap = new Map();
+    for (const entry of Object.values(lock)) {
+      entry.imports.forEach(name => importMap!.set(name, entry.name));
+    }
+  }
+  return importMap;
+};
+
+// Requested names plus every dependency, each package once; names the
+// distribution does not ship are left for micropip
+const resolvePackages = (lock: Record<string, LockEntry>, packages: string[]) => {
+  const closure = new Map<string, LockEntry>();
+  const missing: string[] = [];
+  const visit = (name: string) => {
+    const key = name.toLowerCase();
+    if (closure.has(key)) return;
+    const entry = lock[key];
+    if (!entry) {
+      if (!missing.includes(name)) missing.push(name);
+      return;
+    }
+    closure.set(key, entry);
+    entry.depends.forEach(visit);
+  };
+  packages.forEach(visit);
+  return { closure: [...closure.values()], missing };
+};
+
+// Download every wheel at once, counting bytes as they stream in. The
+// responses land in the HTTP / service worker cache, so the install that
+// follows does not hit the network again.
+const prefetchWheels = async (indexURL: string, fileNames: string[]) => {
+  let loaded = 0;
+  let total = 0;
+  let lastPost = 0;
+  const report = (force = false) => {
+    const now = performance.now();
+    if (!force && now - lastPost < PROGRESS_INTERVAL_MS) return;
+    lastPost = now;
+    post({ type: 'progress', loaded, total: Math.max(total, loaded) });
+  };
+
+  await Promise.all(fileNames.map(async (fileName) => {
+    try {
+      const response = await fetch(`${indexURL}${fileName}`);
+      if (!response.ok || !response.body) return;
+      total += Number(response.headers.get('Content-Length')) || 0;
+      const reader = response.body.getReader();
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        loaded += value.byteLength;
+        report();
+      }
+    } catch {
+      // loadPackage retries the download and reports the real error
+    }
+  }));
+  report(true);
+};
+
+const loadPackages = async (packages: string[]) => {
+  if (packages.length === 0) return;
+  packages.forEach(name => post({ type: 'package', name, status: 'start' }));
+
+  const { closure, missing } = resolvePackages(await getLock(), packages);
+  // Dependencies an earlier cell installed (numpy, for matplotlib after
+  // pandas) are neither downloaded nor counted in the progress again
+  const toInstall = closure.filter(entry => !(entry.name in pyodide!.loadedPackages));
+
+  const loadErrors: string[] = [];
+  if (toInstall.length > 0) {
+    await prefetchWheels(packageIndexURL, toInstall.map(entry => entry.file_name));
+    // One call installs the rest of the closure in dependency order
+    await pyodide!.loadPackage(toInstall.map(entry => entry.name), {
+      messageCallback: () => undefined,
+      errorCallback: (message) => loadErrors.push(message)
+    });
+  }
+
+  const failed = new Map<string, string>();
+  if (missing.length > 0) {
+    try {
+      await pyodide!.loadPackage('micropip');
+      const micropip = pyodide!.pyimport('micropip');
+      try {
+        await micropip.install(missing);
+      } catch {
+        // Install one at a time only to find out which package failed
+        for (const name of missing) {
+          await micropip.install(name).catch((err: unknown) => failed.set(name, errorMessage(err)));
+        }
+      }
+    } catch (err) {
+      missing.forEach(name => failed.set(name, errorMessage(err)));
+    }
+  }
+
+  for (const name of packages) {
+    const key = name.toLowerCase();
+    const bundled = closure.find(entry => entry.name.toLowerCase() === key);
+    if (bundled && !(bundled.name in pyodide!.loadedPackages)) {
+      failed.set(name, loadErrors.join('\n') || `Failed to load ${name}`);
+    }
+    const error = failed.get(name);
+    post(error
+      ? { type: 'package', name, status: 'failed', error }
+      : { type: 'package', name, status: 'loaded' });
+  }
+};
+
+const mountModules = async (baseUrl: string, files: string[]) => {
+  const root = '/home/pyodide/healthdata';
+  pyodide!.FS.mkdirTree(root);
+  await Promise.all(files.map(async (fileName) => {
+    const response = await fetch(`${baseUrl}/${fileName}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch healthdata/${fileName}: ${response.status}`);
+    }
+    pyodide!.FS.writeFile(`${root}/${fileName}`, await response.text());
+  }));
+};
+
+const init = async (request: Extract<PyodideWorkerRequest, { type: 'init' }>): Promise<StartupTimings> => {
+  const started = performance.now();
+  let mark = started;
+  const lap = () => {
+    const now = performance.now();
+    const elapsed = now - mark;
+    mark = now;
+    return Math.round(elapsed);
+  };
+
+  self.importScripts(`${request.indexURL}pyodide.js`);
+  pyodide = await self.loadPyodide({ indexURL: request.indexURL });
+  pyodide.setStdout({ batched: (text) => writeOutput('stdout', text + '\n') });
+  pyodide.setStderr({ batched: (text) => writeOutput('stderr', text + '\n') });
+  if (request.interruptBuffer) {
+    // The main thread writes 2 (SIGINT) here to raise KeyboardInterrupt
+    pyodide.setInterruptBuffer(request.interruptBuffer);
+    interruptBuffer = request.interruptBuffer;
+  }
+  stdinBuffer = request.stdinBuffer ?? null;
+
+  packageIndexURL = request.indexURL;
+  allowedPackages = request.packages;
+  const runtime = lap();
+
+  await mountModules(request.modules.baseUrl, request.modules.files);
+  const modules = lap();
+
+  await pyodide.runPythonAsync(`
+import sys
+if "/home/pyodide" not in sys.path:
+    sys.path.insert(0, "/home/pyodide")
+${request.setupCode}
+  `);
+  pyodide.globals.set('_read_input', stdinBuffer ? readInput : null);
+  await pyodide.runPythonAsync(INPUT_SHIM);
+  template = pyodide.globals.get('dict')() as PyProxy;
+  template.set('__name__', '__main__');
+  template.set('__builtins__', pyodide.globals.get('__builtins__'));
+  await pyodide.runPythonAsync(NAMESPACE_PRELUDE, { globals: template });
+  lazy = pyodide.pyimport('healthdata.lazy');
+  // matplotlib imports the figure backend the first time a cell plots
+  lazy!.when_imported('healthdata.figures', () => {
+    figures = pyodide!.pyimport('healthdata.figures');
+    figures!.set_sink(sendFigure);
+  });
+  try {
+    profiler = pyodide.pyimport('healthdata.profiler');
+  } catch {
+    profiler = null;
+  }
+  const setup = lap();
+  // Anything printed during startup belongs to no run
+  flushOutput();
+
+  return { runtime, modules, setup, total: Math.round(mark - started) };
+};
+
+// Install what a cell imports before running it. Only names Python cannot
+// import yet are looked up, so once a package is in, later cells skip this.
+const ensurePackages = async (code: string) => {
+  const found = lazy!.find_imports(code);
+  const missing = found.toJs();
+  found.destroy();
+  if (missing.length === 0) return;
+
+  const map = await getImportMap();
+  const packages = new Set<string>();
+  for (const name of missing) {
+    const bundled = map.get(name);
+    // Anything else is only fetched from PyPI if the content asks for it;
+    // otherwise the cell's own ModuleNotFoundError explains the problem
+    const listed = allowedPackages.find(pkg => pkg.toLowerCase() === name.toLowerCase());
+    if (bundled || listed) packages.add(bundled ?? listed!);
+  }
+  await loadPackages([...packages]);
+};
+
+// A shallow copy of the template: a new dict, but the imported modules are shared
+const getNamespace = (name: string) => {
+  let namespace = namespaces.get(name);
+  if (!namespace) {
+    namespace = template!.copy();
+    namespaces.set(name, namespace);
+  }
+  return namespace;
+};
+
+// Pyodide does not expose its heap publicly; read it when we can
+const heapBytes = () => pyodide?._module?.HEAPU8?.byteLength;
+
+const startProfile = (request: Extract<PyodideWorkerRequest, { type: 'run' }>) => {
+  if (!request.profile || !profiler) return;
+  try {
+    profiler.start(request.profile.hotLines ?? 0, '<exec>', request.code);
+  } catch {
+    // Profiling is best effort and must never fail the run
+  }
+};
+
+const finishProfile = (wallMs: number, heapBefore: number | undefined): RunProfile => {
+  const heapAfter = heapBytes();
+  const profile: RunProfile = {
+    wallMs: Math.round(wallMs * 10) / 10,
+    heapBytes: heapAfter,
+    heapGrowthBytes: heapAfter !== undefined && heapBefore !== undefined ? heapAfter - heapBefore : undefined
+  };
+  if (!profiler) return profile;
+  let result: any = null;
+  try {
+    result = profiler.stop();
+    if (result) {
+      const measured = result.toJs({ dict_converter: Object.fromEntries });
+      profile.pythonPeakBytes = measured.python_peak_bytes ?? undefined;
+      if (measured.hot_lines?.length) profile.hotLines = measured.hot_lines;
+    }
+  } catch {
+    // see startProfile
+  } finally {
+    result?.destroy?.();
+  }
+  return profile;
+};
+
+const run = async (request: Extract<PyodideWorkerRequest, { type: 'run' }>) => {
+  currentRunId = request.id;
+  if (!cancelledRuns.has(request.id)) {
+    try {
+      await ensurePackages(request.code);
+    } catch (err) {
+      console.warn('Failed to install packages for a cell:', err);
+    }
+  }
+  // A cancel may also arrive while packages install
+  if (cancelledRuns.delete(request.id)) {
+    post({ type: 'result', id: request.id, ok: false, error: 'Execution cancelled', profile: { wallMs: 0 } });
+    return;
+  }
+  // An interrupt meant for an earlier run may have landed after it ended
+  if (interruptBuffer) interruptBuffer[0] = 0;
+  post({ type: 'started', id: request.id });
+  lastFlush = performance.now();
+  figures?.reset();
+  const heapBefore = heapBytes();
+  startProfile(request);
+  const started = performance.now();
+  try {
+    const namespace = getNamespace(request.namespace);
+    const result = await pyodide!.runPythonAsync(request.code, { globals: namespace });
+    const profile = finishProfile(performance.now() - started, heapBefore);
+    const value = result === undefined || result === null ? undefined : String(result);
+    (result as Partial<PyProxy> | undefined)?.destroy?.();
+    flushOutput();
+    post({ type: 'result', id: request.id, ok: true, value, profile });
+  } catch (err) {
+    const profile = finishProfile(performance.now() - started, heapBefore);
+    flushOutput();
+    post({ type: 'result', id: request.id, ok: false, error: errorMessage(err), profile });
+  }
+};
+
+self.onmessage = (event: MessageEvent<PyodideWorkerRequest>) => {
+  const request = event.data;
+
+  // Handled right away, not queued: the run it targets is still waiting
+  if (request.type === 'cancel') {
+    cancelledRuns.add(request.id);
+    return;
+  }
+
+  // Serialize everything: runs must not interleave inside one interpreter
+  queue = queue.then(async () => {
+    switch (request.type) {
+      case 'init':
+        try {
+          post({ type: 'ready', timings: await init(request) });
+        } catch (err) {
+          post({ type: 'initError', error: errorMessage(err) });
+        }
+        break;
+      case 'run':
+        await run(request);
+        break;
+      case 'dropNamespace':
+        namespaces.get(request.namespace)?.destroy();
+        namespaces.delete(request.namespace);
+        break;
+    }
+  });
+};
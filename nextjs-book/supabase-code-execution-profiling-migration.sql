@@ -0,0 +1,35 @@
+-- Migration: Record per-run profiling measurements on code_executions
+-- Run this in your Supabase SQL editor after supabase-code-executions-migration.sql
+
+-- Wall time and Wasm heap size are sent with every run; the Python
+-- allocation peak and hot lines only when the learner turned profiling on
+ALTER TABLE code_executions
+  ADD COLUMN IF NOT EXISTS duration_ms INTEGER CHECK (duration_ms >= 0),
+  ADD COLUMN IF NOT EXISTS wasm_heap_bytes BIGINT CHECK (wasm_heap_bytes >= 0),
+  ADD COLUMN IF NOT EXISTS python_peak_bytes BIGINT CHECK (python_peak_bytes >= 0),
+  ADD COLUMN IF NOT EXISTS hot_lines JSONB; -- [{line, ms, hits, source}], slowest first
+
+CREATE INDEX IF NOT EXISTS idx_code_executions_section_duration
+  ON code_executions(chapter_id, section_id)
+  WHERE duration_ms IS NOT NULL;
+
+-- Which code sections run slowest for learners, to find lessons worth optimizing
+CREATE OR REPLACE VIEW slow_code_sections AS
+SELECT 
+  ce.organization_id,
+  ce.chapter_id,
+  c.title as chapter_title,
+  ce.section_id,
+  COUNT(*) as runs,
+  ROUND(AVG(ce.duration_ms)) as avg_duration_ms,
+  PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY ce.duration_ms) as p95_duration_ms,
+  MAX(ce.python_peak_bytes) as max_python_peak_bytes,
+  MAX(ce.wasm_heap_bytes) as max_wasm_heap_bytes
+FROM code_executions ce
+JOIN chapters c ON ce.chapter_id = c.id
+WHERE ce.duration_ms IS NOT NULL
+  AND ce.execution_status = 'success'
+GROUP BY ce.organization_id, ce.chapter_id, c.title, ce.section_id;
+
+-- Grant access to the view
+GRANT SELECT ON slow_code_sections TO authenticated;
@@ -0,0 +1,413 @@
+-- Migration: Rollup tables for code execution analytics, and a partitioned,
+-- retention-managed code_executions table
+-- Run this in your Supabase SQL editor after supabase-code-executions-migration.sql
+-- and supabase-code-execution-profiling-migration.sql
+
+BEGIN;
+
+-- ---------------------------------------------------------------------------
+-- Rollup tables
+-- ---------------------------------------------------------------------------
+
+-- Learners per bucket are kept as a 4096-bit linear-counting sketch: each
+-- learner sets one bit chosen by a hash of their id. Sketches combine with
+-- bitwise OR, so distinct learners over any range of hours or sections can
+-- be estimated without touching the raw table (within a few percent up to
+-- roughly 10,000 learners).
+CREATE OR REPLACE FUNCTION public.learner_sketch_bit(learner UUID)
+RETURNS INTEGER
+LANGUAGE SQL
+IMMUTABLE
+AS $$
+  SELECT (hashtext(learner::text) & 4095)
+$$;
+
+CREATE OR REPLACE FUNCTION public.learner_sketch_estimate(sketch BIT(4096))
+RETURNS INTEGER
+LANGUAGE SQL
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN sketch IS NULL THEN 0
+    WHEN bit_count(sketch) = 4096 THEN 4096 -- saturated: a lower bound
+    ELSE round(-4096 * ln((4096 - bit_count(sketch))::numeric / 4096))::integer
+  END
+$$;
+
+-- Runs per organization, chapter, section and hour
+CREATE TABLE IF NOT EXISTS code_execution_hourly_rollups (
+  organization_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+  chapter_id UUID NOT NULL REFERENCES chapters(id) ON DELETE CASCADE,
+  section_id VARCHAR(255) NOT NULL,
+  hour TIMESTAMP WITH TIME ZONE NOT NULL,
+  success_count INTEGER NOT NULL DEFAULT 0,
+  error_count INTEGER NOT NULL DEFAULT 0,
+  timeout_count INTEGER NOT NULL DEFAULT 0,
+  learners BIT(4096) NOT NULL DEFAULT B'0'::BIT(4096),
+  PRIMARY KEY (organization_id, chapter_id, section_id, hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_code_execution_hourly_rollups_org_hour
+  ON code_execution_hourly_rollups(organization_id, hour DESC);
+
+-- Runs per learner and section, for the per-learner dashboard table
+CREATE TABLE IF NOT EXISTS code_execution_user_rollups (
+  organization_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  chapter_id UUID NOT NULL REFERENCES chapters(id) ON DELETE CASCADE,
+  section_id VARCHAR(255) NOT NULL,
+  success_count INTEGER NOT NULL DEFAULT 0,
+  error_count INTEGER NOT NULL DEFAULT 0,
+  timeout_count INTEGER NOT NULL DEFAULT 0,
+  first_execution TIMESTAMP WITH TIME ZONE NOT NULL,
+  last_execution TIMESTAMP WITH TIME ZONE NOT NULL,
+  PRIMARY KEY (organization_id, user_id, chapter_id, section_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_code_execution_user_rollups_user
+  ON code_execution_user_rollups(user_id);
+
+-- Folds each INSERT statement into the rollups. Statement-level with a
+-- transition table, so a bulk insert of N runs costs one upsert per
+-- distinct bucket rather than N. SECURITY DEFINER because learners may
+-- insert runs but not write the rollups directly.
+CREATE OR REPLACE FUNCTION public.rollup_code_executions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- Rows are upserted in key order, hourly rollups before user rollups, so
+  -- concurrent batches touching the same sections take their row locks in
+  -- the same order and queue up instead of deadlocking
+  INSERT INTO code_execution_hourly_rollups AS r (
+    organization_id, chapter_id, section_id, hour,
+    success_count, error_count, timeout_count, learners
+  )
+  SELECT
+    organization_id,
+    chapter_id,
+    section_id,
+    date_trunc('hour', executed_at),
+    COUNT(*) FILTER (WHERE execution_status = 'success'),
+    COUNT(*) FILTER (WHERE execution_status = 'error'),
+    COUNT(*) FILTER (WHERE execution_status = 'timeout'),
+    bit_or(set_bit(B'0'::BIT(4096), learner_sketch_bit(user_id), 1))
+  FROM new_rows
+  GROUP BY organization_id, chapter_id, section_id, date_trunc('hour', executed_at)
+  ORDER BY organization_id, chapter_id, section_id, date_trunc('hour', executed_at)
+  ON CONFLICT (organization_id, chapter_id, section_id, hour) DO UPDATE SET
+    success_count = r.success_count + EXCLUDED.success_count,
+    error_count = r.error_count + EXCLUDED.error_count,
+    timeout_count = r.timeout_count + EXCLUDED.timeout_count,
+    learners = r.learners | EXCLUDED.learners;
+
+  INSERT INTO code_execution_user_rollups AS r (
+    organization_id, user_id, chapter_id, section_id,
+    success_count, error_count, timeout_count, first_execution, last_execution
+  )
+  SELECT
+    organization_id,
+    user_id,
+    chapter_id,
+    section_id,
+    COUNT(*) FILTER (WHERE execution_status = 'success'),
+    COUNT(*) FILTER (WHERE execution_status = 'error'),
+    COUNT(*) FILTER (WHERE execution_status = 'timeout'),
+    MIN(executed_at),
+    MAX(executed_at)
+  FROM new_rows
+  GROUP BY organization_id, user_id, chapter_id, section_id
+  ORDER BY organization_id, user_id, chapter_id, section_id
+  ON CONFLICT (organization_id, user_id, chapter_id, section_id) DO UPDATE SET
+    success_count = r.success_count + EXCLUDED.success_count,
+    error_count = r.error_count + EXCLUDED.error_count,
+    timeout_count = r.timeout_count + EXCLUDED.timeout_count,
+    first_execution = LEAST(r.first_execution, EXCLUDED.first_execution),
+    last_execution = GREATEST(r.last_execution, EXCLUDED.last_execution);
+
+  RETURN NULL;
+END;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- Partition code_executions by month of executed_at
+-- ---------------------------------------------------------------------------
+
+-- Views reference the table itself, not its name: drop them before the
+-- rename and recreate them over the new table below
+DROP VIEW IF EXISTS admin_code_execution_stats;
+DROP VIEW IF EXISTS slow_code_sections;
+
+ALTER TABLE code_executions RENAME TO code_executions_unpartitioned;
+
+-- Index names are unique per schema; free them for the new table
+ALTER INDEX code_executions_pkey RENAME TO code_executions_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_code_executions_user_id;
+DROP INDEX IF EXISTS idx_code_executions_chapter_id;
+DROP INDEX IF EXISTS idx_code_executions_organization_id;
+DROP INDEX IF EXISTS idx_code_executions_executed_at;
+DROP INDEX IF EXISTS idx_code_executions_status;
+DROP INDEX IF EXISTS idx_code_executions_user_chapter;
+DROP INDEX IF EXISTS idx_code_executions_section_duration;
+
+CREATE TABLE code_executions (
+  id UUID DEFAULT gen_random_uuid(),
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  organization_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+  chapter_id UUID NOT NULL REFERENCES chapters(id) ON DELETE CASCADE,
+  section_id VARCHAR(255) NOT NULL, -- Identifier for specific code block within chapter
+  code_content TEXT NOT NULL, -- The actual code that was executed
+  execution_result TEXT, -- Output/result of the code execution (nullable)
+  execution_status VARCHAR(20) NOT NULL CHECK (execution_status IN ('success', 'error', 'timeout')),
+  error_message TEXT, -- Error details if execution failed (nullable)
+  execution_mode VARCHAR(20) NOT NULL CHECK (execution_mode IN ('shared', 'isolated')),
+  context_id VARCHAR(255) NOT NULL, -- Context identifier (chapter ID for shared, section ID for isolated)
+  executed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(), -- partition key
+  session_id UUID, -- To group related executions (optional)
+  duration_ms INTEGER CHECK (duration_ms >= 0),
+  wasm_heap_bytes BIGINT CHECK (wasm_heap_bytes >= 0),
+  python_peak_bytes BIGINT CHECK (python_peak_bytes >= 0),
+  hot_lines JSONB,
+  PRIMARY KEY (id, executed_at)
+) PARTITION BY RANGE (executed_at);
+
+-- Rows outside every monthly partition. It should stay empty: a month
+-- cannot get its own partition while the default one holds rows for it,
+-- which is why the job below creates partitions two months ahead.
+CREATE TABLE IF NOT EXISTS code_executions_default PARTITION OF code_executions DEFAULT;
+-- Partitions are tables of their own in the API schema. RLS with no
+-- policies keeps them unreadable directly; queries go through the parent.
+ALTER TABLE code_executions_default ENABLE ROW LEVEL SECURITY;
+
+-- Create the monthly partitions from `from_month` until `months_ahead`
+-- months from now; existing partitions are left alone
+CREATE OR REPLACE FUNCTION public.create_code_execution_partitions(
+  months_ahead INTEGER DEFAULT 2,
+  from_month DATE DEFAULT date_trunc('month', now())::date
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  month_start DATE := date_trunc('month', from_month)::date;
+  last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+  partition_name TEXT;
+BEGIN
+  WHILE month_start <= last_month LOOP
+    partition_name := 'code_executions_' || to_char(month_start, 'YYYY_MM');
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS %I PARTITION OF code_executions FOR VALUES FROM (%L) TO (%L)',
+      partition_name,
+      month_start,
+      (month_start + INTERVAL '1 month')::date
+    );
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', partition_name);
+    month_start := (month_start + INTERVAL '1 month')::date;
+  END LOOP;
+END;
+$$;
+
+-- Drop monthly partitions that ended more than `keep_months` months ago.
+-- The rollups keep the counts for those months; only raw runs are removed.
+CREATE OR REPLACE FUNCTION public.drop_code_execution_partitions(keep_months INTEGER DEFAULT 6)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  cutoff DATE := (date_trunc('month', now()) - make_interval(months => keep_months))::date;
+  partition_name TEXT;
+  dropped INTEGER := 0;
+BEGIN
+  FOR partition_name IN
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+    JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+    WHERE parent.relname = 'code_executions'
+      AND child.relname ~ '^code_executions_\d{4}_\d{2}$'
+      AND to_date(substring(child.relname FROM '\d{4}_\d{2}$'), 'YYYY_MM') < cutoff
+  LOOP
+    EXECUTE format('DROP TABLE %I', partition_name);
+    dropped := dropped + 1;
+  END LOOP;
+  RETURN dropped;
+END;
+$$;
+
+-- Partitions for every month that already has runs, plus the next two
+SELECT public.create_code_execution_partitions(
+  2,
+  COALESCE((SELECT MIN(executed_at) FROM code_executions_unpartitioned)::date, now()::date)
+);
+
+-- Indexes are created on each partition automatically
+CREATE INDEX IF NOT EXISTS idx_code_executions_user_id ON code_executions(user_id);
+CREATE INDEX IF NOT EXISTS idx_code_executions_chapter_id ON code_executions(chapter_id);
+CREATE INDEX IF NOT EXISTS idx_code_executions_organization_id ON code_executions(organization_id);
+CREATE INDEX IF NOT EXISTS idx_code_executions_executed_at ON code_executions(executed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_code_executions_status ON code_executions(execution_status);
+CREATE INDEX IF NOT EXISTS idx_code_executions_user_chapter ON code_executions(user_id, chapter_id);
+CREATE INDEX IF NOT EXISTS idx_code_executions_section_duration
+  ON code_executions(chapter_id, section_id)
+  WHERE duration_ms IS NOT NULL;
+
+CREATE TRIGGER rollup_code_executions
+  AFTER INSERT ON code_executions
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_code_executions();
+
+-- Copying the existing runs through the trigger also backfills the rollups
+INSERT INTO code_executions (
+  id, user_id, organization_id, chapter_id, section_id, code_content, execution_result,
+  execution_status, error_message, execution_mode, context_id, executed_at, session_id,
+  duration_ms, wasm_heap_bytes, python_peak_bytes, hot_lines
+)
+SELECT
+  id, user_id, organization_id, chapter_id, section_id, code_content, execution_result,
+  execution_status, error_message, execution_mode, context_id, COALESCE(executed_at, now()), session_id,
+  duration_ms, wasm_heap_bytes, python_peak_bytes, hot_lines
+FROM code_executions_unpartitioned;
+
+-- Drop the old table once the copy has been checked:
+-- DROP TABLE code_executions_unpartitioned;
+
+-- ---------------------------------------------------------------------------
+-- Row Level Security
+-- ---------------------------------------------------------------------------
+
+ALTER TABLE code_executions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own code executions" ON code_executions
+  FOR SELECT USING (user_id = auth.uid());
+
+CREATE POLICY "Users can insert their own code executions" ON code_executions
+  FOR INSERT WITH CHECK (
+    user_id = auth.uid() AND
+    organization_id = public.user_organization_id()
+  );
+
+CREATE POLICY "Instructors and admins can view organization code executions" ON code_executions
+  FOR SELECT USING (
+    organization_id = public.user_organization_id() AND
+    public.user_role() IN ('OWNER', 'ADMIN', 'INSTRUCTOR')
+  );
+
+-- Rollups are written only by the trigger
+ALTER TABLE code_execution_hourly_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE code_execution_user_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Instructors and admins can view organization execution rollups" ON code_execution_hourly_rollups
+  FOR SELECT USING (
+    organization_id = public.user_organization_id() AND
+    public.user_role() IN ('OWNER', 'ADMIN', 'INSTRUCTOR')
+  );
+
+CREATE POLICY "Users can view their own execution rollups" ON code_execution_user_rollups
+  FOR SELECT USING (user_id = auth.uid());
+
+CREATE POLICY "Instructors and admins can view organization learner rollups" ON code_execution_user_rollups
+  FOR SELECT USING (
+    organization_id = public.user_organization_id() AND
+    public.user_role() IN ('OWNER', 'ADMIN', 'INSTRUCTOR')
+  );
+
+-- ---------------------------------------------------------------------------
+-- Views
+-- ---------------------------------------------------------------------------
+
+-- Same columns as before, now read from the per-learner rollup
+CREATE OR REPLACE VIEW admin_code_execution_stats AS
+SELECT
+  r.organization_id,
+  r.user_id,
+  u.first_name,
+  u.last_name,
+  u.email,
+  r.chapter_id,
+  c.title as chapter_title,
+  r.section_id,
+  r.success_count + r.error_count + r.timeout_count as total_executions,
+  r.success_count as successful_executions,
+  r.error_count as error_executions,
+  r.last_execution,
+  r.first_execution
+FROM code_execution_user_rollups r
+JOIN users u ON r.user_id = u.id
+JOIN chapters c ON r.chapter_id = c.id;
+
+GRANT SELECT ON admin_code_execution_stats TO authenticated;
+
+-- Totals and distinct learners for an organization since a point in time.
+-- SECURITY INVOKER: the rollups' RLS decides who may read what.
+CREATE OR REPLACE FUNCTION public.code_execution_summary(org UUID, since TIMESTAMP WITH TIME ZONE DEFAULT '-infinity')
+RETURNS TABLE (
+  successful_executions INTEGER,
+  error_executions INTEGER,
+  timeout_executions INTEGER,
+  learners INTEGER
+)
+LANGUAGE SQL
+STABLE
+AS $$
+  SELECT
+    COALESCE(SUM(success_count), 0)::integer,
+    COALESCE(SUM(error_count), 0)::integer,
+    COALESCE(SUM(timeout_count), 0)::integer,
+    public.learner_sketch_estimate(bit_or(learners))
+  FROM code_execution_hourly_rollups
+  WHERE organization_id = org
+    AND hour >= date_trunc('hour', since)
+$$;
+
+GRANT EXECUTE ON FUNCTION public.code_execution_summary(UUID, TIMESTAMP WITH TIME ZONE) TO authenticated;
+
+-- Recreated over the partitioned table (see supabase-code-execution-profiling-migration.sql)
+CREATE OR REPLACE VIEW slow_code_sections AS
+SELECT
+  ce.organization_id,
+  ce.chapter_id,
+  c.title as chapter_title,
+  ce.section_id,
+  COUNT(*) as runs,
+  ROUND(AVG(ce.duration_ms)) as avg_duration_ms,
+  PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY ce.duration_ms) as p95_duration_ms,
+  MAX(ce.python_peak_bytes) as max_python_peak_bytes,
+  MAX(ce.wasm_heap_bytes) as max_wasm_heap_bytes
+FROM code_executions ce
+JOIN chapters c ON ce.chapter_id = c.id
+WHERE ce.duration_ms IS NOT NULL
+  AND ce.execution_status = 'success'
+GROUP BY ce.organization_id, ce.chapter_id, c.title, ce.section_id;
+
+GRANT SELECT ON slow_code_sections TO authenticated;
+
+COMMIT;
+
+-- ---------------------------------------------------------------------------
+-- Scheduling (outside the transaction)
+-- ---------------------------------------------------------------------------
+
+-- With pg_cron enabled (Database > Extensions), create next months'
+-- partitions and drop expired ones nightly. Without it, run the two
+-- SELECTs below from any scheduler at least once a month.
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+    PERFORM cron.schedule(
+      'code-execution-partitions',
+      '15 3 * * *',
+      'SELECT public.create_code_execution_partitions(2); SELECT public.drop_code_execution_partitions(6);'
+    );
+  END IF;
+END;
+$$;
+
+-- SELECT public.create_code_execution_partitions(2);
+-- SELECT public.drop_code_execution_partitions(6);